@@ -3,22 +3,69 @@
 #
 # SPDX-License-Identifier: MIT
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
 import dataclasses
-from typing import Optional, Union
-from uuid import uuid4
-
-from aiohttp import ClientSession
-from aiohttp.http_exceptions import HttpProcessingError
+from itertools import count
+from json import dumps
+import logging
+from os import urandom
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from aiohttp import (
+    ClientResponse,
+    ClientResponseError,
+    ClientSession,
+    CookieJar,
+    TCPConnector,
+)
 from jwt import encode as jwtEncode
 
 from async_pjsekai.models.game_version import GameVersion
 from async_pjsekai.models.system_info import SystemInfo
 from async_pjsekai.asset_bundle import AssetBundle
+from async_pjsekai.connection_pool import ConnectionPool, ConnectionPoolStatistics
 from async_pjsekai.exceptions import UpdateRequired, SessionExpired, MissingJWTScecret
 from async_pjsekai.enums.tutorial_status import TutorialStatus
+from async_pjsekai.http_cache import CacheEntry, HttpCache
+from async_pjsekai.offload import Offloader
+from async_pjsekai.partial_download import PartialDownload, Segment
+from async_pjsekai.rate_limit import RateLimit, RateLimiter, RateLimiterStatistics
+from async_pjsekai.resilience import CircuitBreaker, CircuitBreakerPolicy, RetryPolicy
+from async_pjsekai.shared_stream import SharedStream
+from async_pjsekai.enums.domain import Domain
 from async_pjsekai.enums.platform import AssetOS, Platform
-from async_pjsekai.utilities import encrypt, decrypt, msgpack, unmsgpack
+from async_pjsekai.utilities import (
+    encrypt,
+    decrypt,
+    decrypted,
+    msgpack,
+    unmsgpack,
+    unmsgpack_map_items_stream,
+)
+
+R = TypeVar("R")
+
+log = logging.getLogger(__name__)
+
+
+def _request_id() -> str:
+    # str(uuid4()) without the UUID object in between
+    data = bytearray(urandom(16))
+    data[6] = data[6] & 0x0F | 0x40
+    data[8] = data[8] & 0x3F | 0x80
+    digits = data.hex()
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
 
 
 class API:
@@ -31,11 +78,73 @@ class API:
     game_version: GameVersion
     server_number: Optional[int]
 
-    _session: ClientSession
+    connection_pool: ConnectionPool
+    connection_pools: dict[Domain, ConnectionPool]
+
+    _cookie_jar: Optional[CookieJar]
+    _sessions: dict[Domain, ClientSession]
+
+    @property
+    def cookie_jar(self) -> CookieJar:
+        if self._cookie_jar is None:
+            self._cookie_jar = CookieJar()
+        return self._cookie_jar
+
+    def session_for(self, domain: Domain) -> ClientSession:
+        if (session := self._sessions.get(domain)) is None:
+            session = ClientSession(
+                connector=self.connection_pools.get(
+                    domain, self.connection_pool
+                ).connector(),
+                cookie_jar=self.cookie_jar,
+            )
+            self._sessions[domain] = session
+        return session
 
     @property
     def session(self) -> ClientSession:
-        return self._session
+        return self.session_for(Domain.API)
+
+    retry_policy: RetryPolicy
+    circuit_breaker_policy: CircuitBreakerPolicy
+
+    _circuit_breakers: dict[Domain, CircuitBreaker]
+    _in_flight: dict[Hashable, asyncio.Future]
+    _in_flight_streams: dict[Hashable, tuple[SharedStream, asyncio.Future]]
+
+    rate_limits: dict[Domain, RateLimit]
+
+    _rate_limiters: dict[Domain, RateLimiter]
+
+    http_cache: Optional[HttpCache]
+    offloader: Offloader
+
+    def rate_limiter(self, domain: Domain) -> Optional[RateLimiter]:
+        if (rate_limiter := self._rate_limiters.get(domain)) is None:
+            if (rate_limit := self.rate_limits.get(domain)) is None:
+                return None
+            rate_limiter = RateLimiter(domain.value, rate_limit)
+            self._rate_limiters[domain] = rate_limiter
+        return rate_limiter
+
+    def rate_limit_statistics(self) -> dict[Domain, RateLimiterStatistics]:
+        return {
+            domain: rate_limiter.statistics()
+            for domain, rate_limiter in self._rate_limiters.items()
+        }
+
+    def circuit_breaker(self, domain: Domain) -> CircuitBreaker:
+        if (circuit_breaker := self._circuit_breakers.get(domain)) is None:
+            circuit_breaker = CircuitBreaker(domain.value, self.circuit_breaker_policy)
+            self._circuit_breakers[domain] = circuit_breaker
+        return circuit_breaker
+
+    def connection_statistics(self) -> dict[Domain, ConnectionPoolStatistics]:
+        return {
+            domain: ConnectionPoolStatistics.of(session.connector)
+            for domain, session in self._sessions.items()
+            if isinstance(session.connector, TCPConnector)
+        }
 
     _session_token: Optional[str]
 
@@ -139,6 +248,8 @@ class API:
 
     DEFAULT_CHUNK_SIZE: int = 1024 * 1024
 
+    DEFAULT_CONNECTION_POOL: ConnectionPool = ConnectionPool()
+
     def __init__(
         self,
         platform: Platform,
@@ -156,9 +267,34 @@ class API:
         enable_game_version_encryption: bool,
         enable_signature_encryption: bool,
         server_number: Optional[int] = None,
+        connection_pool: Optional[ConnectionPool] = None,
+        connection_pools: Optional[dict[Domain, ConnectionPool]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker_policy: Optional[CircuitBreakerPolicy] = None,
+        rate_limits: Optional[dict[Domain, RateLimit]] = None,
+        http_cache: Optional[HttpCache] = None,
+        offloader: Optional[Offloader] = None,
     ) -> None:
         self.platform = platform
-        self._session = ClientSession()
+        self.offloader = Offloader() if offloader is None else offloader
+        self.http_cache = http_cache
+        self.retry_policy = RetryPolicy() if retry_policy is None else retry_policy
+        self.circuit_breaker_policy = (
+            CircuitBreakerPolicy()
+            if circuit_breaker_policy is None
+            else circuit_breaker_policy
+        )
+        self._circuit_breakers = {}
+        self.rate_limits = {} if rate_limits is None else rate_limits
+        self._rate_limiters = {}
+        self._in_flight = {}
+        self._in_flight_streams = {}
+        self.connection_pool = (
+            self.DEFAULT_CONNECTION_POOL if connection_pool is None else connection_pool
+        )
+        self.connection_pools = {} if connection_pools is None else connection_pools
+        self._cookie_jar = None
+        self._sessions = {}
         self.key = key
         self.iv = iv
         self.jwt_secret = jwt_secret
@@ -175,10 +311,14 @@ class API:
         self.server_number = server_number
 
         self._session_token = None
+        self._header_template_key = None
+        self._header_template = {}
         self.game_version = GameVersion().create()
 
     async def close(self):
-        await self.session.close()
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
 
     def _pack(
         self, plaintext_dict: Optional[dict], enable_encryption: bool = True
@@ -200,27 +340,270 @@ class API:
     def _unpack(self, ciphertext: bytes, enable_decryption: bool = True) -> dict:
         return unmsgpack(self._decrypt(ciphertext, enable_decryption))
 
-    def _generate_headers(self, system_info: SystemInfo) -> dict:
+    async def _decrypt_offloaded(
+        self, ciphertext: bytes, enable_decryption: bool = True
+    ) -> bytes:
+        if not enable_decryption:
+            return ciphertext
+        return await self.offloader.run(
+            "decrypt",
+            len(ciphertext),
+            decrypt,
+            ciphertext,
+            self.key or b"",
+            self.iv or b"",
+        )
+
+    async def _unmsgpack_offloaded(self, data: bytes) -> dict:
+        return await self.offloader.run("unpack", len(data), unmsgpack, data)
+
+    @staticmethod
+    def _raise_for_status(response: ClientResponse) -> None:
+        if response.status == 426:
+            raise UpdateRequired
+        elif response.status == 403:
+            raise SessionExpired
+        response.raise_for_status()
+
+    async def _resilient(
+        self,
+        domain: Domain,
+        method: str,
+        send: Callable[[], Awaitable[R]],
+        idempotent: Optional[bool] = None,
+    ) -> R:
+        """
+        Sends through the rate limiter and circuit breaker of `domain`,
+        retrying transient failures if `method` is retried by the retry policy,
+        or if `idempotent` says the request is safe to send twice.
+        """
+        circuit_breaker = self.circuit_breaker(domain)
+        rate_limiter = self.rate_limiter(domain)
+        retry_policy = self.retry_policy
+        if idempotent is None:
+            idempotent = retry_policy.retries(method)
+        attempts = retry_policy.attempts if idempotent else 1
+        for attempt in count():
+            # retries are requests too, so they wait for their turn as well
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+            circuit_breaker.check()
+            try:
+                result = await send()
+            except Exception as e:
+                if not retry_policy.is_transient(e):
+                    # the server did answer, so the domain is up
+                    circuit_breaker.record_success()
+                    raise
+                circuit_breaker.record_failure()
+                if attempt + 1 >= attempts:
+                    raise
+                delay = retry_policy.delay(attempt)
+                log.warning(
+                    f"{method} to {domain.value} failed ({e}), retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+            except BaseException:
+                circuit_breaker.record_abort()
+                raise
+            else:
+                circuit_breaker.record_success()
+                return result
+        raise AssertionError("unreachable")
+
+    @asynccontextmanager
+    async def _request(
+        self, domain: Domain, method: str, url: str, **kwargs: Any
+    ) -> AsyncIterator[ClientResponse]:
+        """
+        Sends a request through the retry policy and circuit breaker of
+        `domain` and yields the response once its status is successful. The
+        body is streamed by the caller, so failures while reading it are not
+        retried; use `_request_read` for bodies that should be.
+        """
+
+        async def send() -> ClientResponse:
+            response = await self.session_for(domain).request(method, url, **kwargs)
+            try:
+                self._raise_for_status(response)
+            except BaseException:
+                response.release()
+                raise
+            return response
+
+        response = await self._resilient(domain, method, send)
+        try:
+            yield response
+        finally:
+            response.release()
+
+    async def _request_read(
+        self,
+        domain: Domain,
+        method: str,
+        url: str,
+        idempotent: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> tuple[ClientResponse, bytes]:
+        async def send() -> tuple[ClientResponse, bytes]:
+            async with self.session_for(domain).request(
+                method, url, **kwargs
+            ) as response:
+                self._raise_for_status(response)
+                return response, await response.read()
+
+        return await self._resilient(domain, method, send, idempotent)
+
+    @staticmethod
+    def _flight_key(
+        method: str,
+        url: str,
+        headers: dict,
+        params: Optional[dict] = None,
+        *extra: Hashable,
+    ) -> Hashable:
+        """
+        The key requests are shared by. Params are keyed by a canonical JSON
+        encoding, so list values work too; requests with params that cannot be
+        encoded get a key of their own and are never shared.
+        """
+        try:
+            encoded_params = (
+                None
+                if params is None
+                else dumps(params, sort_keys=True, separators=(",", ":"))
+            )
+        except (TypeError, ValueError):
+            return object()
+        return (
+            method.upper(),
+            url,
+            # every request gets a fresh id, which says nothing about the response
+            frozenset(
+                (key, value) for key, value in headers.items() if key != "X-Request-Id"
+            ),
+            encoded_params,
+            *extra,
+        )
+
+    async def _single_flight(
+        self, key: Hashable, send: Callable[[], Awaitable[R]]
+    ) -> R:
+        """
+        Shares one in-flight `send()` between concurrent callers with the same
+        `key`. Results are shared as they are, so only use this for immutable
+        ones. A cancelled caller does not cancel the request for the others.
+        """
+
+        if (future := self._in_flight.get(key)) is None:
+            future = asyncio.ensure_future(send())
+            self._in_flight[key] = future
+
+            def done(_: asyncio.Future):
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+            future.add_done_callback(done)
+        return await asyncio.shield(future)
+
+    def _shared_stream(
+        self, key: Hashable, fill: Callable[[SharedStream], Awaitable[None]]
+    ) -> SharedStream:
+        """
+        `_single_flight` for streamed bodies: concurrent callers with the same
+        `key` read the one body `fill` writes, as it is being received.
+        """
+
+        if (in_flight := self._in_flight_streams.get(key)) is not None:
+            return in_flight[0]
+        stream = SharedStream()
+
+        async def send():
+            try:
+                await fill(stream)
+            except BaseException as e:
+                stream.finish(e)
+            else:
+                stream.finish()
+            finally:
+                del self._in_flight_streams[key]
+
+        self._in_flight_streams[key] = (stream, asyncio.ensure_future(send()))
+        return stream
+
+    async def _get_conditional(
+        self, domain: Domain, url: str, headers: dict, enable_decryption: bool
+    ) -> CacheEntry:
+        if self.http_cache is None:
+            _, data = await self._request_read(domain, "GET", url, headers=headers)
+            return CacheEntry(
+                body=await self._decrypt_offloaded(data, enable_decryption)
+            )
+
+        entry = await self.http_cache.get(domain.value, url)
+        response, data = await self._request_read(
+            domain,
+            "GET",
+            url,
+            headers=headers if entry is None else {**headers, **entry.validators},
+        )
+        if response.status == 304 and entry is not None:
+            return entry
+        entry = CacheEntry(
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            await self._decrypt_offloaded(data, enable_decryption),
+        )
+        if entry.etag is not None or entry.last_modified is not None:
+            await self.http_cache.put(domain.value, url, entry)
+        return entry
+
+    _header_template_key: Optional[Hashable]
+    _header_template: dict[str, str]
+
+    def _header_template_for(self, system_info: SystemInfo) -> dict[str, str]:
+        """
+        The headers shared by every request made with `system_info` in the
+        current session, rebuilt only when one of their sources changes.
+        """
         app_version = system_info.app_version
         data_version = system_info.data_version
         asset_version = system_info.asset_version
-        return {
-            "Content-Type": "application/octet-stream",
-            "Accept": "application/octet-stream",
-            **({} if app_version is None else {"X-App-Version": app_version}),
-            **({} if data_version is None else {"X-Data-Version": data_version}),
-            **({} if asset_version is None else {"X-Asset-Version": asset_version}),
-            "X-Request-Id": str(uuid4()),
-            "X-Unity-Version": self.platform.unity_version,
-            **(
-                {}
-                if self._session_token is None
-                else {
-                    "X-Session-Token": self._session_token,
-                }
-            ),
-            **self.platform.headers,
-        }
+        key = (
+            app_version,
+            data_version,
+            asset_version,
+            self._session_token,
+            self.platform,
+        )
+        if key != self._header_template_key:
+            self._header_template = {
+                "Content-Type": "application/octet-stream",
+                "Accept": "application/octet-stream",
+                **({} if app_version is None else {"X-App-Version": app_version}),
+                **({} if data_version is None else {"X-Data-Version": data_version}),
+                **({} if asset_version is None else {"X-Asset-Version": asset_version}),
+                "X-Unity-Version": self.platform.unity_version,
+                **(
+                    {}
+                    if self._session_token is None
+                    else {
+                        "X-Session-Token": self._session_token,
+                    }
+                ),
+                **self.platform.headers,
+            }
+            self._header_template_key = key
+        return self._header_template
+
+    def _generate_headers(
+        self, system_info: SystemInfo, headers: Optional[dict] = None
+    ) -> dict:
+        generated = self._header_template_for(system_info).copy()
+        generated["X-Request-Id"] = _request_id()
+        if headers is not None:
+            generated.update(headers)
+        return generated
 
     async def get_signed_cookie(
         self,
@@ -233,22 +616,23 @@ class API:
         if enable_signature_encryption is None:
             enable_signature_encryption = self.enable_signature_encryption
         url: str = f"https://{signature_domain}/api/signature"
-        async with self.session.post(
+        response, _ = await self._request_read(
+            Domain.SIGNATURE,
+            "POST",
             url,
             headers=self._generate_headers(system_info),
             data=self._pack(None, enable_signature_encryption),
-        ) as response:
-            response.raise_for_status()
-            return response.headers["Set-Cookie"]
+        )
+        return response.headers["Set-Cookie"]
 
-    async def get_game_version_packed(
+    async def get_game_version_cached(
         self,
         system_info: SystemInfo,
         app_version: Optional[str] = None,
         app_hash: Optional[str] = None,
         game_version_domain: Optional[str] = None,
         enable_game_version_encryption: Optional[bool] = None,
-    ):
+    ) -> CacheEntry:
         if game_version_domain is None:
             game_version_domain = self.game_version_domain
         if enable_game_version_encryption is None:
@@ -258,12 +642,31 @@ class API:
         if app_hash is None:
             app_hash = system_info.app_hash
         url: str = f"https://{game_version_domain}/{app_version}/{app_hash}"
-        async with self.session.get(
-            url,
-            headers=self._generate_headers(system_info),
-        ) as response:
-            response.raise_for_status()
-            return self._decrypt(await response.read(), enable_game_version_encryption)
+        headers = self._generate_headers(system_info)
+        return await self._single_flight(
+            self._flight_key("GET", url, headers, None, enable_game_version_encryption),
+            lambda: self._get_conditional(
+                Domain.GAME_VERSION, url, headers, enable_game_version_encryption
+            ),
+        )
+
+    async def get_game_version_packed(
+        self,
+        system_info: SystemInfo,
+        app_version: Optional[str] = None,
+        app_hash: Optional[str] = None,
+        game_version_domain: Optional[str] = None,
+        enable_game_version_encryption: Optional[bool] = None,
+    ):
+        return (
+            await self.get_game_version_cached(
+                system_info,
+                app_version,
+                app_hash,
+                game_version_domain,
+                enable_game_version_encryption,
+            )
+        ).body
 
     async def get_game_version(
         self,
@@ -273,7 +676,7 @@ class API:
         game_version_domain: Optional[str] = None,
         enable_game_version_encryption: Optional[bool] = None,
     ) -> dict:
-        return unmsgpack(
+        return await self._unmsgpack_offloaded(
             await self.get_game_version_packed(
                 system_info,
                 app_version,
@@ -283,13 +686,13 @@ class API:
             )
         )
 
-    async def get_asset_bundle_info_packed(
+    async def get_asset_bundle_info_cached(
         self,
         system_info: SystemInfo,
         asset_version: Optional[str] = None,
         asset_bundle_info_domain: Optional[str] = None,
         enable_asset_bundle_info_encryption: Optional[bool] = None,
-    ):
+    ) -> CacheEntry:
         if asset_bundle_info_domain is None:
             asset_bundle_info_domain = self.asset_bundle_info_domain
         if enable_asset_bundle_info_encryption is None:
@@ -301,21 +704,34 @@ class API:
         url: str = (
             f"https://{asset_bundle_info_domain}/api/version/{asset_version}/os/{self.platform.asset_os.value}"
         )
-        async with self.session.get(
-            url, headers=self._generate_headers(system_info)
-        ) as response:
-            try:
-                response.raise_for_status()
-            except HttpProcessingError as e:
-                if response.status == 426:
-                    raise UpdateRequired from e
-                elif response.status == 403:
-                    raise SessionExpired from e
-                else:
-                    raise
-            return self._decrypt(
-                await response.read(), enable_asset_bundle_info_encryption
+        headers = self._generate_headers(system_info)
+        return await self._single_flight(
+            self._flight_key(
+                "GET", url, headers, None, enable_asset_bundle_info_encryption
+            ),
+            lambda: self._get_conditional(
+                Domain.ASSET_BUNDLE_INFO,
+                url,
+                headers,
+                enable_asset_bundle_info_encryption,
+            ),
+        )
+
+    async def get_asset_bundle_info_packed(
+        self,
+        system_info: SystemInfo,
+        asset_version: Optional[str] = None,
+        asset_bundle_info_domain: Optional[str] = None,
+        enable_asset_bundle_info_encryption: Optional[bool] = None,
+    ):
+        return (
+            await self.get_asset_bundle_info_cached(
+                system_info,
+                asset_version,
+                asset_bundle_info_domain,
+                enable_asset_bundle_info_encryption,
             )
+        ).body
 
     async def get_asset_bundle_info(
         self,
@@ -324,7 +740,7 @@ class API:
         asset_bundle_info_domain: Optional[str] = None,
         enable_asset_bundle_info_encryption: Optional[bool] = None,
     ) -> dict:
-        return unmsgpack(
+        return await self._unmsgpack_offloaded(
             await self.get_asset_bundle_info_packed(
                 system_info,
                 asset_version,
@@ -344,7 +760,14 @@ class API:
         asset_version: Optional[str] = None,
         asset_hash: Optional[str] = None,
         os: AssetOS = AssetOS.ANDROID,
+        offset: int = 0,
+        end: Optional[int] = None,
     ):
+        """
+        `offset` and `end` select a range of the obfuscated bundle; the
+        yielded bundle's `offset` tells where the server actually started,
+        which is 0 if it ignored the range.
+        """
         if chunk_size is None:
             chunk_size = self.DEFAULT_CHUNK_SIZE
         if asset_bundle_domain is None:
@@ -362,22 +785,103 @@ class API:
         )
         if enable_asset_bundle_encryption:
             raise NotImplementedError
-        response = await self.session.get(url)
-        try:
-            try:
-                response.raise_for_status()
-            except HttpProcessingError as e:
-                if response.status == 426:
-                    raise UpdateRequired from e
-                elif response.status == 403:
-                    raise SessionExpired from e
-                else:
-                    raise
+        headers = (
+            {"Range": f"bytes={offset}-{'' if end is None else end - 1}"}
+            if offset or end is not None
+            else None
+        )
+        async with self._request(
+            Domain.ASSET_BUNDLE, "GET", url, headers=headers
+        ) as response:
             yield AssetBundle(
-                obfuscated_chunks=response.content.iter_chunked(chunk_size)
+                obfuscated_chunks=response.content.iter_chunked(chunk_size),
+                offset=offset if response.status == 206 else 0,
             )
+
+    async def download_asset_bundle_to_path(
+        self,
+        system_info: SystemInfo,
+        asset_bundle_name: str,
+        path: Path,
+        file_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        asset_bundle_domain: Optional[str] = None,
+        enable_asset_bundle_encryption: Optional[bool] = None,
+        asset_version: Optional[str] = None,
+        asset_hash: Optional[str] = None,
+        os: AssetOS = AssetOS.ANDROID,
+        bundle_hash: Optional[str] = None,
+        segments: int = 1,
+        connection: Optional[Callable[[], AbstractAsyncContextManager]] = None,
+    ) -> int:
+        """
+        Downloads into a resumable part file: an interrupted download picks up
+        from its last checkpoint on the next call, as long as `file_size` and
+        `bundle_hash` still match. Bundles large enough are fetched as up to
+        `segments` parallel ranges, each of which holds `connection()` while
+        it is open.
+        """
+
+        async def fetch(segment: Segment):
+            while True:
+                position = segment.position
+                try:
+                    await fetch_from(segment)
+                    return
+                except Exception as e:
+                    # keep going while the connection keeps making progress
+                    if (
+                        segment.position == position
+                        or not self.retry_policy.is_transient(e)
+                    ):
+                        raise
+                    log.warning(
+                        f"resuming {asset_bundle_name} at {segment.position}: {e}"
+                    )
+
+        async def fetch_from(segment: Segment):
+            try:
+                async with (
+                    nullcontext() if connection is None else connection()
+                ), self.download_asset_bundle(
+                    system_info,
+                    asset_bundle_name,
+                    chunk_size,
+                    asset_bundle_domain,
+                    enable_asset_bundle_encryption,
+                    asset_version,
+                    asset_hash,
+                    os,
+                    offset=segment.position,
+                    end=segment.end,
+                ) as asset_bundle:
+                    await download.write(
+                        segment, asset_bundle.chunks, asset_bundle.offset
+                    )
+            except ClientResponseError as e:
+                # nothing left past the position of a resumed segment
+                if e.status != 416 or (segment.written == 0 and segment.start == 0):
+                    raise
+                segment.complete = True
+
+        download = await PartialDownload.open(path, file_size, bundle_hash, segments)
+        try:
+            tasks = [
+                asyncio.create_task(fetch(segment))
+                for segment in download.segments
+                if not segment.complete
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await download.checkpoint()
+                raise
+            return await download.finish()
         finally:
-            response.close()
+            download.close()
 
     async def request_packed(
         self,
@@ -389,39 +893,112 @@ class API:
         headers: Optional[dict] = None,
         api_domain: Optional[str] = None,
         enable_api_encryption: Optional[bool] = None,
+        idempotent: Optional[bool] = None,
     ):
+        """
+        Sends a request to the game API and returns its decrypted body. Only
+        GETs are retried unless `idempotent` says the request is safe to send
+        twice.
+        """
         if api_domain is None:
             api_domain = self.api_domain
         if enable_api_encryption is None:
             enable_api_encryption = self.enable_api_encryption
         url: str = f"https://{api_domain}/api/{path}"
-        async with self.session.request(
-            method,
-            url,
-            headers={
-                **self._generate_headers(system_info),
-                **({} if headers is None else headers),
-            },
-            params=params,
-            data=(
-                self._pack(data, enable_api_encryption)
-                if data is not None or method.casefold() == "POST".casefold()
-                else None
-            ),
-        ) as response:
-            try:
-                response.raise_for_status()
-            except HttpProcessingError as e:
-                if response.status == 426:
-                    raise UpdateRequired from e
-                elif response.status == 403:
-                    raise SessionExpired from e
-                else:
-                    raise
+        request_headers = self._generate_headers(system_info, headers)
+        body = (
+            self._pack(data, enable_api_encryption)
+            if data is not None or method.casefold() == "POST".casefold()
+            else None
+        )
+
+        async def send() -> bytes:
+            response, response_data = await self._request_read(
+                Domain.API,
+                method,
+                url,
+                idempotent,
+                headers=request_headers,
+                params=params,
+                data=body,
+            )
             self._session_token = response.headers.get(
                 "X-Session-Token", self._session_token
             )
-            return self._decrypt(await response.read(), enable_api_encryption)
+            return await self._decrypt_offloaded(response_data, enable_api_encryption)
+
+        if body is not None or method.casefold() != "GET".casefold():
+            return await send()
+        key = self._flight_key(
+            method, url, request_headers, params, enable_api_encryption
+        )
+        if (in_flight := self._in_flight_streams.get(key)) is not None:
+            return b"".join([chunk async for chunk in in_flight[0].read()])
+        return await self._single_flight(key, send)
+
+    @asynccontextmanager
+    async def request_packed_stream(
+        self,
+        system_info: SystemInfo,
+        path: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        api_domain: Optional[str] = None,
+        enable_api_encryption: Optional[bool] = None,
+        chunk_size: Optional[int] = None,
+    ) -> AsyncIterator[AsyncIterator[bytes]]:
+        """
+        A GET like `request_packed` that yields the decrypted body as chunks
+        while it is being received instead of reading it whole first.
+
+        The request is shared with concurrent callers of this and of
+        `request_packed` for the same request, and is retried as a whole like
+        any other GET; readers only ever see the body once.
+        """
+        if api_domain is None:
+            api_domain = self.api_domain
+        if enable_api_encryption is None:
+            enable_api_encryption = self.enable_api_encryption
+        if chunk_size is None:
+            chunk_size = self.DEFAULT_CHUNK_SIZE
+        url: str = f"https://{api_domain}/api/{path}"
+        request_headers = self._generate_headers(system_info, headers)
+        key = self._flight_key(
+            "GET", url, request_headers, params, enable_api_encryption
+        )
+
+        if (future := self._in_flight.get(key)) is not None:
+            # already being read whole
+            body = await asyncio.shield(future)
+
+            async def whole() -> AsyncIterator[bytes]:
+                yield body
+
+            yield whole()
+            return
+
+        async def fill(stream: SharedStream):
+            async def send():
+                async with self.session_for(Domain.API).request(
+                    "GET", url, headers=request_headers, params=params
+                ) as response:
+                    self._raise_for_status(response)
+                    self._session_token = response.headers.get(
+                        "X-Session-Token", self._session_token
+                    )
+                    chunks = response.content.iter_chunked(chunk_size)
+                    offset = 0
+                    async for chunk in (
+                        decrypted(chunks, self.key or b"", self.iv or b"")
+                        if enable_api_encryption
+                        else chunks
+                    ):
+                        stream.write(offset, chunk)
+                        offset += len(chunk)
+
+            await self._resilient(Domain.API, "GET", send)
+
+        yield self._shared_stream(key, fill).read()
 
     async def request(
         self,
@@ -433,8 +1010,9 @@ class API:
         headers: Optional[dict] = None,
         api_domain: Optional[str] = None,
         enable_api_encryption: Optional[bool] = None,
+        idempotent: Optional[bool] = None,
     ) -> dict:
-        return unmsgpack(
+        return await self._unmsgpack_offloaded(
             await self.request_packed(
                 system_info,
                 method,
@@ -444,6 +1022,7 @@ class API:
                 headers,
                 api_domain,
                 enable_api_encryption,
+                idempotent,
             )
         )
 
@@ -459,8 +1038,13 @@ class API:
     async def authenticate(
         self, system_info: SystemInfo, user_id: Union[int, str], credential: str
     ) -> dict:
+        # signing in again only hands out another session token
         responseDict: dict = await self.request(
-            system_info, "PUT", f"user/{user_id}/auth", data={"credential": credential}
+            system_info,
+            "PUT",
+            f"user/{user_id}/auth",
+            data={"credential": credential},
+            idempotent=True,
         )
         self._session_token = responseDict["sessionToken"]
         return responseDict
@@ -480,7 +1064,22 @@ class API:
     async def get_master_data(
         self, system_info: SystemInfo, data_version: Optional[str] = None
     ) -> dict:
-        return unmsgpack(await self.get_master_data_packed(system_info, data_version))
+        return await self._unmsgpack_offloaded(
+            await self.get_master_data_packed(system_info, data_version)
+        )
+
+    @asynccontextmanager
+    async def get_master_data_stream(
+        self, system_info: SystemInfo, data_version: Optional[str] = None
+    ) -> AsyncIterator[AsyncIterator[tuple[str, bytes]]]:
+        """
+        Yields the packed master data tables one by one as each of them is
+        received.
+        """
+        if data_version is not None:
+            system_info = dataclasses.replace(system_info, data_version=data_version)
+        async with self.request_packed_stream(system_info, "suite/master") as chunks:
+            yield unmsgpack_map_items_stream(chunks)
 
     async def get_notices(self, system_info: SystemInfo) -> dict:
         return await self.request(system_info, "GET", f"information")
@@ -4,18 +4,28 @@
 # SPDX-License-Identifier: MIT
 
 import aiofiles
-import aiofiles.os
 from asyncio.locks import Lock
 from contextlib import asynccontextmanager
+from dataclasses import replace
 from pathlib import Path
 from types import TracebackType
 from typing import AsyncIterator, Coroutine, Optional, Type
 
 from async_pjsekai.api import API
+from async_pjsekai.http_cache import CacheEntry
 from async_pjsekai.models.asset_bundle_info import AssetBundleInfo
+from async_pjsekai.models.bundle_graph import BundleGraph
+from async_pjsekai.models.bundle_store import BundleStore
 from async_pjsekai.models.system_info import SystemInfo
+from async_pjsekai.offload import Offloader
+from async_pjsekai.persistence import (
+    PendingWrite,
+    PersistenceScheduler,
+    commit,
+    write_file,
+)
 
-from async_pjsekai.models.converters import msgpack_converter
+from async_pjsekai.models.converters import msgpack_converter, structure_msgpack
 
 
 class AssetBundleInfoMutex:
@@ -23,12 +33,26 @@ class AssetBundleInfoMutex:
     _sync: bool
     _asset_bundle_info: Optional[AssetBundleInfo]
     _asset_bundle_info_file_path: Optional[Path]
+    _persistence: Optional[PersistenceScheduler]
+    _offloader: Offloader
+    # the value still to be written, if there is one
+    _unwritten: Optional[AssetBundleInfo]
+    _graph: Optional[BundleGraph]
 
-    def __init__(self, asset_bundle_info_file_path: Optional[Path]) -> None:
+    def __init__(
+        self,
+        asset_bundle_info_file_path: Optional[Path],
+        persistence: Optional[PersistenceScheduler] = None,
+        offloader: Optional[Offloader] = None,
+    ) -> None:
         self._lock = Lock()
         self._sync = False
         self._asset_bundle_info = None
         self._asset_bundle_info_file_path = asset_bundle_info_file_path
+        self._persistence = persistence
+        self._offloader = Offloader() if offloader is None else offloader
+        self._unwritten = None
+        self._graph = None
 
     @property
     def sync(self):
@@ -42,6 +66,12 @@ class AssetBundleInfoMutex:
     def asset_bundle_info_file_path(self):
         return self._asset_bundle_info_file_path
 
+    @property
+    def graph(self) -> BundleGraph:
+        if self._graph is None:
+            self._graph = BundleGraph(self._asset_bundle_info)
+        return self._graph
+
     async def __aenter__(self):
         await self._lock.acquire()
         return self._asset_bundle_info, self._sync
@@ -54,9 +84,14 @@ class AssetBundleInfoMutex:
     ):
         self._lock.release()
 
+    async def _structure(self, data: bytes) -> AssetBundleInfo:
+        return await self._offloader.run(
+            "structure", len(data), structure_msgpack, data, AssetBundleInfo
+        )
+
     async def _loads(self, data: bytes):
         await self._set_value(None, write=False)
-        new_value = msgpack_converter.loads(data, AssetBundleInfo)
+        new_value = await self._structure(data)
         await self._set_value(new_value)
         return new_value
 
@@ -67,7 +102,7 @@ class AssetBundleInfoMutex:
 
     async def _loads_coro(self, data: Coroutine[None, None, bytes]):
         await self._set_value(None, write=False)
-        new_value = msgpack_converter.loads(await data, AssetBundleInfo)
+        new_value = await self._structure(await data)
         await self._set_value(new_value)
         return new_value
 
@@ -76,6 +111,18 @@ class AssetBundleInfoMutex:
         async with self._lock:
             yield await self._loads_coro(data)
 
+    async def _loads_entry(self, entry: CacheEntry):
+        new_value = await entry.decode_offloaded(AssetBundleInfo, self._offloader)
+        # a response that was not modified decodes to the value we already hold
+        if new_value is not self._asset_bundle_info or not self._sync:
+            await self._set_value(new_value)
+        return new_value
+
+    @asynccontextmanager
+    async def loads_entry(self, entry: CacheEntry):
+        async with self._lock:
+            yield await self._loads_entry(entry)
+
     async def load(self):
         async with self._lock:
             if self.asset_bundle_info_file_path is not None:
@@ -89,27 +136,49 @@ class AssetBundleInfoMutex:
             else:
                 await self._set_value(None)
 
-    async def _write(self):
-        if (
-            self._asset_bundle_info is not None
-            and self.asset_bundle_info_file_path is not None
-        ):
-            await aiofiles.os.makedirs(
-                self.asset_bundle_info_file_path.parent, exist_ok=True
-            )
-            temp_path = self.asset_bundle_info_file_path.with_suffix(
-                self.asset_bundle_info_file_path.suffix + ".tmp"
-            )
-            async with aiofiles.open(temp_path, "wb") as f:
-                await f.write(
-                    msgpack_converter.dumps(self._asset_bundle_info, AssetBundleInfo)
+    async def _persist(self) -> list[PendingWrite]:
+        asset_bundle_info = self._unwritten
+        if asset_bundle_info is None or self.asset_bundle_info_file_path is None:
+            return []
+        self._unwritten = None
+
+        def aborted():
+            if self._unwritten is None:
+                self._unwritten = asset_bundle_info
+
+        try:
+            return [
+                await write_file(
+                    self.asset_bundle_info_file_path,
+                    msgpack_converter.dumps(asset_bundle_info, AssetBundleInfo),
+                    on_abort=aborted,
                 )
-            await aiofiles.os.replace(temp_path, self.asset_bundle_info_file_path)
+            ]
+        except BaseException:
+            aborted()
+            raise
+
+    async def _write(self):
+        # taken now, as the value is set to None while the next one loads
+        self._unwritten = self._asset_bundle_info
+        if self._persistence is None:
+            await commit(await self._persist())
+        else:
+            self._persistence.mark_dirty(self._persist)
+        # the value is final from here on, even if it is still being written
         self._sync = True
 
     async def _set_value(self, new_value: Optional[AssetBundleInfo], write=True):
         self._sync = False
+        if (
+            new_value is not None
+            and new_value.bundles is not None
+            and not isinstance(new_value.bundles, BundleStore)
+        ):
+            # structured values already come with a store
+            new_value = replace(new_value, bundles=BundleStore.of(new_value.bundles))
         self._asset_bundle_info = new_value
+        self._graph = None
         if write:
             await self._write()
 
@@ -145,11 +214,22 @@ class Asset:
         async with self._asset_bundle_info as asset_bundle_info:
             yield asset_bundle_info
 
+    @property
+    @asynccontextmanager
+    async def bundle_graph(self):
+        async with self._asset_bundle_info as (asset_bundle_info, sync):
+            yield self._asset_bundle_info.graph, sync
+
     async def set_asset_bundle_info(self, new_value: Optional[AssetBundleInfo]) -> None:
         await self._asset_bundle_info.set_value(new_value)
 
     def __init__(
-        self, version: str, hash: str, asset_directory: Optional[Path] = None
+        self,
+        version: str,
+        hash: str,
+        asset_directory: Optional[Path] = None,
+        persistence: Optional[PersistenceScheduler] = None,
+        offloader: Optional[Offloader] = None,
     ) -> None:
         self._path = None
         if asset_directory is not None:
@@ -160,10 +240,10 @@ class Asset:
 
         if p := self.path:
             self._asset_bundle_info = AssetBundleInfoMutex(
-                p / "AssetBundleInfo.msgpack"
+                p / "AssetBundleInfo.msgpack", persistence, offloader
             )
         else:
-            self._asset_bundle_info = AssetBundleInfoMutex(None)
+            self._asset_bundle_info = AssetBundleInfoMutex(None, persistence, offloader)
 
     async def load(self):
         await self._asset_bundle_info.load()
@@ -172,7 +252,7 @@ class Asset:
     async def get_asset_bundle_info(
         self, system_info: SystemInfo, api_manager: API
     ) -> AsyncIterator[AssetBundleInfo]:
-        async with self._asset_bundle_info.loads_coro(
-            api_manager.get_asset_bundle_info_packed(system_info, self._version)
+        async with self._asset_bundle_info.loads_entry(
+            await api_manager.get_asset_bundle_info_cached(system_info, self._version)
         ) as asset_bundle_info:
             yield asset_bundle_info
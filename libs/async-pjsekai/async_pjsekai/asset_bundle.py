@@ -3,36 +3,46 @@
 #
 # SPDX-License-Identifier: MIT
 
-from typing import AsyncIterator, Optional
+from typing import AsyncIterator, Optional, Union
 
 from async_pjsekai.utilities import deobfuscated, obfuscated
 
 
 class AssetBundle:
-    _chunks: AsyncIterator[bytes]
-    _obfuscated_chunks: AsyncIterator[bytes]
+    _chunks: AsyncIterator[Union[bytes, memoryview]]
+    _obfuscated_chunks: AsyncIterator[Union[bytes, memoryview]]
+    _offset: int
 
     @property
-    def chunks(self) -> AsyncIterator[bytes]:
+    def chunks(self) -> AsyncIterator[Union[bytes, memoryview]]:
         return self._chunks
 
     @property
-    def obfuscated_chunks(self) -> AsyncIterator[bytes]:
+    def obfuscated_chunks(self) -> AsyncIterator[Union[bytes, memoryview]]:
         return self._obfuscated_chunks
 
+    @property
+    def offset(self) -> int:
+        """Position of `obfuscated_chunks` in the whole obfuscated bundle."""
+        return self._offset
+
     def __init__(
         self,
         chunks: Optional[AsyncIterator[bytes]] = None,
         obfuscated_chunks: Optional[AsyncIterator[bytes]] = None,
+        offset: int = 0,
     ):
         if chunks is not None:
+            if offset:
+                raise ValueError
             self._chunks = chunks
             self._obfuscated_chunks = obfuscated(chunks)
         elif obfuscated_chunks is not None:
-            self._chunks = deobfuscated(obfuscated_chunks)
+            self._chunks = deobfuscated(obfuscated_chunks, offset)
             self._obfuscated_chunks = obfuscated_chunks
         else:
             raise ValueError
+        self._offset = offset
 
     def extract(self) -> None:
         raise NotImplementedError
@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+from async_pjsekai.enums.ranking_kind import RankingKind
+
+R = TypeVar("R")
+
+# the most entries a single ranking request returns
+MAX_RANKING_WINDOW = 100
+
+
+@dataclass(frozen=True, slots=True)
+class RankingTarget:
+    """
+    The entries from `higher_limit` ranks above `rank` to `lower_limit` ranks
+    below it on the ranking of event or rank match season `id`.
+    """
+
+    kind: RankingKind
+    id: int
+    rank: int
+    higher_limit: int = field(default=0)
+    lower_limit: int = field(default=0)
+
+    @property
+    def board(self) -> tuple[RankingKind, int]:
+        return self.kind, self.id
+
+    @property
+    def first(self) -> int:
+        return max(self.rank - self.higher_limit, 1)
+
+    @property
+    def last(self) -> int:
+        return self.rank + self.lower_limit
+
+    @classmethod
+    def window(
+        cls, kind: RankingKind, id: int, first: int, last: int
+    ) -> "RankingTarget":
+        return cls(kind, id, first, lower_limit=last - first)
+
+
+def merge_ranking_targets(
+    targets: Iterable[RankingTarget], max_window: int = MAX_RANKING_WINDOW
+) -> list[RankingTarget]:
+    """
+    The fewest requests covering every rank of `targets`: overlapping and
+    adjacent windows of a board are merged, then cut into windows of at
+    most `max_window` ranks.
+    """
+
+    boards: dict[tuple[RankingKind, int], list[RankingTarget]] = {}
+    for target in targets:
+        boards.setdefault(target.board, []).append(target)
+
+    merged: list[RankingTarget] = []
+    for (kind, id), board_targets in boards.items():
+        spans: list[list[int]] = []
+        for target in sorted(board_targets, key=lambda target: target.first):
+            if spans and target.first <= spans[-1][1] + 1:
+                spans[-1][1] = max(spans[-1][1], target.last)
+            else:
+                spans.append([target.first, target.last])
+        for first, last in spans:
+            for start in range(first, last + 1, max_window):
+                merged.append(
+                    RankingTarget.window(
+                        kind, id, start, min(start + max_window - 1, last)
+                    )
+                )
+    return merged
+
+
+def merge_rankings(responses: Iterable[dict]) -> list[dict]:
+    """
+    The entries of ranking `responses` sorted by rank, with the entries that
+    appear in more than one response kept once.
+    """
+
+    entries: dict[tuple, dict] = {}
+    for response in responses:
+        for entry in response.get("rankings", []):
+            entries.setdefault((entry.get("rank"), entry.get("userId")), entry)
+    return sorted(entries.values(), key=lambda entry: entry.get("rank") or 0)
+
+
+async def gather_bounded(
+    limit: int, calls: Iterable[Callable[[], Awaitable[R]]]
+) -> list[R]:
+    """
+    `asyncio.gather` of `calls` running at most `limit` of them at a time.
+    The first failure cancels the rest.
+    """
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(call: Callable[[], Awaitable[R]]) -> R:
+        async with semaphore:
+            return await call()
+
+    tasks = [asyncio.ensure_future(bounded(call)) for call in calls]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
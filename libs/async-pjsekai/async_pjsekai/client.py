@@ -4,28 +4,58 @@
 # SPDX-License-Identifier: MIT
 
 import aiofiles
-import aiofiles.os
 from aiohttp.abc import AbstractCookieJar
+import asyncio
 from asyncio.locks import Lock
 from contextlib import asynccontextmanager, AbstractAsyncContextManager
 import dataclasses
-from functools import wraps
+from functools import partial, wraps
+from hashlib import blake2b
 from json import loads, dumps, JSONDecodeError
 import logging
 import msgpack
 from pathlib import Path
 from types import TracebackType
-from typing import AsyncIterator, Coroutine, Callable, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Coroutine,
+    Callable,
+    Iterable,
+    Mapping,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+)
 from typing_extensions import ParamSpec, Concatenate
 
+from async_pjsekai.enums.domain import Domain
 from async_pjsekai.enums.platform import AssetOS
+from async_pjsekai.enums.ranking_kind import RankingKind
 from async_pjsekai.enums.tutorial_status import TutorialStatus, Unit
+from async_pjsekai.models.columnar_table import ColumnarTable
 from async_pjsekai.models.master_data import MasterData
+from async_pjsekai.models.lazy_master_data import (
+    LazyMasterData,
+    MASTER_DATA_FIELDS,
+    MASTER_DATA_TABLES,
+    table_row_type,
+)
+from async_pjsekai.models.master_data_index import MasterDataIndex
 from async_pjsekai.models.system_info import SystemInfo, AppVersionStatus
 from async_pjsekai.models.game_version import GameVersion
 from async_pjsekai.models.information import Information
 from async_pjsekai.api import API, Platform
 from async_pjsekai.asset import Asset
+from async_pjsekai.batch import (
+    RankingTarget,
+    gather_bounded,
+    merge_ranking_targets,
+    merge_rankings,
+)
+from async_pjsekai.connection_pool import ConnectionPool, ConnectionPoolStatistics
+from async_pjsekai.downloader import BundleDownloader, BundleDownloadStatistics
 from async_pjsekai.exceptions import (
     AppUpdateRequired,
     AssetUpdateRequired,
@@ -37,9 +67,32 @@ from async_pjsekai.exceptions import (
     ServerInMaintenance,
     UpdateRequired,
 )
+from async_pjsekai.http_cache import HttpCache
 from async_pjsekai.live import SoloLive, LiveNotActive, LiveDead
-
-from .models.converters import msgpack_converter
+from async_pjsekai.offload import Offloader, OffloadStrategy, StageStatistics
+from async_pjsekai.persistence import (
+    PendingWrite,
+    PersistenceScheduler,
+    commit,
+    write_file,
+)
+from async_pjsekai.rate_limit import RateLimit, RateLimiterStatistics
+from async_pjsekai.resilience import CircuitBreakerPolicy, RetryPolicy
+from async_pjsekai.snapshot import (
+    SNAPSHOT_HASH_SIZE,
+    load_snapshot,
+    pack_snapshot,
+    snapshot_path,
+)
+from async_pjsekai.utilities import pack_map_items, unmsgpack_map_items
+
+from .models.asset_bundle_info import AssetBundleInfo
+from .models.asset_bundle_info_diff import AssetBundleInfoDiff
+from .models.converters import (
+    msgpack_converter,
+    precompile_hooks,
+    structure_msgpack_tables,
+)
 
 P = ParamSpec("P")
 S = TypeVar("S")
@@ -49,23 +102,32 @@ R = TypeVar("R")
 log = logging.getLogger(__name__)
 
 
-# TODO: multiple read / one write
 class SystemInfoMutex:
     _lock: Lock
     _system_info: SystemInfo
     _system_info_file_path: Optional[Path]
+    _persistence: Optional[PersistenceScheduler]
+    # the value still to be written, if there is one
+    _unwritten: Optional[SystemInfo]
 
-    def __init__(self, system_info_file_path: Optional[Path]) -> None:
+    def __init__(
+        self,
+        system_info_file_path: Optional[Path],
+        persistence: Optional[PersistenceScheduler] = None,
+    ) -> None:
         self._lock = Lock()
         self._system_info = SystemInfo().create()
         self._system_info_file_path = system_info_file_path
+        self._persistence = persistence
+        self._unwritten = None
 
     @property
     def system_info_file_path(self):
         return self._system_info_file_path
 
+    # SystemInfo is frozen and only ever replaced, so readers get the current
+    # snapshot without waiting; only writers take the lock
     async def __aenter__(self):
-        await self._lock.acquire()
         return self._system_info
 
     async def __aexit__(
@@ -74,7 +136,7 @@ class SystemInfoMutex:
         exc_val: Optional[BaseException],
         exc_tb: Optional[TracebackType],
     ):
-        self._lock.release()
+        pass
 
     async def _loads(
         self,
@@ -83,7 +145,6 @@ class SystemInfoMutex:
         app_hash: Optional[str] = None,
         multi_play_version: Optional[str] = None,
     ):
-        del self._system_info
         await self._set_value(msgpack_converter.loads(data, SystemInfo))
         if app_version is not None and app_hash is not None:
             await self._replace_value(
@@ -111,7 +172,6 @@ class SystemInfoMutex:
         app_hash: Optional[str] = None,
         multi_play_version: Optional[str] = None,
     ):
-        self._system_info = SystemInfo().create()
         await self._set_value(msgpack_converter.loads(await data, SystemInfo))
         if app_version is not None and app_hash is not None:
             await self._replace_value(
@@ -155,15 +215,34 @@ class SystemInfoMutex:
                     multi_play_version=multi_play_version,
                 )
 
+    async def _persist(self) -> list[PendingWrite]:
+        system_info = self._unwritten
+        if self.system_info_file_path is None or system_info is None:
+            return []
+        self._unwritten = None
+
+        def aborted():
+            if self._unwritten is None:
+                self._unwritten = system_info
+
+        try:
+            return [
+                await write_file(
+                    self.system_info_file_path,
+                    msgpack_converter.dumps(system_info, SystemInfo),
+                    on_abort=aborted,
+                )
+            ]
+        except BaseException:
+            aborted()
+            raise
+
     async def _write(self):
-        if self.system_info_file_path is not None:
-            await aiofiles.os.makedirs(self.system_info_file_path.parent, exist_ok=True)
-            temp_path = self.system_info_file_path.with_suffix(
-                self.system_info_file_path.suffix + ".tmp"
-            )
-            async with aiofiles.open(temp_path, "wb") as f:
-                await f.write(msgpack_converter.dumps(self._system_info, SystemInfo))
-            await aiofiles.os.replace(temp_path, self.system_info_file_path)
+        self._unwritten = self._system_info
+        if self._persistence is None:
+            await commit(await self._persist())
+        else:
+            self._persistence.mark_dirty(self._persist)
 
     async def _set_value(self, new_value: SystemInfo):
         self._system_info = new_value
@@ -189,23 +268,72 @@ class SystemInfoMutex:
         async with self._lock:
             yield await self._replace_value(**changes)
 
+    @asynccontextmanager
+    async def replacing(self):
+        async with self._lock:
+            yield self._system_info, self._replace_value
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _UnwrittenMasterData:
+    # the packed form of the value, if it is at hand
+    data: Optional[bytes]
+    tables: Optional[Mapping[str, Union[bytes, memoryview]]]
+    master_data: MasterData
+    table_hashes: dict[str, bytes]
+
 
 class MasterDataMutex:
     _lock: Lock
     _sync: bool
     _master_data: MasterData
     _master_data_file_path: Optional[Path]
+    _lazy: bool
+    # tables kept as a ColumnarTable once queried, if master data is lazy
+    _columnar_tables: frozenset[str]
+    _offloader: Offloader
+    _persistence: Optional[PersistenceScheduler]
+    # the value still to be written, if there is one
+    _unwritten: Optional[_UnwrittenMasterData]
+    _table_hashes: dict[str, bytes]
+    _changed_tables: set[str]
+    _index: Optional[MasterDataIndex]
 
-    def __init__(self, master_data_file_path: Optional[Path]) -> None:
+    def __init__(
+        self,
+        master_data_file_path: Optional[Path],
+        lazy=False,
+        offloader: Optional[Offloader] = None,
+        persistence: Optional[PersistenceScheduler] = None,
+        columnar_tables: Optional[Iterable[str]] = None,
+    ) -> None:
         self._lock = Lock()
+        self._offloader = Offloader() if offloader is None else offloader
+        self._persistence = persistence
+        self._unwritten = None
         self._sync = False
         self._master_data = MasterData().create()
         self._master_data_file_path = master_data_file_path
+        self._lazy = lazy
+        self._columnar_tables = (
+            frozenset() if columnar_tables is None else frozenset(columnar_tables)
+        )
+        self._table_hashes = {}
+        self._changed_tables = set()
+        self._index = None
 
     @property
     def sync(self):
         return self._sync
 
+    @property
+    def lazy(self):
+        return self._lazy
+
+    @property
+    def columnar_tables(self):
+        return self._columnar_tables
+
     @property
     def master_data(self):
         return self._master_data
@@ -214,6 +342,24 @@ class MasterDataMutex:
     def master_data_file_path(self):
         return self._master_data_file_path
 
+    @property
+    def changed_tables(self):
+        return self._changed_tables
+
+    @property
+    def index(self) -> MasterDataIndex:
+        if self._index is None:
+            self._index = MasterDataIndex(self._master_data)
+        return self._index
+
+    def columnar(self, name: str) -> ColumnarTable:
+        if isinstance(self._master_data, LazyMasterData):
+            return self._master_data.columnar(name)
+        return ColumnarTable(
+            table_row_type(MASTER_DATA_FIELDS[name]),
+            getattr(self._master_data, name) or (),
+        )
+
     async def __aenter__(self):
         await self._lock.acquire()
         return self._master_data, self._sync
@@ -226,9 +372,132 @@ class MasterDataMutex:
     ):
         self._lock.release()
 
+    @staticmethod
+    def _hash_tables(tables: dict[str, memoryview]) -> dict[str, bytes]:
+        return {
+            key: blake2b(table, digest_size=SNAPSHOT_HASH_SIZE).digest()
+            for key, table in tables.items()
+        }
+
     async def _loads(self, data: bytes, write=True):
-        await self._set_value(MasterData.create(), write=False)
-        await self._set_value(msgpack_converter.loads(data, MasterData), write=write)
+        tables = unmsgpack_map_items(data)
+        await self._update(tables, self._hash_tables(tables))
+        if write:
+            await self._write(data)
+
+    async def _loads_stream(self, items: AsyncIterator[tuple[str, bytes]], write=True):
+        tables: dict[str, bytes] = {}
+        table_hashes: dict[str, bytes] = {}
+        # tables are structured while the rest is still being received
+        structuring: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        try:
+            async for key, table in items:
+                tables[key] = table
+                table_hashes[key] = blake2b(
+                    table, digest_size=SNAPSHOT_HASH_SIZE
+                ).digest()
+                if (
+                    not self.lazy
+                    and table_hashes[key] != self._table_hashes.get(key)
+                    and (field := MASTER_DATA_TABLES.get(key)) is not None
+                ):
+                    structuring[field.name] = asyncio.ensure_future(
+                        self._offloader.run(
+                            "structure",
+                            len(table),
+                            structure_msgpack_tables,
+                            {field.name: table},
+                            {field.name: field.type},
+                        )
+                    )
+            structured: dict[str, Any] = {}
+            for task in structuring.values():
+                structured.update(await task)
+        except BaseException:
+            for task in structuring.values():
+                task.cancel()
+            await asyncio.gather(*structuring.values(), return_exceptions=True)
+            raise
+        await self._update(tables, table_hashes, structured)
+        if write:
+            await self._write(tables=tables)
+
+    async def _update(
+        self,
+        tables: Mapping[str, Union[bytes, memoryview]],
+        table_hashes: dict[str, bytes],
+        structured: Optional[dict[str, Any]] = None,
+    ):
+        if structured is None:
+            structured = {}
+        changed_keys = {
+            key
+            for key in table_hashes.keys() | self._table_hashes.keys()
+            if table_hashes.get(key) != self._table_hashes.get(key)
+        }
+        changed_tables = {
+            field.name
+            for key in changed_keys
+            if (field := MASTER_DATA_TABLES.get(key)) is not None
+        }
+        log.info(f"master data tables changed: {len(changed_tables)}")
+        if self.lazy:
+            old_value = self._master_data
+            loaded = {
+                field.name: (
+                    old_value.table(field.name)
+                    if isinstance(old_value, LazyMasterData)
+                    else getattr(old_value, field.name)
+                )
+                for field in MASTER_DATA_TABLES.values()
+                if field.name not in changed_tables
+                and (
+                    not isinstance(old_value, LazyMasterData)
+                    or old_value.is_loaded(field.name)
+                )
+            }
+            new_value: MasterData = LazyMasterData(
+                {
+                    key: bytes(table)
+                    for key, table in tables.items()
+                    if key not in MASTER_DATA_TABLES
+                    or MASTER_DATA_TABLES[key].name not in loaded
+                },
+                self._columnar_tables,
+                **loaded,
+            )
+        else:
+            changed = {
+                field.name: tables.get(key)
+                for key in changed_keys
+                if (field := MASTER_DATA_TABLES.get(key)) is not None
+            }
+            present = {
+                name: (
+                    bytes(table)
+                    if self._offloader.strategy is OffloadStrategy.PROCESS
+                    else table
+                )
+                for name, table in changed.items()
+                if table is not None and name not in structured
+            }
+            if len(present) > 0:
+                structured = structured | await self._offloader.run(
+                    "structure",
+                    sum(len(table) for table in present.values()),
+                    structure_msgpack_tables,
+                    present,
+                    {name: MASTER_DATA_FIELDS[name].type for name in present},
+                )
+            new_value = dataclasses.replace(
+                self._master_data,
+                **{name: structured.get(name) for name in changed},
+            )
+        index = self._index
+        await self._set_value(new_value, write=False, table_hashes=table_hashes)
+        self._changed_tables = changed_tables
+        if index is not None:
+            self._index = index.updated(new_value, changed_tables)
 
     @asynccontextmanager
     async def loads(self, data: bytes, write=True):
@@ -236,11 +505,14 @@ class MasterDataMutex:
             await self._loads(data, write=write)
             yield self._master_data
 
+    @asynccontextmanager
+    async def loads_stream(self, items: AsyncIterator[tuple[str, bytes]], write=True):
+        async with self._lock:
+            await self._loads_stream(items, write=write)
+            yield self._master_data
+
     async def _loads_coro(self, data: Coroutine[None, None, bytes], write=True):
-        await self._set_value(MasterData.create(), write=False)
-        await self._set_value(
-            msgpack_converter.loads(await data, MasterData), write=write
-        )
+        await self._loads(await data, write=write)
 
     @asynccontextmanager
     async def loads_coro(self, data: Coroutine[None, None, bytes], write=True):
@@ -248,32 +520,133 @@ class MasterDataMutex:
             await self._loads_coro(data, write=write)
             yield self._master_data
 
+    async def _load_snapshot(self) -> bool:
+        if self.master_data_file_path is None:
+            return False
+        snapshot = await asyncio.get_running_loop().run_in_executor(
+            None,
+            load_snapshot,
+            snapshot_path(self.master_data_file_path),
+            self.master_data_file_path,
+        )
+        if snapshot is None:
+            return False
+        tables, table_hashes = snapshot
+        await self._set_value(
+            LazyMasterData(tables, self._columnar_tables),
+            write=False,
+            table_hashes=table_hashes,
+        )
+        self._sync = True
+        log.info(f"master data tables mapped from snapshot: {len(tables)}")
+        return True
+
     async def load(self):
         async with self._lock:
             if self.master_data_file_path is not None:
+                if self.lazy and await self._load_snapshot():
+                    return
                 try:
                     async with aiofiles.open(self.master_data_file_path, "rb") as f:
-                        await self._loads_coro(f.read(), write=False)
-                        self._sync = True
+                        data = await f.read()
+                    await self._loads(data, write=False)
+                    self._sync = True
+                    if self.lazy:
+                        await commit(
+                            await self._write_snapshot(
+                                unmsgpack_map_items(data), len(data)
+                            )
+                        )
                 except FileNotFoundError:
                     await self._set_value(MasterData.create())
             else:
                 await self._set_value(MasterData.create())
 
-    async def _write(self):
-        if self.master_data_file_path is not None:
-            await aiofiles.os.makedirs(self.master_data_file_path.parent, exist_ok=True)
-            temp_path = self.master_data_file_path.with_suffix(
-                self.master_data_file_path.suffix + ".tmp"
+    async def _write_snapshot(
+        self,
+        tables: Mapping[str, Union[bytes, memoryview]],
+        source_size: int,
+        table_hashes: Optional[dict[str, bytes]] = None,
+        on_abort: Optional[Callable[[], None]] = None,
+    ) -> list[PendingWrite]:
+        if self.master_data_file_path is None:
+            return []
+        if table_hashes is None:
+            table_hashes = self._table_hashes
+        if table_hashes.keys() != tables.keys():
+            table_hashes = self._hash_tables(tables)
+        return [
+            await write_file(
+                snapshot_path(self.master_data_file_path),
+                pack_snapshot(tables, table_hashes, source_size),
+                on_abort=on_abort,
             )
-            async with aiofiles.open(temp_path, "wb") as f:
-                await f.write(msgpack_converter.dumps(self._master_data, MasterData))
-            await aiofiles.os.replace(temp_path, self.master_data_file_path)
+        ]
+
+    async def _persist(self) -> list[PendingWrite]:
+        unwritten = self._unwritten
+        if self.master_data_file_path is None or unwritten is None:
+            return []
+        self._unwritten = None
+
+        def aborted():
+            if self._unwritten is None:
+                self._unwritten = unwritten
+
+        try:
+            data, tables = unwritten.data, unwritten.tables
+            if tables is not None:
+                chunks = pack_map_items(tables)
+            else:
+                if data is None:
+                    data = msgpack_converter.dumps(unwritten.master_data, MasterData)
+                chunks = [data]
+            writes = [
+                await write_file(self.master_data_file_path, chunks, on_abort=aborted)
+            ]
+            # the snapshot is only read in lazy mode
+            if self.lazy:
+                writes.extend(
+                    await self._write_snapshot(
+                        unmsgpack_map_items(chunks[0]) if tables is None else tables,
+                        sum(len(chunk) for chunk in chunks),
+                        unwritten.table_hashes,
+                        aborted,
+                    )
+                )
+        except BaseException:
+            aborted()
+            raise
+        return writes
+
+    async def _write(
+        self,
+        data: Optional[bytes] = None,
+        tables: Optional[Mapping[str, Union[bytes, memoryview]]] = None,
+    ):
+        # taken now, as the value may be replaced without being written before
+        # the write happens
+        self._unwritten = _UnwrittenMasterData(
+            data, tables, self._master_data, self._table_hashes
+        )
+        if self._persistence is None:
+            await commit(await self._persist())
+        else:
+            self._persistence.mark_dirty(self._persist)
+        # the value is final from here on, even if it is still being written
         self._sync = True
 
-    async def _set_value(self, new_value: MasterData, write=True):
+    async def _set_value(
+        self,
+        new_value: MasterData,
+        write=True,
+        table_hashes: Optional[dict[str, bytes]] = None,
+    ):
         self._sync = False
         self._master_data = new_value
+        self._table_hashes = {} if table_hashes is None else table_hashes
+        self._index = None
+        self._changed_tables = {field.name for field in dataclasses.fields(MasterData)}
         if write:
             await self._write()
 
@@ -283,19 +656,54 @@ class MasterDataMutex:
 
 
 class UserDataMutex:
+    """
+    User data is persisted as a full msgpack file plus a log of the updates
+    made since, appended as one msgpack map per update. The log is folded
+    back into the full file once it outgrows it.
+
+    The first record of the log holds the hash of the full file it applies
+    to, so a log left behind by a compaction that was interrupted is never
+    replayed onto the newer file.
+    """
+
     _lock: Lock
     _user_data: dict
     _user_data_file_path: Optional[Path]
 
-    def __init__(self, user_data_file_path: Optional[Path]) -> None:
+    _persistence: Optional[PersistenceScheduler]
+    _pending: list[bytes]
+    _compact_pending: bool
+    _log_size: Optional[int]
+    _file_size: int
+
+    COMPACTION_MIN_SIZE: int = 1024 * 1024
+
+    def __init__(
+        self,
+        user_data_file_path: Optional[Path],
+        persistence: Optional[PersistenceScheduler] = None,
+    ) -> None:
         self._lock = Lock()
         self._user_data = dict()
         self._user_data_file_path = user_data_file_path
+        self._persistence = persistence
+        self._pending = []
+        self._compact_pending = False
+        self._log_size = None
+        self._file_size = 0
 
     @property
     def user_data_file_path(self):
         return self._user_data_file_path
 
+    @property
+    def log_path(self) -> Optional[Path]:
+        if self.user_data_file_path is None:
+            return None
+        return self.user_data_file_path.with_suffix(
+            self.user_data_file_path.suffix + ".log"
+        )
+
     async def __aenter__(self):
         await self._lock.acquire()
         return self._user_data
@@ -310,27 +718,114 @@ class UserDataMutex:
 
     async def load(self):
         async with self._lock:
-            if self.user_data_file_path is not None:
+            if self.user_data_file_path is not None and self.log_path is not None:
                 try:
                     async with aiofiles.open(self.user_data_file_path, "rb") as f:
-                        await self._set_value(msgpack.loads(await f.read()))
-                except (FileNotFoundError, JSONDecodeError):
+                        data = await f.read()
+                    user_data = msgpack.loads(data)
+                except (FileNotFoundError, ValueError):
                     await self._set_value(dict())
+                    return
+                self._user_data = user_data
+                self._file_size = len(data)
+                self._log_size = None
+                try:
+                    async with aiofiles.open(self.log_path, "rb") as f:
+                        log_data = await f.read()
+                except FileNotFoundError:
+                    return
+                unpacker = msgpack.Unpacker(max_buffer_size=0)
+                unpacker.feed(log_data)
+                try:
+                    if unpacker.unpack() != {"hash": self._hash(data)}:
+                        return
+                except (msgpack.OutOfData, ValueError):
+                    return
+                position = unpacker.tell()
+                try:
+                    while position < len(log_data):
+                        user_data.update(unpacker.unpack())
+                        position = unpacker.tell()
+                except (msgpack.OutOfData, ValueError, TypeError):
+                    # a record cut short by a crash ends the log; later
+                    # appends must not land after it
+                    self._compact_pending = True
+                    await self._write()
+                self._log_size = position
             else:
                 await self._set_value(dict())
 
+    @staticmethod
+    def _hash(data: bytes) -> bytes:
+        return blake2b(data, digest_size=16).digest()
+
+    async def _persist(self) -> list[PendingWrite]:
+        if self.log_path is None:
+            return []
+        if (
+            self._compact_pending
+            or self._log_size is None
+            or self._log_size + sum(len(record) for record in self._pending)
+            > max(self.COMPACTION_MIN_SIZE, self._file_size)
+        ):
+            return await self._compact()
+        if not self._pending:
+            return []
+        # updates made while appending go to the next flush
+        pending = self._pending
+        self._pending = []
+        records = b"".join(pending)
+        try:
+            async with aiofiles.open(self.log_path, "ab") as f:
+                await f.write(records)
+        except BaseException:
+            self._pending[:0] = pending
+            # part of a record may have made it in, which would hide every
+            # record appended after it
+            self._compact_pending = True
+            raise
+        self._log_size += len(records)
+        return [PendingWrite(self.log_path)]
+
+    async def _compact(self) -> list[PendingWrite]:
+        if self.user_data_file_path is None or self.log_path is None:
+            return []
+        # everything pending is already part of the data written here
+        data = msgpack.dumps(self._user_data)
+        self._pending = []
+        self._compact_pending = False
+        header = msgpack.dumps({"hash": self._hash(data)})
+
+        def committed():
+            self._file_size = len(data)
+            self._log_size = len(header)
+
+        def aborted():
+            # the files on disk are not known to match any more
+            self._log_size = None
+            self._compact_pending = True
+
+        try:
+            return [
+                await write_file(self.user_data_file_path, data, on_abort=aborted),
+                await write_file(
+                    self.log_path, header, on_commit=committed, on_abort=aborted
+                ),
+            ]
+        except BaseException:
+            aborted()
+            raise
+
     async def _write(self):
-        if self.user_data_file_path is not None:
-            await aiofiles.os.makedirs(self.user_data_file_path.parent, exist_ok=True)
-            temp_path = self.user_data_file_path.with_suffix(
-                self.user_data_file_path.suffix + ".tmp"
-            )
-            async with aiofiles.open(temp_path, "wb") as f:
-                await f.write(msgpack.dumps(self._user_data))
-            await aiofiles.os.replace(temp_path, self.user_data_file_path)
+        if self._persistence is None:
+            await commit(await self._persist())
+        else:
+            self._persistence.mark_dirty(self._persist)
 
     async def _set_value(self, new_value: dict):
         self._user_data = new_value
+        self._pending = []
+        self._compact_pending = True
         await self._write()
 
     async def set_value(self, new_value: dict):
@@ -338,8 +833,10 @@ class UserDataMutex:
             await self._set_value(new_value)
 
     async def _update_value(self, update: dict):
-        self._user_data = {**self._user_data, **update}
-        await self._write()
+        self._user_data.update(update)
+        if self.log_path is not None:
+            self._pending.append(msgpack.dumps(update))
+            await self._write()
 
     async def update_value(self, update: dict):
         async with self._lock:
@@ -507,6 +1004,21 @@ class Client:
     def api_manager(self) -> API:
         return self._api_manager
 
+    _offloader: Offloader
+    _persistence: PersistenceScheduler
+
+    @property
+    def offload_statistics(self) -> dict[str, StageStatistics]:
+        return self._offloader.statistics
+
+    @property
+    def rate_limit_statistics(self) -> dict[Domain, RateLimiterStatistics]:
+        return self._api_manager.rate_limit_statistics()
+
+    @property
+    def connection_statistics(self) -> dict[Domain, ConnectionPoolStatistics]:
+        return self._api_manager.connection_statistics()
+
     _asset: Optional[Asset]
 
     @property
@@ -536,8 +1048,8 @@ class Client:
     @property
     @asynccontextmanager
     async def system_info_replace(self):
-        async with self._system_info as system_info:
-            yield system_info, self._system_info._replace_value
+        async with self._system_info.replacing() as (system_info, replace):
+            yield system_info, replace
 
     @asynccontextmanager
     async def loads_system_info(self, data: bytes):
@@ -565,11 +1077,29 @@ class Client:
         async with self._master_data as (master_data, sync):
             yield master_data, sync
 
+    @property
+    @asynccontextmanager
+    async def master_data_index(self):
+        async with self._master_data as (master_data, sync):
+            yield self._master_data.index, sync
+
+    @asynccontextmanager
+    async def master_data_columnar(self, name: str):
+        async with self._master_data as (master_data, sync):
+            yield self._master_data.columnar(name), sync
+
     @asynccontextmanager
     async def loads_master_data(self, data: bytes, write=True):
         async with self._master_data.loads(data, write=write) as master_data:
             yield master_data
 
+    @asynccontextmanager
+    async def loads_stream_master_data(
+        self, items: AsyncIterator[tuple[str, bytes]], write=True
+    ):
+        async with self._master_data.loads_stream(items, write=write) as master_data:
+            yield master_data
+
     @asynccontextmanager
     async def loads_coro_master_data(
         self, data: Coroutine[None, None, bytes], write=True
@@ -779,6 +1309,8 @@ class Client:
         master_data_file_path: Optional[str] = None,
         user_data_file_path: Optional[str] = None,
         asset_directory: Optional[str] = None,
+        lazy_master_data: bool = False,
+        columnar_master_data_tables: Optional[Iterable[str]] = None,
         api_domain: Optional[str] = None,
         asset_bundle_domain: str = API.DEFAULT_ASSET_BUNDLE_DOMAIN,
         asset_bundle_info_domain: str = API.DEFAULT_ASSET_BUNDLE_INFO_DOMAIN,
@@ -790,6 +1322,14 @@ class Client:
         enable_game_version_encryption: bool = API.DEFAULT_ENABLE_GAME_VERSION_ENCRYPTION,
         enable_signature_encryption: bool = API.DEFAULT_ENABLE_SIGNATURE_ENCRYPTION,
         server_number: Optional[int] = None,
+        connection_pool: Optional[ConnectionPool] = None,
+        connection_pools: Optional[dict[Domain, ConnectionPool]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker_policy: Optional[CircuitBreakerPolicy] = None,
+        rate_limits: Optional[dict[Domain, RateLimit]] = None,
+        cache_directory: Optional[str] = None,
+        offloader: Optional[Offloader] = None,
+        persistence: Optional[PersistenceScheduler] = None,
         update_all_on_init: bool = False,
         auto_session_refresh: bool = True,
         auto_update: bool = False,
@@ -812,9 +1352,21 @@ class Client:
             self._asset_directory = Path(asset_directory)
         self._asset = None
 
-        self._system_info = SystemInfoMutex(_system_info_file_path)
-        self._master_data = MasterDataMutex(_master_data_file_path)
-        self._user_data = UserDataMutex(_user_data_file_path)
+        self._offloader = Offloader() if offloader is None else offloader
+
+        self._persistence = (
+            PersistenceScheduler() if persistence is None else persistence
+        )
+
+        self._system_info = SystemInfoMutex(_system_info_file_path, self._persistence)
+        self._master_data = MasterDataMutex(
+            _master_data_file_path,
+            lazy_master_data,
+            self._offloader,
+            self._persistence,
+            columnar_master_data_tables,
+        )
+        self._user_data = UserDataMutex(_user_data_file_path, self._persistence)
 
         self._api_manager = API(
             platform=platform,
@@ -832,6 +1384,15 @@ class Client:
             enable_game_version_encryption=enable_game_version_encryption,
             enable_signature_encryption=enable_signature_encryption,
             server_number=server_number,
+            connection_pool=connection_pool,
+            connection_pools=connection_pools,
+            retry_policy=retry_policy,
+            circuit_breaker_policy=circuit_breaker_policy,
+            rate_limits=rate_limits,
+            http_cache=(
+                None if cache_directory is None else HttpCache(Path(cache_directory))
+            ),
+            offloader=self._offloader,
         )
 
         self._user_id = None
@@ -840,6 +1401,9 @@ class Client:
         self._update_all_on_init = update_all_on_init
 
     async def start(self):
+        precompile_hooks(msgpack_converter, MasterData)
+        precompile_hooks(msgpack_converter, AssetBundleInfo)
+
         await self._system_info.load()
         await self._master_data.load()
         await self._user_data.load()
@@ -858,6 +1422,8 @@ class Client:
                     system_info.asset_version,
                     system_info.asset_hash,
                     self.asset_directory,
+                    self._persistence,
+                    self._offloader,
                 )
 
                 await self._asset.load()
@@ -871,9 +1437,9 @@ class Client:
             await self.update_app()
 
         async with self.system_info as system_info:
-            self.game_version = msgpack_converter.loads(
-                await self.api_manager.get_game_version_packed(system_info), GameVersion
-            )
+            self.game_version = (
+                await self.api_manager.get_game_version_cached(system_info)
+            ).decode(GameVersion)
 
             if self.game_version.domain is not None:
                 self.api_domain = self.game_version.domain
@@ -884,7 +1450,9 @@ class Client:
         log.info("client is ready")
 
     async def close(self):
+        await self._persistence.close()
         await self.api_manager.close()
+        self._offloader.shutdown()
 
     @_auto_update
     @_auto_session_refresh
@@ -982,15 +1550,20 @@ class Client:
                 if len(matching_app_version_info) > 0:
                     info: SystemInfo = matching_app_version_info[-1]
                     if info.system_profile != system_info.system_profile:
-                        await self._system_info._set_value(
-                            SystemInfo(
-                                system_profile=info.system_profile,
-                                app_version=system_info.app_version,
-                                app_hash=system_info.app_hash,
-                                multi_play_version=system_info.multi_play_version,
-                                app_version_status=info.app_version_status,
-                            )
-                        )
+                        async with self._system_info.replacing() as (current, replace):
+                            # decided again on the current value, which another
+                            # writer may have changed while the request was out
+                            if (
+                                current.app_version == info.app_version
+                                and current.system_profile != info.system_profile
+                            ):
+                                await replace(
+                                    system_profile=info.system_profile,
+                                    app_version_status=info.app_version_status,
+                                    data_version=None,
+                                    asset_version=None,
+                                    asset_hash=None,
+                                )
                     status: str = "" if info.app_version_status is None else info.app_version_status.value  # type: ignore
                     asset_update_required: bool = (
                         system_info.asset_version != info.asset_version
@@ -1068,12 +1641,12 @@ class Client:
             log.info(f"updated app: {app_version}")
 
     @_auto_session_refresh
-    async def update_data(self, data_version: str, app_version_status: str) -> None:
+    async def update_data(self, data_version: str, app_version_status: str) -> set[str]:
         async with self.system_info as system_info:
-            async with self.loads_coro_master_data(
-                self.api_manager.get_master_data_packed(system_info, data_version)
-            ):
-                pass
+            async with self.api_manager.get_master_data_stream(
+                system_info, data_version
+            ) as items, self.loads_stream_master_data(items):
+                changed_tables = self._master_data.changed_tables
 
         async with self.replace_system_info(
             data_version=data_version,
@@ -1081,21 +1654,43 @@ class Client:
         ):
             log.info(f"updated data: {data_version}")
 
+        return changed_tables
+
     @_auto_session_refresh
-    async def update_asset(self, asset_version: str, asset_hash: str) -> None:
-        if self.asset_directory is None:
-            self._asset = Asset(asset_version, asset_hash)
-        else:
-            self._asset = Asset(asset_version, asset_hash, self.asset_directory)
+    async def update_asset(
+        self, asset_version: str, asset_hash: str
+    ) -> AssetBundleInfoDiff:
+        """
+        Switches to the given asset version and returns how its bundles differ
+        from the ones of the previous version.
+        """
+        old_asset_bundle_info: Optional[AssetBundleInfo] = None
+        if self._asset is not None:
+            async with self._asset.asset_bundle_info as (asset_bundle_info, _):
+                old_asset_bundle_info = asset_bundle_info
+
+        self._asset = Asset(
+            asset_version,
+            asset_hash,
+            self.asset_directory,
+            self._persistence,
+            self._offloader,
+        )
 
         async with self.system_info_replace as (
             system_info,
             system_info_replace,
-        ), self._asset.get_asset_bundle_info(system_info, self.api_manager):
+        ), self._asset.get_asset_bundle_info(
+            system_info, self.api_manager
+        ) as asset_bundle_info:
             await system_info_replace(
                 asset_version=asset_version, asset_hash=asset_hash
             )
-            log.info(f"updated asset: {asset_version}")
+            diff = AssetBundleInfoDiff.of(old_asset_bundle_info, asset_bundle_info)
+            log.info(
+                f"updated asset: {asset_version} added: {len(diff.added)} changed: {len(diff.changed)} removed: {len(diff.removed)} to download: {diff.download_size} bytes"
+            )
+        return diff
 
     async def update_all(self) -> bool:
         try:
@@ -1131,9 +1726,9 @@ class Client:
                     if cookie != ""
                 )
             }
-        self.api_manager.session.cookie_jar.clear()
-        self.api_manager.session.cookie_jar.update_cookies(cookies)
-        return self.api_manager.session.cookie_jar
+        self.api_manager.cookie_jar.clear()
+        self.api_manager.cookie_jar.update_cookies(cookies)
+        return self.api_manager.cookie_jar
 
     @_auto_update
     @_auto_session_refresh
@@ -1341,6 +1936,78 @@ class Client:
                 lower_limit,
             )
 
+    DEFAULT_BATCH_CONCURRENCY: int = 8
+
+    @_auto_update
+    @_auto_session_refresh
+    @_auth_required
+    async def get_rankings(
+        self,
+        targets: Iterable[RankingTarget],
+        concurrency: Optional[int] = None,
+    ) -> dict[tuple[RankingKind, int], list[dict]]:
+        """
+        Fetches every rank window of `targets` concurrently, with overlapping
+        windows fetched once, and returns the entries of each board sorted by
+        rank.
+        """
+        if concurrency is None:
+            concurrency = self.DEFAULT_BATCH_CONCURRENCY
+        windows = merge_ranking_targets(targets)
+        async with self.system_info as system_info:
+            get_rankings = {
+                RankingKind.EVENT: self.api_manager.get_event_rankings,
+                RankingKind.RANK_MATCH: self.api_manager.get_rank_match_rankings,
+            }
+            responses = await gather_bounded(
+                concurrency,
+                (
+                    partial(
+                        get_rankings[window.kind],
+                        system_info,
+                        self.user_id,  # type: ignore[arg-type]
+                        window.id,
+                        None,
+                        window.rank,
+                        window.higher_limit,
+                        window.lower_limit,
+                    )
+                    for window in windows
+                ),
+            )
+        boards: dict[tuple[RankingKind, int], list[dict]] = {}
+        for window, response in zip(windows, responses):
+            boards.setdefault(window.board, []).append(response)
+        return {board: merge_rankings(responses) for board, responses in boards.items()}
+
+    @_auto_update
+    @_auto_session_refresh
+    @_auth_required
+    async def get_profile(self, user_id: Union[int, str]) -> dict:
+        async with self.system_info as system_info:
+            return await self.api_manager.get_profile(system_info, user_id)
+
+    @_auto_update
+    @_auto_session_refresh
+    @_auth_required
+    async def get_profiles(
+        self,
+        user_ids: Iterable[Union[int, str]],
+        concurrency: Optional[int] = None,
+    ) -> dict[Union[int, str], dict]:
+        if concurrency is None:
+            concurrency = self.DEFAULT_BATCH_CONCURRENCY
+        unique_user_ids = list(dict.fromkeys(user_ids))
+        async with self.system_info as system_info:
+            profiles = await gather_bounded(
+                concurrency,
+                (
+                    partial(self.api_manager.get_profile, system_info, user_id)
+                    for user_id in unique_user_ids
+                ),
+            )
+        return dict(zip(unique_user_ids, profiles))
+
     @_auto_update
     @_auto_session_refresh
     @_auth_required
@@ -1400,3 +2067,91 @@ class Client:
                 os,
             ) as asset_bundle:
                 yield asset_bundle
+
+    @_auto_update
+    @_auto_session_refresh
+    async def download_asset_bundle_to_path(
+        self,
+        asset_bundle_name: str,
+        path: Union[str, Path],
+        file_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        asset_bundle_domain: Optional[str] = None,
+        enable_asset_bundle_encryption: Optional[bool] = None,
+        asset_version: Optional[str] = None,
+        asset_hash: Optional[str] = None,
+        os: AssetOS = AssetOS.ANDROID,
+        segments: int = 1,
+    ) -> int:
+        bundle_hash = None
+        if self.asset is not None:
+            async with self.asset.asset_bundle_info as (asset_bundle_info, sync):
+                if asset_bundle_info and (bundles := asset_bundle_info.bundles):
+                    if bundle := bundles.get(asset_bundle_name):
+                        if file_size is None:
+                            file_size = bundle.file_size
+                        bundle_hash = bundle.hash
+        async with self.system_info as system_info:
+            return await self.api_manager.download_asset_bundle_to_path(
+                system_info,
+                asset_bundle_name,
+                Path(path),
+                file_size,
+                chunk_size,
+                asset_bundle_domain,
+                enable_asset_bundle_encryption,
+                asset_version,
+                asset_hash,
+                os,
+                bundle_hash,
+                segments,
+            )
+
+    async def download_asset_bundles(
+        self,
+        asset_bundle_names: Iterable[str],
+        directory: Union[str, Path, None] = None,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        priorities: Optional[dict[str, int]] = None,
+        os: AssetOS = AssetOS.ANDROID,
+        segments: Optional[int] = None,
+        with_dependencies: bool = False,
+    ) -> BundleDownloadStatistics:
+        """
+        Downloads `asset_bundle_names` in one batch, along with everything they
+        depend on if `with_dependencies` is set, in which case dependencies are
+        started before the bundles that need them.
+        """
+        if directory is None:
+            if self.asset_directory is None:
+                raise ValueError("no directory to download asset bundles to")
+            directory = self.asset_directory / "bundle"
+        if self.asset is None:
+            raise UpdateRequired
+
+        # both values are replaced rather than mutated, so the batch does not
+        # need to hold either lock while downloading
+        async with self.system_info as system_info:
+            pass
+        async with self.asset.asset_bundle_info as (asset_bundle_info, sync):
+            pass
+        if asset_bundle_info is None:
+            raise UpdateRequired
+        steps: list[Iterable[str]]
+        if with_dependencies:
+            async with self.asset.bundle_graph as (bundle_graph, sync):
+                steps = bundle_graph.plan(asset_bundle_names)
+        else:
+            steps = [asset_bundle_names]
+
+        downloader = BundleDownloader(
+            self.api_manager,
+            Path(directory),
+            limit,
+            limit_per_host,
+            priorities,
+            os,
+            segments,
+        )
+        return await downloader.download_plan(system_info, asset_bundle_info, steps)
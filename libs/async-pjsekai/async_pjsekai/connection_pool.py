@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+from aiohttp import TCPConnector
+
+
+@dataclass(frozen=True, slots=True)
+class ConnectionPool:
+    limit: int = field(default=100)
+    limit_per_host: int = field(default=0)
+    use_dns_cache: bool = field(default=True)
+    ttl_dns_cache: Optional[int] = field(default=10)
+    keepalive_timeout: Optional[float] = field(default=15.0)
+    force_close: bool = field(default=False)
+    enable_cleanup_closed: bool = field(default=False)
+
+    def connector(self) -> TCPConnector:
+        return TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=self.use_dns_cache,
+            ttl_dns_cache=self.ttl_dns_cache,
+            # aiohttp refuses a keep-alive timeout on connections it closes anyway
+            **(
+                {}
+                if self.force_close
+                else {"keepalive_timeout": self.keepalive_timeout}
+            ),
+            force_close=self.force_close,
+            enable_cleanup_closed=self.enable_cleanup_closed,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ConnectionPoolStatistics:
+    limit: int
+    limit_per_host: int
+    acquired: int
+    idle: int
+    waiting: int
+
+    @property
+    def open(self) -> int:
+        return self.acquired + self.idle
+
+    @classmethod
+    def of(cls, connector: TCPConnector) -> "ConnectionPoolStatistics":
+        # aiohttp has no public accessor for these counters, so the private
+        # fields are read with a fallback in case a release renames them
+        acquired = getattr(connector, "_acquired", ())
+        idle = getattr(connector, "_conns", {})
+        waiting = getattr(connector, "_waiters", {})
+        return cls(
+            limit=connector.limit,
+            limit_per_host=connector.limit_per_host,
+            acquired=len(acquired),
+            idle=sum(len(connections) for connections in idle.values()),
+            waiting=sum(len(waiters) for waiters in waiting.values()),
+        )
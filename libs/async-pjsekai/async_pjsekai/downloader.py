@@ -0,0 +1,177 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import partial
+import logging
+from pathlib import Path
+import time
+from typing import Iterable, Optional
+
+from async_pjsekai.api import API
+from async_pjsekai.enums.platform import AssetOS
+from async_pjsekai.models.asset_bundle_info import AssetBundleInfo, Bundle
+from async_pjsekai.models.system_info import SystemInfo
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class BundleDownloadStatistics:
+    bundles: int = field(default=0)
+    bytes: int = field(default=0)
+    elapsed: float = field(default=0.0)
+    missing: list[str] = field(default_factory=list)
+    failed: dict[str, BaseException] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class BundleDownloader:
+    """
+    Downloads asset bundles in batches. `limit` and `limit_per_host` bound the
+    connections open at once, counting every segment of a bundle fetched as
+    parallel ranges.
+    """
+
+    api_manager: API
+    directory: Path
+    limit: int
+    limit_per_host: int
+    priorities: dict[str, int]
+    os: AssetOS
+    segments: int
+
+    _connections: asyncio.Semaphore
+    _host_semaphores: dict[str, asyncio.Semaphore]
+
+    DEFAULT_LIMIT: int = 16
+    DEFAULT_LIMIT_PER_HOST: int = 8
+    DEFAULT_PRIORITIES: dict[str, int] = {
+        "music/jacket/": -10,
+        "music/long/": 10,
+    }
+    DEFAULT_SEGMENTS: int = 4
+
+    def __init__(
+        self,
+        api_manager: API,
+        directory: Path,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        priorities: Optional[dict[str, int]] = None,
+        os: AssetOS = AssetOS.ANDROID,
+        segments: Optional[int] = None,
+    ) -> None:
+        self.api_manager = api_manager
+        self.directory = directory
+        self.limit = self.DEFAULT_LIMIT if limit is None else limit
+        self.limit_per_host = (
+            self.DEFAULT_LIMIT_PER_HOST if limit_per_host is None else limit_per_host
+        )
+        self.priorities = self.DEFAULT_PRIORITIES if priorities is None else priorities
+        self.os = os
+        self.segments = self.DEFAULT_SEGMENTS if segments is None else segments
+        self._connections = asyncio.Semaphore(self.limit)
+        self._host_semaphores = {}
+
+    def priority(self, bundle_name: str, bundle: Bundle) -> tuple[int, int]:
+        prefixes = [
+            prefix for prefix in self.priorities if bundle_name.startswith(prefix)
+        ]
+        priority = self.priorities[max(prefixes, key=len)] if prefixes else 0
+        return priority, bundle.file_size or 0
+
+    def path(self, bundle_name: str) -> Path:
+        return self.directory / f"{bundle_name}.unity3d"
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        if (semaphore := self._host_semaphores.get(host)) is None:
+            semaphore = asyncio.Semaphore(self.limit_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    @asynccontextmanager
+    async def connection(self, host: str):
+        # always taken in the same order, so two segments cannot deadlock
+        async with self._connections, self._host_semaphore(host):
+            yield
+
+    async def download(
+        self,
+        system_info: SystemInfo,
+        asset_bundle_info: AssetBundleInfo,
+        asset_bundle_names: Iterable[str],
+    ) -> BundleDownloadStatistics:
+        return await self.download_plan(
+            system_info, asset_bundle_info, [asset_bundle_names]
+        )
+
+    async def download_plan(
+        self,
+        system_info: SystemInfo,
+        asset_bundle_info: AssetBundleInfo,
+        steps: Iterable[Iterable[str]],
+    ) -> BundleDownloadStatistics:
+        """
+        Downloads the bundles of `steps`, as made by `BundleGraph.plan`,
+        starting every bundle of a step before any bundle of a later one.
+        Steps do not wait for each other to finish.
+        """
+        statistics = BundleDownloadStatistics()
+        bundles = asset_bundle_info.bundles or {}
+        queue: asyncio.PriorityQueue[tuple[int, tuple[int, int], str, Bundle]] = (
+            asyncio.PriorityQueue()
+        )
+        seen: set[str] = set()
+        for step, bundle_names in enumerate(steps):
+            for bundle_name in bundle_names:
+                if bundle_name in seen:
+                    continue
+                seen.add(bundle_name)
+                if (bundle := bundles.get(bundle_name)) is None:
+                    statistics.missing.append(bundle_name)
+                else:
+                    queue.put_nowait(
+                        (step, self.priority(bundle_name, bundle), bundle_name, bundle)
+                    )
+
+        host = self.api_manager.asset_bundle_domain
+
+        async def worker():
+            while True:
+                try:
+                    _, _, bundle_name, bundle = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    size = await self.api_manager.download_asset_bundle_to_path(
+                        system_info,
+                        bundle_name,
+                        self.path(bundle_name),
+                        bundle.file_size,
+                        os=self.os,
+                        bundle_hash=bundle.hash,
+                        segments=self.segments,
+                        connection=partial(self.connection, host),
+                    )
+                except Exception as e:
+                    log.warning(f"failed to download bundle {bundle_name}: {e!r}")
+                    statistics.failed[bundle_name] = e
+                else:
+                    statistics.bundles += 1
+                    statistics.bytes += size
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(self.limit, queue.qsize()))))
+        statistics.elapsed = time.perf_counter() - start
+
+        log.info(
+            f"downloaded {statistics.bundles} bundles ({statistics.bytes} bytes) in {statistics.elapsed:.2f}s: {statistics.throughput / 1024 / 1024:.2f} MiB/s"
+        )
+        return statistics
@@ -0,0 +1,13 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from enum import Enum
+
+
+class Domain(Enum):
+    API = "api"
+    ASSET_BUNDLE = "asset_bundle"
+    ASSET_BUNDLE_INFO = "asset_bundle_info"
+    GAME_VERSION = "game_version"
+    SIGNATURE = "signature"
@@ -0,0 +1,10 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from enum import Enum
+
+
+class RankingKind(Enum):
+    EVENT = "event"
+    RANK_MATCH = "rank_match"
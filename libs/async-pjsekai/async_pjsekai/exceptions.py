@@ -104,3 +104,23 @@ class LiveDead(ProjectSekaiException):
 
 class LiveNotDead(ProjectSekaiException):
     pass
+
+
+class CircuitOpen(ProjectSekaiException):
+    domain: str
+    retry_after: float
+
+    def __init__(self, domain: str, retry_after: float):
+        super().__init__(f"{domain} is failing, retry after {retry_after:.1f}s")
+        self.domain = domain
+        self.retry_after = retry_after
+
+
+class BundleSizeMismatch(ProjectSekaiException):
+    expected: int
+    actual: int
+
+    def __init__(self, expected: int, actual: int):
+        super().__init__(f"expected {expected} bytes, downloaded {actual}")
+        self.expected = expected
+        self.actual = actual
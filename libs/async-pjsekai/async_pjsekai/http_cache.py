@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from dataclasses import dataclass, field
+from json import loads, dumps, JSONDecodeError
+from pathlib import Path
+from typing import Any, Optional, Type, TypeVar
+
+import aiofiles
+import aiofiles.os
+
+from async_pjsekai.models.converters import msgpack_converter, structure_msgpack
+from async_pjsekai.offload import Offloader
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    etag: Optional[str] = field(default=None)
+    last_modified: Optional[str] = field(default=None)
+    # decrypted payload
+    body: bytes = field(default=b"")
+    _decoded: dict[type, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def validators(self) -> dict[str, str]:
+        return {
+            **({} if self.etag is None else {"If-None-Match": self.etag}),
+            **(
+                {}
+                if self.last_modified is None
+                else {"If-Modified-Since": self.last_modified}
+            ),
+        }
+
+    def decode(self, cls: Type[T]) -> T:
+        """
+        Structures the body into `cls` once; a response that was not modified
+        hands back the same entry, and with it the same object.
+        """
+        try:
+            return self._decoded[cls]
+        except KeyError:
+            value = msgpack_converter.loads(self.body, cls)
+            self._decoded[cls] = value
+            return value
+
+    async def decode_offloaded(self, cls: Type[T], offloader: Offloader) -> T:
+        """
+        `decode`, with the structuring run through `offloader`.
+        """
+        try:
+            return self._decoded[cls]
+        except KeyError:
+            value = await offloader.run(
+                "structure", len(self.body), structure_msgpack, self.body, cls
+            )
+            # another caller may have decoded the same body meanwhile
+            return self._decoded.setdefault(cls, value)
+
+
+class HttpCache:
+    """
+    Keeps the last response of each endpoint along with its ETag/Last-Modified
+    validators, in memory and under `directory`, for conditional GETs.
+
+    A response from another URL of the same endpoint, such as the asset
+    bundle info of a newer asset version, replaces the one before it, so
+    there is never more than one entry per endpoint.
+    """
+
+    directory: Path
+
+    # the URL each entry was fetched from, by endpoint
+    _entries: dict[str, tuple[str, CacheEntry]]
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._entries = {}
+
+    def _path(self, endpoint: str) -> Path:
+        return self.directory / endpoint
+
+    async def get(self, endpoint: str, url: str) -> Optional[CacheEntry]:
+        if (cached := self._entries.get(endpoint)) is not None:
+            cached_url, entry = cached
+            return entry if cached_url == url else None
+        path = self._path(endpoint)
+        try:
+            async with aiofiles.open(path.with_suffix(".json"), "r") as f:
+                meta = loads(await f.read())
+            if meta.get("url") != url:
+                return None
+            async with aiofiles.open(path.with_suffix(".body"), "rb") as f:
+                body = await f.read()
+        except (FileNotFoundError, JSONDecodeError):
+            return None
+        entry = CacheEntry(meta.get("etag"), meta.get("last_modified"), body)
+        self._entries[endpoint] = (url, entry)
+        return entry
+
+    async def put(self, endpoint: str, url: str, entry: CacheEntry) -> None:
+        self._entries[endpoint] = (url, entry)
+        await aiofiles.os.makedirs(self.directory, exist_ok=True)
+        path = self._path(endpoint)
+        # drop the validators first so they can never be paired with the
+        # wrong body if writing is interrupted
+        try:
+            await aiofiles.os.remove(path.with_suffix(".json"))
+        except FileNotFoundError:
+            pass
+        for suffix, mode, data in (
+            (".body", "wb", entry.body),
+            (
+                ".json",
+                "w",
+                dumps(
+                    {
+                        "url": url,
+                        "etag": entry.etag,
+                        "last_modified": entry.last_modified,
+                    }
+                ),
+            ),
+        ):
+            temp_path = path.with_suffix(suffix + ".tmp")
+            async with aiofiles.open(temp_path, mode) as f:
+                await f.write(data)
+            await aiofiles.os.replace(temp_path, path.with_suffix(suffix))
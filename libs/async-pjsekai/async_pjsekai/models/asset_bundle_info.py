@@ -4,7 +4,7 @@
 # SPDX-License-Identifier: MIT
 
 from dataclasses import dataclass, field
-from typing import Optional, Union
+from typing import Mapping, Optional, Union
 
 from async_pjsekai.enums.enums import BundleCategory
 from async_pjsekai.enums.platform import AssetOS
@@ -28,4 +28,5 @@ class Bundle:
 class AssetBundleInfo:
     version: Optional[str] = field(default=None)
     os: Union[AssetOS, Unknown, None] = field(default=None)
-    bundles: Optional[dict[str, Bundle]] = field(default=None)
+    # a BundleStore once structured
+    bundles: Optional[Mapping[str, Bundle]] = field(default=None)
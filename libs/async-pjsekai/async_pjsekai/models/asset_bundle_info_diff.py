@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from async_pjsekai.models.asset_bundle_info import AssetBundleInfo, Bundle
+
+
+def _total_size(bundles: Iterable[Bundle]) -> int:
+    return sum(bundle.file_size or 0 for bundle in bundles)
+
+
+def _is_changed(old: Bundle, new: Bundle) -> bool:
+    return old.hash != new.hash or old.crc != new.crc or old.file_size != new.file_size
+
+
+@dataclass(frozen=True, slots=True)
+class AssetBundleInfoDiff:
+    """
+    The bundles that were added, changed or removed between two versions of
+    the asset bundle info, by bundle name. A bundle counts as changed when
+    its hash, crc or file size differs.
+    """
+
+    added: dict[str, Bundle] = field(default_factory=dict)
+    # the new version of each changed bundle
+    changed: dict[str, Bundle] = field(default_factory=dict)
+    removed: dict[str, Bundle] = field(default_factory=dict)
+
+    @classmethod
+    def of(
+        cls, old: Optional[AssetBundleInfo], new: Optional[AssetBundleInfo]
+    ) -> "AssetBundleInfoDiff":
+        old_bundles = {} if old is None or old.bundles is None else old.bundles
+        new_bundles = {} if new is None or new.bundles is None else new.bundles
+        added: dict[str, Bundle] = {}
+        changed: dict[str, Bundle] = {}
+        for name, bundle in new_bundles.items():
+            if (old_bundle := old_bundles.get(name)) is None:
+                added[name] = bundle
+            elif _is_changed(old_bundle, bundle):
+                changed[name] = bundle
+        removed = {
+            name: bundle
+            for name, bundle in old_bundles.items()
+            if name not in new_bundles
+        }
+        return cls(added, changed, removed)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+    @property
+    def added_size(self) -> int:
+        return _total_size(self.added.values())
+
+    @property
+    def changed_size(self) -> int:
+        return _total_size(self.changed.values())
+
+    @property
+    def removed_size(self) -> int:
+        return _total_size(self.removed.values())
+
+    @property
+    def download_size(self) -> int:
+        """
+        The bytes to fetch to bring a copy of the old version up to date.
+        """
+        return self.added_size + self.changed_size
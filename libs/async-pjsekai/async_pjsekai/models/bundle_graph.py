@@ -0,0 +1,150 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from typing import Iterable, Optional
+
+from async_pjsekai.models.asset_bundle_info import AssetBundleInfo
+
+
+class BundleGraph:
+    """
+    The dependency graph of the bundles of an asset bundle info.
+
+    Unity allows bundles to depend on each other in cycles, so cycles are
+    reported rather than rejected, and a download plan puts every bundle of
+    a cycle in the same step.
+    """
+
+    _dependencies: dict[str, tuple[str, ...]]
+    _dependents: dict[str, list[str]]
+    # bundles named as a dependency that are not in the asset bundle info
+    _missing: set[str]
+
+    @property
+    def missing(self) -> set[str]:
+        return self._missing
+
+    def __init__(self, asset_bundle_info: Optional[AssetBundleInfo]) -> None:
+        bundles = {} if asset_bundle_info is None else asset_bundle_info.bundles or {}
+        self._dependencies = {
+            name: tuple(dict.fromkeys(bundle.dependencies or ()))
+            for name, bundle in bundles.items()
+        }
+        self._dependents = {}
+        self._missing = set()
+        for name, dependencies in self._dependencies.items():
+            for dependency in dependencies:
+                self._dependents.setdefault(dependency, []).append(name)
+                if dependency not in self._dependencies:
+                    self._missing.add(dependency)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._dependencies
+
+    def dependencies(self, name: str) -> tuple[str, ...]:
+        return self._dependencies.get(name, ())
+
+    def dependents(self, name: str) -> list[str]:
+        return self._dependents.get(name, [])
+
+    def closure(self, names: Iterable[str]) -> list[str]:
+        """
+        `names` and everything they depend on, directly or not, in the order
+        they are first reached.
+        """
+        seen = dict.fromkeys(names)
+        stack = list(reversed(seen))
+        while stack:
+            for dependency in self.dependencies(stack.pop()):
+                if dependency not in seen:
+                    seen[dependency] = None
+                    stack.append(dependency)
+        return list(seen)
+
+    def _components(self, names: Iterable[str]) -> list[list[str]]:
+        # Tarjan's algorithm, iterative so deep chains do not hit the
+        # recursion limit; components come out dependencies first
+        index: dict[str, int] = {}
+        lowlink: dict[str, int] = {}
+        on_stack: set[str] = set()
+        stack: list[str] = []
+        components: list[list[str]] = []
+        for root in names:
+            if root in index:
+                continue
+            work = [(root, iter(self.dependencies(root)))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                name, dependencies = work[-1]
+                for dependency in dependencies:
+                    if dependency not in index:
+                        index[dependency] = lowlink[dependency] = len(index)
+                        stack.append(dependency)
+                        on_stack.add(dependency)
+                        work.append((dependency, iter(self.dependencies(dependency))))
+                        break
+                    if dependency in on_stack:
+                        lowlink[name] = min(lowlink[name], index[dependency])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[name])
+                    if lowlink[name] == index[name]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == name:
+                                break
+                        components.append(component)
+        return components
+
+    def cycles(self, names: Iterable[str] = ()) -> list[list[str]]:
+        """
+        The groups of bundles that depend on each other, among the closure of
+        `names`, or among every bundle if no names are given.
+        """
+        names = list(names)
+        return [
+            component
+            for component in self._components(
+                self.closure(names) if names else self._dependencies
+            )
+            if len(component) > 1 or component[0] in self.dependencies(component[0])
+        ]
+
+    def plan(self, names: Iterable[str]) -> list[list[str]]:
+        """
+        The closure of `names` split into steps, each of which only depends on
+        earlier steps, so the bundles of a step can be fetched in parallel.
+        """
+        components = self._components(self.closure(names))
+        component_of = {
+            member: position
+            for position, component in enumerate(components)
+            for member in component
+        }
+        # components come out dependencies first, so one pass finds the
+        # longest dependency chain below each of them
+        levels: list[int] = []
+        for component in components:
+            levels.append(
+                max(
+                    (
+                        levels[component_of[dependency]] + 1
+                        for member in component
+                        for dependency in self.dependencies(member)
+                        if component_of[dependency] < len(levels)
+                    ),
+                    default=0,
+                )
+            )
+        steps: list[list[str]] = [[] for _ in range(max(levels, default=-1) + 1)]
+        for component, level in zip(components, levels):
+            steps[level].extend(sorted(component))
+        return steps
@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, Mapping, Optional, Union
+
+from async_pjsekai.enums.enums import BundleCategory
+from async_pjsekai.enums.unknown import Unknown
+from async_pjsekai.models.asset_bundle_info import Bundle
+
+# stands for None in the integer columns, which are never negative otherwise
+_NONE = -1
+_BUILTIN = {None: 2, False: 0, True: 1}
+_FROM_BUILTIN = (False, True, None)
+
+
+class BundleStore(Mapping[str, Bundle]):
+    """
+    A read-only mapping of bundle names to bundles, kept in columns rather
+    than as an object per bundle. Strings that repeat across bundles are
+    shared, numbers are packed into arrays and the names are sorted, so
+    prefix queries are a pair of binary searches. Each lookup builds a new
+    `Bundle`.
+    """
+
+    _names: list[str]
+    _bundle_names: list[Optional[str]]
+    _cache_directory_names: list[Optional[str]]
+    _hashes: list[Optional[str]]
+    _categories: list[Union[BundleCategory, Unknown, None]]
+    _crcs: array
+    _file_sizes: array
+    _dependencies: list[Optional[tuple[str, ...]]]
+    _paths: list[Optional[tuple[str, ...]]]
+    _is_builtin: bytearray
+
+    def __init__(self, bundles: Iterable[tuple[str, Bundle]] = ()) -> None:
+        strings: dict[str, str] = {}
+        tuples: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+        def intern(string: Optional[str]) -> Optional[str]:
+            return None if string is None else strings.setdefault(string, string)
+
+        def intern_all(values: Optional[list[str]]) -> Optional[tuple[str, ...]]:
+            if values is None:
+                return None
+            interned = tuple(strings.setdefault(value, value) for value in values)
+            return tuples.setdefault(interned, interned)
+
+        names: list[str] = []
+        bundle_names: list[Optional[str]] = []
+        cache_directory_names: list[Optional[str]] = []
+        hashes: list[Optional[str]] = []
+        categories: list[Union[BundleCategory, Unknown, None]] = []
+        crcs = array("q")
+        file_sizes = array("q")
+        dependencies: list[Optional[tuple[str, ...]]] = []
+        paths: list[Optional[tuple[str, ...]]] = []
+        is_builtin = bytearray()
+        # rows go in as they come, so no more than one bundle object is alive
+        # at a time while structuring, and are sorted afterwards
+        for name, bundle in bundles:
+            names.append(intern(name))  # type: ignore
+            bundle_names.append(intern(bundle.bundle_name))
+            cache_directory_names.append(intern(bundle.cache_directory_name))
+            hashes.append(bundle.hash)
+            categories.append(bundle.category)
+            crcs.append(_NONE if bundle.crc is None else bundle.crc)
+            file_sizes.append(_NONE if bundle.file_size is None else bundle.file_size)
+            dependencies.append(intern_all(bundle.dependencies))
+            paths.append(intern_all(bundle.paths))
+            is_builtin.append(_BUILTIN[bundle.is_builtin])
+
+        order = sorted(range(len(names)), key=names.__getitem__)
+        self._names = [names[i] for i in order]
+        self._bundle_names = [bundle_names[i] for i in order]
+        self._cache_directory_names = [cache_directory_names[i] for i in order]
+        self._hashes = [hashes[i] for i in order]
+        self._categories = [categories[i] for i in order]
+        self._crcs = array("q", (crcs[i] for i in order))
+        self._file_sizes = array("q", (file_sizes[i] for i in order))
+        self._dependencies = [dependencies[i] for i in order]
+        self._paths = [paths[i] for i in order]
+        self._is_builtin = bytearray(is_builtin[i] for i in order)
+
+    @classmethod
+    def of(cls, bundles: Mapping[str, Bundle]) -> "BundleStore":
+        return bundles if isinstance(bundles, cls) else cls(bundles.items())
+
+    def _index(self, name: object) -> int:
+        if isinstance(name, str):
+            i = bisect_left(self._names, name)
+            if i < len(self._names) and self._names[i] == name:
+                return i
+        return -1
+
+    def _bundle(self, i: int) -> Bundle:
+        crc = self._crcs[i]
+        file_size = self._file_sizes[i]
+        dependencies = self._dependencies[i]
+        paths = self._paths[i]
+        return Bundle(
+            bundle_name=self._bundle_names[i],
+            cache_directory_name=self._cache_directory_names[i],
+            hash=self._hashes[i],
+            category=self._categories[i],
+            crc=None if crc == _NONE else crc,
+            file_size=None if file_size == _NONE else file_size,
+            dependencies=None if dependencies is None else list(dependencies),
+            paths=None if paths is None else list(paths),
+            is_builtin=_FROM_BUILTIN[self._is_builtin[i]],
+        )
+
+    def __getitem__(self, name: str) -> Bundle:
+        if (i := self._index(name)) < 0:
+            raise KeyError(name)
+        return self._bundle(i)
+
+    def __contains__(self, name: object) -> bool:
+        return self._index(name) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _prefix_range(self, prefix: str) -> range:
+        start = bisect_left(self._names, prefix)
+        if not prefix:
+            return range(start, len(self._names))
+        # the first string after every string starting with the prefix
+        end = bisect_left(self._names, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        return range(start, end)
+
+    def names_with_prefix(self, prefix: str) -> list[str]:
+        return [self._names[i] for i in self._prefix_range(prefix)]
+
+    def items_with_prefix(self, prefix: str) -> Iterator[tuple[str, Bundle]]:
+        for i in self._prefix_range(prefix):
+            yield self._names[i], self._bundle(i)
@@ -0,0 +1,331 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from array import array
+from dataclasses import fields
+from datetime import datetime, timezone
+from enum import Enum
+import sys
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from async_pjsekai.enums.unknown import Unknown
+
+T = TypeVar("T")
+
+
+class _ObjectColumn:
+    __slots__ = ("values",)
+
+    values: list[Any]
+
+    def __init__(self, values: Optional[list[Any]] = None) -> None:
+        self.values = [] if values is None else values
+
+    def append(self, value: Any) -> bool:
+        if isinstance(value, str):
+            value = sys.intern(value)
+        self.values.append(value)
+        return True
+
+    def __getitem__(self, index: int) -> Any:
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def take(self, indices: Iterable[int]) -> "_ObjectColumn":
+        values = self.values
+        return _ObjectColumn([values[index] for index in indices])
+
+    def select(self, predicate: Callable[[Any], bool]) -> list[int]:
+        return [index for index, value in enumerate(self.values) if predicate(value)]
+
+    def groups(self) -> dict[Any, list[int]]:
+        groups: dict[Any, list[int]] = {}
+        for index, value in enumerate(self.values):
+            groups.setdefault(value, []).append(index)
+        return groups
+
+
+class _ArrayColumn:
+    __slots__ = ("typecode", "data", "mask", "encode", "decode")
+
+    typecode: str
+    data: array
+    # one byte per row, 1 when the row has a value and 0 when it is None
+    mask: bytearray
+    encode: Callable[[Any], Any]
+    decode: Callable[[Any], Any]
+
+    def __init__(
+        self,
+        typecode: str,
+        encode: Callable[[Any], Any],
+        decode: Callable[[Any], Any],
+    ) -> None:
+        self.typecode = typecode
+        self.data = array(typecode)
+        self.mask = bytearray()
+        self.encode = encode
+        self.decode = decode
+
+    def append(self, value: Any) -> bool:
+        if value is None:
+            self.data.append(0)
+            self.mask.append(0)
+            return True
+        try:
+            self.data.append(self.encode(value))
+        except (TypeError, ValueError, OverflowError):
+            return False
+        self.mask.append(1)
+        return True
+
+    def __getitem__(self, index: int) -> Any:
+        return self.decode(self.data[index]) if self.mask[index] else None
+
+    def __len__(self) -> int:
+        return len(self.mask)
+
+    def take(self, indices: Iterable[int]) -> "_ArrayColumn":
+        column = _ArrayColumn(self.typecode, self.encode, self.decode)
+        data, mask = self.data, self.mask
+        indices = list(indices)
+        column.data = array(self.typecode, (data[index] for index in indices))
+        column.mask = bytearray(mask[index] for index in indices)
+        return column
+
+    def select(self, predicate: Callable[[Any], bool]) -> list[int]:
+        decode = self.decode
+        return [
+            index
+            for index, (value, present) in enumerate(zip(self.data, self.mask))
+            if predicate(decode(value) if present else None)
+        ]
+
+    def groups(self) -> dict[Any, list[int]]:
+        groups: dict[Any, list[int]] = {}
+        for index, (value, present) in enumerate(zip(self.data, self.mask)):
+            groups.setdefault(value if present else None, []).append(index)
+        decode = self.decode
+        return {
+            None if value is None else decode(value): indices
+            for value, indices in groups.items()
+        }
+
+
+class _CategoryColumn:
+    __slots__ = ("codes", "categories", "_codes_by_category")
+
+    codes: array
+    # code 0 is None; Unknown values are kept as (True, raw value) so different
+    # raw values do not collapse into the single Unknown member
+    categories: list[tuple[bool, Any]]
+    _codes_by_category: dict[tuple[bool, Any], int]
+
+    def __init__(self) -> None:
+        self.codes = array("H")
+        self.categories = [(False, None)]
+        self._codes_by_category = {(False, None): 0}
+
+    def append(self, value: Any) -> bool:
+        category = (
+            (True, value.raw_value) if isinstance(value, Unknown) else (False, value)
+        )
+        try:
+            code = self._codes_by_category[category]
+        except KeyError:
+            code = len(self.categories)
+            self.categories.append(category)
+            self._codes_by_category[category] = code
+        except TypeError:
+            return False
+        try:
+            self.codes.append(code)
+        except OverflowError:
+            return False
+        return True
+
+    @staticmethod
+    def _value(category: tuple[bool, Any]) -> Any:
+        unknown, value = category
+        return Unknown(value) if unknown else value
+
+    def __getitem__(self, index: int) -> Any:
+        return self._value(self.categories[self.codes[index]])
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def take(self, indices: Iterable[int]) -> "_CategoryColumn":
+        column = _CategoryColumn()
+        codes = self.codes
+        column.codes = array("H", (codes[index] for index in indices))
+        column.categories = list(self.categories)
+        column._codes_by_category = dict(self._codes_by_category)
+        return column
+
+    def select(self, predicate: Callable[[Any], bool]) -> list[int]:
+        # the predicate runs once per category instead of once per row
+        matching = {
+            code
+            for code, category in enumerate(self.categories)
+            if predicate(self._value(category))
+        }
+        return [index for index, code in enumerate(self.codes) if code in matching]
+
+    def groups(self) -> dict[Any, list[int]]:
+        groups: dict[int, list[int]] = {}
+        for index, code in enumerate(self.codes):
+            groups.setdefault(code, []).append(index)
+        values: dict[Any, list[int]] = {}
+        for code, indices in groups.items():
+            value = self._value(self.categories[code])
+            if value in values:
+                # every raw value comes back as the one Unknown member
+                values[value] = sorted(values[value] + indices)
+            else:
+                values[value] = indices
+        return values
+
+
+_Column = Union[_ObjectColumn, _ArrayColumn, _CategoryColumn]
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _encode_datetime(value: datetime) -> float:
+    if value.tzinfo is not timezone.utc:
+        raise ValueError(value)
+    return value.timestamp()
+
+
+def _decode_datetime(value: float) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
+def _column_for(type_: Any) -> _Column:
+    args = [
+        arg
+        for arg in (get_args(type_) if get_origin(type_) is Union else (type_,))
+        if arg is not type(None) and arg is not Unknown
+    ]
+    if len(args) != 1:
+        return _ObjectColumn()
+    (type_,) = args
+    if type_ is bool:
+        return _ArrayColumn("b", int, bool)
+    if type_ is int:
+        return _ArrayColumn("q", _identity, _identity)
+    if type_ is float:
+        return _ArrayColumn("d", _identity, _identity)
+    if type_ is datetime:
+        return _ArrayColumn("d", _encode_datetime, _decode_datetime)
+    if isinstance(type_, type) and issubclass(type_, Enum):
+        return _CategoryColumn()
+    return _ObjectColumn()
+
+
+class ColumnarTable(Generic[T]):
+    """
+    Stores rows of a master data table column by column.
+
+    Numeric, boolean and datetime columns live in `array`s with a null mask,
+    enum columns are stored as category codes and strings are interned. Rows
+    are only materialized into `row_type` instances when they are accessed.
+    """
+
+    __slots__ = ("_row_type", "_names", "_columns", "_length")
+
+    _row_type: Type[T]
+    _names: tuple[str, ...]
+    _columns: dict[str, _Column]
+    _length: int
+
+    @property
+    def row_type(self) -> Type[T]:
+        return self._row_type
+
+    @property
+    def column_names(self) -> tuple[str, ...]:
+        return self._names
+
+    def __init__(self, row_type: Type[T], rows: Iterable[T] = ()) -> None:
+        self._row_type = row_type
+        self._names = tuple(field.name for field in fields(row_type))
+        self._columns = {
+            field.name: _column_for(field.type) for field in fields(row_type)
+        }
+        self._length = 0
+        for row in rows:
+            self.append(row)
+
+    def append(self, row: T) -> None:
+        for name, column in self._columns.items():
+            value = getattr(row, name)
+            if not column.append(value):
+                column = _ObjectColumn([column[index] for index in range(len(column))])
+                column.append(value)
+                self._columns[name] = column
+        self._length += 1
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: int) -> T:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._row_type(
+            **{name: column[index] for name, column in self._columns.items()}
+        )
+
+    def __iter__(self) -> Iterator[T]:
+        for index in range(self._length):
+            yield self[index]
+
+    def column(self, name: str) -> list[Any]:
+        column = self._columns[name]
+        return [column[index] for index in range(self._length)]
+
+    def take(self, indices: Iterable[int]) -> "ColumnarTable[T]":
+        indices = list(indices)
+        table = ColumnarTable.__new__(ColumnarTable)
+        table._row_type = self._row_type
+        table._names = self._names
+        table._columns = {
+            name: column.take(indices) for name, column in self._columns.items()
+        }
+        table._length = len(indices)
+        return table
+
+    def filter(self, name: str, predicate: Callable[[Any], bool]) -> "ColumnarTable[T]":
+        return self.take(self._columns[name].select(predicate))
+
+    def where(self, **values: Any) -> "ColumnarTable[T]":
+        table = self
+        for name, value in values.items():
+            table = table.filter(name, lambda other: other == value)
+        return table
+
+    def group_by(self, name: str) -> dict[Any, "ColumnarTable[T]"]:
+        return {
+            value: self.take(indices)
+            for value, indices in self._columns[name].groups().items()
+        }
@@ -4,10 +4,13 @@
 
 from dataclasses import fields, is_dataclass
 from datetime import datetime
-from functools import partial
-from typing import Union, get_args, get_origin
+from functools import cache, partial
+from typing import Any, Callable, Mapping, Union, get_args, get_origin
 
 from async_pjsekai.enums.unknown import Unknown
+from async_pjsekai.models.asset_bundle_info import Bundle
+from async_pjsekai.models.bundle_store import BundleStore
+from async_pjsekai.utilities import unmsgpack
 
 from cattrs.converters import BaseConverter
 from cattrs.preconf.json import make_converter as make_json_converter
@@ -18,6 +21,19 @@ json_converter = make_json_converter()
 msgpack_converter = make_msgpack_converter()
 
 
+def get_structure_hook(converter: BaseConverter, cls) -> Callable[[Any, Any], Any]:
+    # public from cattrs 23.2 on, older versions only have the dispatcher
+    if (get_hook := getattr(converter, "get_structure_hook", None)) is not None:
+        return get_hook(cls)
+    return converter._structure_func.dispatch(cls)
+
+
+def get_unstructure_hook(converter: BaseConverter, cls) -> Callable[[Any], Any]:
+    if (get_hook := getattr(converter, "get_unstructure_hook", None)) is not None:
+        return get_hook(cls)
+    return converter._unstructure_func.dispatch(cls)
+
+
 def to_lower_camel(string: str) -> str:
     split = string.split("_")
     return "".join((split[0].lower(), *(word.capitalize() for word in split[1:])))
@@ -35,7 +51,7 @@ def to_pjsekai_camel_unstructure(converter: BaseConverter, cls):
     return make_dict_unstructure_fn(
         cls,
         converter,
-        **{a.name: override(rename=to_pjsekai_camel(a.name)) for a in fields(cls)}
+        **{a.name: override(rename=to_pjsekai_camel(a.name)) for a in fields(cls)},
     )
 
 
@@ -43,7 +59,7 @@ def to_pjsekai_camel_structure(converter: BaseConverter, cls):
     return make_dict_structure_fn(
         cls,
         converter,
-        **{a.name: override(rename=to_pjsekai_camel(a.name)) for a in fields(cls)}
+        **{a.name: override(rename=to_pjsekai_camel(a.name)) for a in fields(cls)},
     )
 
 
@@ -62,19 +78,28 @@ def is_union_unknown(cls):
     return len(args) < 2
 
 
-def to_union_unknown(converter: BaseConverter, data, cls):
-    args = get_args(cls)
+def to_union_unknown_structure(converter: BaseConverter, cls):
     not_unknown = next(
-        (value for value in args if value is not Unknown and value is not type(None))
+        (
+            value
+            for value in get_args(cls)
+            if value is not Unknown and value is not type(None)
+        )
     )
-    if data is None:
-        return None
-    try:
-        if not_unknown is datetime and isinstance(data, int):
-            data = data / 1000
-        return converter.structure(data, not_unknown)
-    except ValueError:
-        return Unknown(data)
+    structure = get_structure_hook(converter, not_unknown)
+    is_datetime = not_unknown is datetime
+
+    def to_union_unknown(data, _):
+        if data is None:
+            return None
+        try:
+            if is_datetime and isinstance(data, int):
+                data = data / 1000
+            return structure(data, not_unknown)
+        except ValueError:
+            return Unknown(data)
+
+    return to_union_unknown
 
 
 def to_union_dict_str_int(data, cls):
@@ -83,6 +108,28 @@ def to_union_dict_str_int(data, cls):
     raise ValueError()
 
 
+def is_bundle_mapping(cls):
+    return cls == Mapping[str, Bundle]
+
+
+def to_bundle_store_structure(converter: BaseConverter, cls):
+    structure = get_structure_hook(converter, Bundle)
+
+    def to_bundle_store(data, _):
+        if not isinstance(data, dict):
+            raise ValueError()
+        return BundleStore(
+            (name, structure(bundle, Bundle)) for name, bundle in data.items()
+        )
+
+    return to_bundle_store
+
+
+def to_bundle_store_unstructure(converter: BaseConverter, store: BundleStore):
+    unstructure = get_unstructure_hook(converter, Bundle)
+    return {name: unstructure(bundle) for name, bundle in store.items()}
+
+
 def register_converter_hooks(converter: BaseConverter):
     converter.register_unstructure_hook_factory(
         is_dataclass, partial(to_pjsekai_camel_unstructure, converter)
@@ -90,10 +137,64 @@ def register_converter_hooks(converter: BaseConverter):
     converter.register_structure_hook_factory(
         is_dataclass, partial(to_pjsekai_camel_structure, converter)
     )
-    converter.register_structure_hook_func(
-        is_union_unknown, partial(to_union_unknown, converter)
+    converter.register_structure_hook_factory(
+        is_union_unknown, partial(to_union_unknown_structure, converter)
     )
     converter.register_structure_hook(Union[dict, str, int], to_union_dict_str_int)
+    converter.register_structure_hook_factory(
+        is_bundle_mapping, partial(to_bundle_store_structure, converter)
+    )
+    converter.register_unstructure_hook(
+        BundleStore, partial(to_bundle_store_unstructure, converter)
+    )
+
+
+def dataclasses_of(cls) -> list[type]:
+    visited: set[type] = set()
+    found: list[type] = []
+
+    def visit(t):
+        if is_dataclass(t) and isinstance(t, type):
+            if t in visited:
+                return
+            visited.add(t)
+            for a in fields(t):
+                visit(a.type)
+            found.append(t)
+        else:
+            for arg in get_args(t):
+                visit(arg)
+
+    visit(cls)
+    return found
+
+
+@cache
+def precompile_hooks(converter: BaseConverter, cls) -> None:
+    structure_hooks: dict[type, Callable] = {}
+    unstructure_hooks: dict[type, Callable] = {}
+    converter.register_structure_hook_factory(
+        structure_hooks.__contains__, structure_hooks.__getitem__
+    )
+    converter.register_unstructure_hook_factory(
+        unstructure_hooks.__contains__, unstructure_hooks.__getitem__
+    )
+    for t in dataclasses_of(cls):
+        structure_hooks[t] = to_pjsekai_camel_structure(converter, t)
+        unstructure_hooks[t] = to_pjsekai_camel_unstructure(converter, t)
+
+
+def structure_msgpack(data: bytes, cls: Any) -> Any:
+    # module level so it can be sent to a process pool
+    return msgpack_converter.loads(data, cls)
+
+
+def structure_msgpack_tables(tables: dict[str, Any], types: dict[str, Any]) -> dict:
+    # module level so it can be sent to a process pool
+    return {
+        name: msgpack_converter.structure(unmsgpack(table), types[name])
+        for name, table in tables.items()
+    }
 
 
 register_converter_hooks(json_converter)
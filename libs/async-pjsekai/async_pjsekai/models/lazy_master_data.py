@@ -0,0 +1,155 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from dataclasses import Field, fields
+from typing import Any, Iterable, Mapping, Optional, Type, TypeVar, get_args
+
+from async_pjsekai.models.columnar_table import ColumnarTable
+from async_pjsekai.models.converters import msgpack_converter, to_pjsekai_camel
+from async_pjsekai.models.master_data import MasterData
+from async_pjsekai.utilities import unmsgpack, unmsgpack_map_items
+
+
+def table_row_type(field: Field) -> type:
+    # Optional[list[Row]]
+    table_type, _ = get_args(field.type)
+    (row_type,) = get_args(table_type)
+    return row_type
+
+
+T_LazyMasterData = TypeVar("T_LazyMasterData", bound="LazyMasterData")
+
+
+MASTER_DATA_TABLES: dict[str, Field] = {
+    to_pjsekai_camel(field.name): field for field in fields(MasterData)
+}
+MASTER_DATA_FIELDS: dict[str, Field] = {
+    field.name: field for field in fields(MasterData)
+}
+
+
+class LazyMasterData(MasterData):
+    """
+    Master data whose tables are structured on first access.
+
+    The tables named in `columnar_tables` are kept as a `ColumnarTable` in
+    place of their raw table once `columnar` is first called for them, and
+    reading them as attributes gives a new list of rows each time.
+    """
+
+    __slots__ = ("_raw_tables", "_columnar_names", "_columnar_tables")
+
+    _raw_tables: dict[str, Any]
+    _columnar_names: frozenset[str]
+    _columnar_tables: dict[str, ColumnarTable]
+
+    def __init__(
+        self,
+        raw_tables: Optional[Mapping[str, Any]] = None,
+        columnar_tables: Iterable[str] = (),
+        **tables: Any,
+    ) -> None:
+        self._raw_tables = {}
+        self._columnar_names = frozenset(columnar_tables)
+        self._columnar_tables = {}
+        if raw_tables is not None:
+            for key, raw_table in raw_tables.items():
+                if (field := MASTER_DATA_TABLES.get(key)) is not None:
+                    self._raw_tables[field.name] = raw_table
+        for name, value in tables.items():
+            self._raw_tables.pop(name, None)
+            if isinstance(value, ColumnarTable) and name in self._columnar_names:
+                self._columnar_tables[name] = value
+            else:
+                setattr(self, name, value)
+
+    def __getattr__(self, name: str) -> Any:
+        if (field := MASTER_DATA_FIELDS.get(name)) is None:
+            raise AttributeError(name)
+        if name in self._columnar_names and (
+            name in self._raw_tables or name in self._columnar_tables
+        ):
+            return list(self.columnar(name))
+        raw_table = self._raw_tables.pop(name, None)
+        value = (
+            None
+            if raw_table is None
+            else msgpack_converter.structure(unmsgpack(raw_table), field.type)
+        )
+        setattr(self, name, value)
+        return value
+
+    def is_loaded(self, name: str) -> bool:
+        return name not in self._raw_tables
+
+    def table(self, name: str) -> Any:
+        """The loaded table `name` in the form it is kept in."""
+        if (table := self._columnar_tables.get(name)) is not None:
+            return table
+        return getattr(self, name)
+
+    def __repr__(self) -> str:
+        # the generated repr would structure every table to show it
+        loaded = [
+            name
+            for name in MASTER_DATA_FIELDS
+            if self.is_loaded(name)
+            and name not in self._columnar_tables
+            and getattr(self, name) is not None
+        ]
+        return f"{type(self).__name__}(loaded={loaded}, columnar={list(self._columnar_tables)}, unloaded={list(self._raw_tables)})"
+
+    def columnar(self, name: str) -> ColumnarTable:
+        if (field := MASTER_DATA_FIELDS.get(name)) is None:
+            raise AttributeError(name)
+        if (table := self._columnar_tables.get(name)) is not None:
+            return table
+        row_type = table_row_type(field)
+        if (raw_table := self._raw_tables.get(name)) is None:
+            try:
+                # bypasses __getattr__, which would come back here
+                rows = object.__getattribute__(self, name)
+            except AttributeError:
+                rows = None
+            table = ColumnarTable(row_type, rows or ())
+            if rows is None:
+                return table
+        else:
+            # structure one row at a time so the full row list never exists
+            table = ColumnarTable(
+                row_type,
+                (
+                    msgpack_converter.structure(raw_row, row_type)
+                    for raw_row in unmsgpack(raw_table) or ()
+                ),
+            )
+        if name in self._columnar_names:
+            # kept instead of the raw table or the rows, never alongside them
+            self._columnar_tables[name] = table
+            if raw_table is None:
+                delattr(self, name)
+            else:
+                del self._raw_tables[name]
+        return table
+
+    @classmethod
+    def loads(
+        cls: Type[T_LazyMasterData], data: bytes, columnar_tables: Iterable[str] = ()
+    ) -> T_LazyMasterData:
+        return cls(
+            {key: bytes(table) for key, table in unmsgpack_map_items(data).items()},
+            columnar_tables,
+        )
+
+
+def is_empty(master_data: MasterData) -> bool:
+    """
+    Whether `master_data` holds no table at all, found without structuring
+    the tables a `LazyMasterData` has not loaded yet.
+    """
+    if isinstance(master_data, LazyMasterData) and (
+        master_data._raw_tables or master_data._columnar_tables
+    ):
+        return False
+    return all(getattr(master_data, name) is None for name in MASTER_DATA_FIELDS)
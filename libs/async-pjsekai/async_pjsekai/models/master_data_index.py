@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, TypeVar
+
+from async_pjsekai.models.master_data import MasterData
+
+T_MasterDataIndex = TypeVar("T_MasterDataIndex", bound="MasterDataIndex")
+
+
+@dataclass(frozen=True, slots=True)
+class ForeignKey:
+    table: str
+    column: str
+    referenced_table: str
+
+
+@dataclass(frozen=True, slots=True)
+class SortedKey:
+    table: str
+    column: str
+
+
+DEFAULT_PRIMARY_KEYS: dict[str, str] = {
+    "character_profiles": "character_id",
+}
+
+DEFAULT_FOREIGN_KEYS: tuple[ForeignKey, ...] = (
+    ForeignKey("music_vocals", "music_id", "musics"),
+    ForeignKey("music_difficulties", "music_id", "musics"),
+    ForeignKey("music_tags", "music_id", "musics"),
+    ForeignKey("musics", "release_condition_id", "release_conditions"),
+    ForeignKey("music_vocals", "release_condition_id", "release_conditions"),
+    ForeignKey("cards", "skill_id", "skills"),
+    ForeignKey("cards", "character_id", "game_characters"),
+)
+
+DEFAULT_SORTED_KEYS: tuple[SortedKey, ...] = (
+    SortedKey("musics", "published_at"),
+    SortedKey("cards", "release_at"),
+    SortedKey("events", "start_at"),
+)
+
+
+class MasterDataIndex:
+    _master_data: MasterData
+    _primary_keys: dict[str, str]
+    _foreign_keys: tuple[ForeignKey, ...]
+    _sorted_keys: tuple[SortedKey, ...]
+
+    _indexed: set[str]
+    _primary: dict[str, dict[Any, Any]]
+    _referencing: dict[tuple[str, str], dict[Any, list[Any]]]
+    _sorted: dict[tuple[str, str], list[Any]]
+
+    @property
+    def master_data(self) -> MasterData:
+        return self._master_data
+
+    def __init__(
+        self,
+        master_data: MasterData,
+        primary_keys: Optional[dict[str, str]] = None,
+        foreign_keys: Optional[Iterable[ForeignKey]] = None,
+        sorted_keys: Optional[Iterable[SortedKey]] = None,
+    ) -> None:
+        self._master_data = master_data
+        self._primary_keys = (
+            DEFAULT_PRIMARY_KEYS if primary_keys is None else primary_keys
+        )
+        self._foreign_keys = tuple(
+            DEFAULT_FOREIGN_KEYS if foreign_keys is None else foreign_keys
+        )
+        self._sorted_keys = tuple(
+            DEFAULT_SORTED_KEYS if sorted_keys is None else sorted_keys
+        )
+        self._indexed = set()
+        self._primary = {}
+        self._referencing = {}
+        self._sorted = {}
+
+    def _index(self, table: str) -> None:
+        if table in self._indexed:
+            return
+
+        primary_key = self._primary_keys.get(table, "id")
+        foreign_keys = [
+            foreign_key
+            for foreign_key in self._foreign_keys
+            if foreign_key.table == table
+        ]
+        sorted_keys = [
+            sorted_key for sorted_key in self._sorted_keys if sorted_key.table == table
+        ]
+
+        rows = getattr(self._master_data, table) or []
+        primary: dict[Any, Any] = {}
+        referencing: list[dict[Any, list[Any]]] = [{} for _ in foreign_keys]
+        for row in rows:
+            if (key := getattr(row, primary_key, None)) is not None:
+                primary[key] = row
+            for foreign_key, index in zip(foreign_keys, referencing):
+                if (key := getattr(row, foreign_key.column, None)) is not None:
+                    index.setdefault(key, []).append(row)
+
+        self._primary[table] = primary
+        for foreign_key, index in zip(foreign_keys, referencing):
+            self._referencing[(table, foreign_key.column)] = index
+        for sorted_key in sorted_keys:
+            self._sorted[(table, sorted_key.column)] = sorted(
+                rows,
+                key=lambda row: (
+                    (value := getattr(row, sorted_key.column, None)) is not None,
+                    value,
+                ),
+            )
+        self._indexed.add(table)
+
+    def primary(self, table: str) -> dict[Any, Any]:
+        self._index(table)
+        return self._primary[table]
+
+    def get(self, table: str, key: Any) -> Optional[Any]:
+        return self.primary(table).get(key)
+
+    def referencing(self, table: str, column: str) -> dict[Any, list[Any]]:
+        self._index(table)
+        try:
+            return self._referencing[(table, column)]
+        except KeyError:
+            raise KeyError(f"no foreign key declared on {table}.{column}") from None
+
+    def referenced(self, table: str, column: str, row: Any) -> Optional[Any]:
+        foreign_key = next(
+            (
+                foreign_key
+                for foreign_key in self._foreign_keys
+                if foreign_key.table == table and foreign_key.column == column
+            ),
+            None,
+        )
+        if foreign_key is None:
+            raise KeyError(f"no foreign key declared on {table}.{column}")
+        if (key := getattr(row, column, None)) is None:
+            return None
+        return self.get(foreign_key.referenced_table, key)
+
+    def sorted(self, table: str, column: str) -> list[Any]:
+        self._index(table)
+        try:
+            return self._sorted[(table, column)]
+        except KeyError:
+            raise KeyError(f"no sorted key declared on {table}.{column}") from None
+
+    def updated(
+        self: T_MasterDataIndex, master_data: MasterData, changed_tables: Iterable[str]
+    ) -> T_MasterDataIndex:
+        index = type(self)(
+            master_data, self._primary_keys, self._foreign_keys, self._sorted_keys
+        )
+        unchanged = self._indexed.difference(changed_tables)
+        index._indexed = set(unchanged)
+        index._primary = {
+            table: primary
+            for table, primary in self._primary.items()
+            if table in unchanged
+        }
+        index._referencing = {
+            key: referencing
+            for key, referencing in self._referencing.items()
+            if key[0] in unchanged
+        }
+        index._sorted = {
+            key: rows for key, rows in self._sorted.items() if key[0] in unchanged
+        }
+        return index
@@ -0,0 +1,104 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import partial
+import time
+from typing import Callable, Optional, TypeVar
+
+from typing_extensions import ParamSpec
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+class OffloadStrategy(Enum):
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+@dataclass(slots=True)
+class StageStatistics:
+    calls: int = field(default=0)
+    offloaded: int = field(default=0)
+    bytes: int = field(default=0)
+    seconds: float = field(default=0.0)
+
+
+class Offloader:
+    """
+    Runs CPU heavy stages (decrypt, unpack, structure) of payloads of at
+    least `threshold` bytes outside the event loop.
+
+    With `OffloadStrategy.PROCESS` the functions and their arguments are
+    pickled, so only pass module level functions.
+    """
+
+    strategy: OffloadStrategy
+    threshold: int
+    max_workers: Optional[int]
+    statistics: dict[str, StageStatistics]
+
+    _executor: Optional[Executor]
+
+    DEFAULT_THRESHOLD: int = 1024 * 1024
+    DEFAULT_MAX_WORKERS: int = 2
+
+    def __init__(
+        self,
+        strategy: OffloadStrategy = OffloadStrategy.THREAD,
+        threshold: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.strategy = strategy
+        self.threshold = self.DEFAULT_THRESHOLD if threshold is None else threshold
+        self.max_workers = (
+            self.DEFAULT_MAX_WORKERS if max_workers is None else max_workers
+        )
+        self.statistics = {}
+        self._executor = None
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        if self._executor is None:
+            if self.strategy is OffloadStrategy.THREAD:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="async_pjsekai"
+                )
+            elif self.strategy is OffloadStrategy.PROCESS:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+        return self._executor
+
+    async def run(
+        self,
+        stage: str,
+        size: int,
+        func: Callable[P, R],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> R:
+        if (statistics := self.statistics.get(stage)) is None:
+            statistics = StageStatistics()
+            self.statistics[stage] = statistics
+        start = time.perf_counter()
+        try:
+            if size < self.threshold or (executor := self.executor) is None:
+                return func(*args, **kwargs)
+            statistics.offloaded += 1
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, partial(func, *args, **kwargs)
+            )
+        finally:
+            statistics.calls += 1
+            statistics.bytes += size
+            statistics.seconds += time.perf_counter() - start
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
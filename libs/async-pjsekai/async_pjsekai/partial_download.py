@@ -0,0 +1,257 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from dataclasses import dataclass, field
+from json import loads, dumps, JSONDecodeError
+import os
+from pathlib import Path
+from typing import AsyncIterator, Optional, Union
+
+from aiohttp import ClientPayloadError
+import aiofiles.os
+
+from async_pjsekai.exceptions import BundleSizeMismatch
+from async_pjsekai.utilities import OBFUSCATION_HEADER
+
+
+def local_position(position: int) -> int:
+    # the obfuscation header is not part of the saved bundle
+    return max(position - len(OBFUSCATION_HEADER), 0)
+
+
+def _preallocate(fd: int, size: Optional[int]) -> None:
+    os.ftruncate(fd, 0)
+    if size:
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            pass
+
+
+def _pwrite_all(fd: int, data: memoryview, position: int) -> int:
+    written = 0
+    while written < len(data):
+        written += os.pwrite(fd, data[written:], position + written)
+    return written
+
+
+@dataclass(slots=True)
+class Segment:
+    # positions in the obfuscated stream served by the asset bundle domain
+    start: int
+    end: Optional[int] = field(default=None)
+    written: int = field(default=0)
+    complete: bool = field(default=False)
+
+    @property
+    def position(self) -> int:
+        return self.start + self.written
+
+
+class PartialDownload:
+    """
+    A bundle download that survives interruptions.
+
+    Data goes to `<path>.part` and progress to `<path>.part.json`, which also
+    records the expected size and hash of the bundle so a part left behind by
+    an older version of the bundle is discarded instead of resumed.
+    Progress is only recorded after the written data is synced, so resuming
+    from it never trusts bytes that may not have reached the disk.
+    """
+
+    path: Path
+    file_size: Optional[int]
+    hash: Optional[str]
+    segments: list[Segment]
+
+    _fd: int
+    _unsynced: int
+    _checkpoint_lock: asyncio.Lock
+
+    CHECKPOINT_SIZE: int = 8 * 1024 * 1024
+    MIN_SEGMENT_SIZE: int = 8 * 1024 * 1024
+
+    @property
+    def part_path(self) -> Path:
+        return self.path.with_suffix(self.path.suffix + ".part")
+
+    @property
+    def sidecar_path(self) -> Path:
+        return self.path.with_suffix(self.path.suffix + ".part.json")
+
+    def __init__(
+        self,
+        path: Path,
+        file_size: Optional[int],
+        hash: Optional[str],
+        segments: list[Segment],
+    ) -> None:
+        self.path = path
+        self.file_size = file_size
+        self.hash = hash
+        self.segments = segments
+        self._fd = -1
+        self._unsynced = 0
+        self._checkpoint_lock = asyncio.Lock()
+
+    @classmethod
+    def plan(cls, file_size: Optional[int], segments: int) -> list[Segment]:
+        if not file_size or segments <= 1:
+            return [Segment(0)]
+        # the last segment is open ended, so it reads up to the real end of
+        # the bundle and `finish` can tell a wrong file_size from a short read
+        count = max(1, min(segments, file_size // cls.MIN_SEGMENT_SIZE))
+        step = -(-file_size // count)
+        bounds = [index * step for index in range(count)]
+        return [Segment(start, end) for start, end in zip(bounds, [*bounds[1:], None])]
+
+    @classmethod
+    async def open(
+        cls,
+        path: Path,
+        file_size: Optional[int] = None,
+        hash: Optional[str] = None,
+        segments: int = 1,
+    ) -> "PartialDownload":
+        await aiofiles.os.makedirs(path.parent, exist_ok=True)
+        download = cls(path, file_size, hash, cls.plan(file_size, segments))
+        try:
+            async with aiofiles.open(download.sidecar_path, "r") as f:
+                sidecar = loads(await f.read())
+            if (
+                sidecar["file_size"] == file_size
+                and sidecar["hash"] == hash
+                and await aiofiles.os.path.exists(download.part_path)
+            ):
+                download.segments = [
+                    Segment(start, end, written, complete)
+                    for start, end, written, complete in sidecar["segments"]
+                ]
+        except (FileNotFoundError, JSONDecodeError, KeyError, TypeError, ValueError):
+            pass
+
+        resumed = sum(segment.written for segment in download.segments)
+        download._fd = os.open(download.part_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if resumed == 0:
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                _preallocate,
+                download._fd,
+                None if file_size is None else local_position(file_size),
+            )
+        return download
+
+    async def checkpoint(self) -> None:
+        async with self._checkpoint_lock:
+            # taken before syncing, as other segments keep writing meanwhile
+            segments = [
+                [segment.start, segment.end, segment.written, segment.complete]
+                for segment in self.segments
+            ]
+            self._unsynced = 0
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._fd)
+            temp_path = self.sidecar_path.with_suffix(self.sidecar_path.suffix + ".tmp")
+            async with aiofiles.open(temp_path, "w") as f:
+                await f.write(
+                    dumps(
+                        {
+                            "file_size": self.file_size,
+                            "hash": self.hash,
+                            "segments": segments,
+                        }
+                    )
+                )
+            await aiofiles.os.replace(temp_path, self.sidecar_path)
+
+    async def write(
+        self,
+        segment: Segment,
+        chunks: AsyncIterator[Union[bytes, memoryview]],
+        offset: int,
+    ) -> None:
+        """
+        Writes deobfuscated `chunks` that start at `offset` in the obfuscated
+        stream into `segment`, skipping what the segment already has and
+        stopping at its end. Raises `ClientPayloadError` if `chunks` end
+        before the segment does, so that it is resumed rather than left with
+        a hole.
+        """
+        loop = asyncio.get_running_loop()
+
+        skip = local_position(segment.position) - local_position(offset)
+        if skip < 0:
+            raise ValueError("chunks start after the segment position")
+        remaining = (
+            None
+            if segment.end is None
+            else local_position(segment.end) - local_position(segment.position)
+        )
+        async for chunk in chunks:
+            if skip >= len(chunk):
+                skip -= len(chunk)
+                continue
+            view = memoryview(chunk)[skip:]
+            skip = 0
+            if remaining is not None:
+                view = view[:remaining]
+                remaining -= len(view)
+            position = local_position(segment.position)
+            written = await loop.run_in_executor(
+                None, _pwrite_all, self._fd, view, position
+            )
+            # the first bytes of the stream are the header, which is not saved
+            segment.written = (
+                local_position(segment.position)
+                + written
+                + len(OBFUSCATION_HEADER)
+                - segment.start
+            )
+            self._unsynced += written
+            if self._unsynced >= self.CHECKPOINT_SIZE:
+                await self.checkpoint()
+            if remaining == 0:
+                break
+        if remaining:
+            raise ClientPayloadError(
+                f"response ended {remaining} bytes before the end of its range"
+            )
+        segment.complete = True
+
+    @property
+    def size(self) -> int:
+        return max(local_position(segment.position) for segment in self.segments)
+
+    async def _remove(self, path: Path) -> None:
+        try:
+            await aiofiles.os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def finish(self) -> int:
+        """
+        Moves the part file over `path` once every segment is complete and
+        the size is the expected one. A part of the wrong size is discarded,
+        so the next download starts over.
+        """
+        if not all(segment.complete for segment in self.segments):
+            raise ValueError("not every segment is complete")
+        size = self.size
+        if self.file_size and size != local_position(self.file_size):
+            self.close()
+            await self._remove(self.part_path)
+            await self._remove(self.sidecar_path)
+            raise BundleSizeMismatch(local_position(self.file_size), size)
+        await asyncio.get_running_loop().run_in_executor(
+            None, os.ftruncate, self._fd, size
+        )
+        self.close()
+        await aiofiles.os.replace(self.part_path, self.path)
+        await self._remove(self.sidecar_path)
+        return size
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
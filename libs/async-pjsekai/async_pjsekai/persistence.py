@@ -0,0 +1,173 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import os
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Optional, Union
+
+import aiofiles
+import aiofiles.os
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class PendingWrite:
+    path: Path
+    # written next to `path` and moved over it on commit; None for a file
+    # that was appended to in place, which only needs syncing
+    temp_path: Optional[Path] = field(default=None)
+    # lets the owner update its state once the write is in place, or take
+    # back what it handed over if the write is given up on
+    on_commit: Optional[Callable[[], None]] = field(default=None, compare=False)
+    on_abort: Optional[Callable[[], None]] = field(default=None, compare=False)
+
+
+Writer = Callable[[], Awaitable[list[PendingWrite]]]
+
+
+async def write_file(
+    path: Path,
+    data: Union[bytes, Iterable[Union[bytes, memoryview]]],
+    on_commit: Optional[Callable[[], None]] = None,
+    on_abort: Optional[Callable[[], None]] = None,
+) -> PendingWrite:
+    await aiofiles.os.makedirs(path.parent, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    async with aiofiles.open(temp_path, "wb") as f:
+        for chunk in [data] if isinstance(data, bytes) else data:
+            await f.write(chunk)
+    return PendingWrite(path, temp_path, on_commit, on_abort)
+
+
+def abort(writes: Iterable[PendingWrite]) -> None:
+    """
+    Tells the owners of `writes` that they will not be committed.
+    """
+    for write in writes:
+        if write.on_abort is not None:
+            write.on_abort()
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _commit(writes: list[PendingWrite], fsync: bool) -> None:
+    if fsync:
+        for write in writes:
+            _fsync(write.path if write.temp_path is None else write.temp_path)
+    for write in writes:
+        if write.temp_path is not None:
+            os.replace(write.temp_path, write.path)
+    if fsync:
+        for directory in {
+            write.path.parent for write in writes if write.temp_path is not None
+        }:
+            try:
+                _fsync(directory)
+            except OSError:
+                # not every platform can sync a directory
+                pass
+
+
+async def commit(writes: list[PendingWrite], fsync: bool = False) -> None:
+    """
+    Moves every written file into place, in order. With `fsync` all of them
+    are synced in one go first, and their directories after.
+    """
+    if not writes:
+        return
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _commit, writes, fsync)
+    except BaseException:
+        abort(writes)
+        raise
+    for write in writes:
+        if write.on_commit is not None:
+            write.on_commit()
+
+
+class PersistenceScheduler:
+    """
+    Writes state in the background: owners mark themselves dirty with the
+    writer that saves them, and every writer marked within `debounce_delay`
+    runs in the same flush, whose files are then synced and moved into
+    place together.
+    """
+
+    debounce_delay: float
+    fsync: bool
+
+    _dirty: dict[Writer, None]
+    _lock: asyncio.Lock
+    _task: Optional[asyncio.Task]
+
+    DEFAULT_DEBOUNCE_DELAY: float = 1.0
+
+    def __init__(
+        self, debounce_delay: Optional[float] = None, fsync: bool = True
+    ) -> None:
+        self.debounce_delay = (
+            self.DEFAULT_DEBOUNCE_DELAY if debounce_delay is None else debounce_delay
+        )
+        self.fsync = fsync
+        self._dirty = {}
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def dirty(self) -> bool:
+        return len(self._dirty) > 0
+
+    def mark_dirty(self, writer: Writer) -> None:
+        self._dirty[writer] = None
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.debounce_delay)
+        self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            log.exception("failed to persist state, retrying on the next change")
+
+    async def flush(self) -> None:
+        async with self._lock:
+            writers = list(self._dirty)
+            self._dirty.clear()
+            writes: list[PendingWrite] = []
+            try:
+                try:
+                    for writer in writers:
+                        writes.extend(await writer())
+                except BaseException:
+                    abort(writes)
+                    raise
+                await commit(writes, self.fsync)
+            except BaseException:
+                for writer in writers:
+                    self._dirty.setdefault(writer, None)
+                raise
+
+    async def close(self) -> None:
+        """
+        Flushes what is still waiting for the debounce delay, along with
+        anything that became dirty while flushing.
+        """
+        while True:
+            if self._task is not None:
+                self._task.cancel()
+                self._task = None
+            await self.flush()
+            if not self._dirty:
+                break
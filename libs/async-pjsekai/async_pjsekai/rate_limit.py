@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from dataclasses import dataclass, field
+import time
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimit:
+    # requests per second
+    rate: float
+    # requests that may be sent at once after an idle period
+    burst: int = field(default=1)
+
+    def __post_init__(self) -> None:
+        if not self.rate > 0:
+            raise ValueError(f"rate must be positive, got {self.rate}")
+        if self.burst < 1:
+            raise ValueError(f"burst must be at least 1, got {self.burst}")
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimiterStatistics:
+    rate: float
+    burst: int
+    tokens: float
+    waiting: int
+    acquired: int
+    delayed: int
+    total_wait: float
+    max_wait: float
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+
+class RateLimiter:
+    """
+    A token bucket holding up to `burst` tokens and refilled at `rate` tokens
+    per second. Each request takes a token, waiting in line for one if the
+    bucket is empty.
+    """
+
+    domain: str
+    limit: RateLimit
+
+    _tokens: float
+    _updated_at: float
+    _lock: asyncio.Lock
+    _waiting: int
+    _acquired: int
+    _delayed: int
+    _total_wait: float
+    _max_wait: float
+
+    def __init__(self, domain: str, limit: RateLimit) -> None:
+        self.domain = domain
+        self.limit = limit
+        self._tokens = float(limit.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._waiting = 0
+        self._acquired = 0
+        self._delayed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._tokens + (now - self._updated_at) * self.limit.rate,
+            float(self.limit.burst),
+        )
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        start = time.monotonic()
+        delayed = self._lock.locked()
+        self._waiting += 1
+        try:
+            # the lock queues waiters in order, so none of them starves
+            async with self._lock:
+                self._refill()
+                if self._tokens < 1:
+                    delayed = True
+                    await asyncio.sleep((1 - self._tokens) / self.limit.rate)
+                    self._refill()
+                # may go slightly negative if the sleep ended early, which the
+                # next request then waits for
+                self._tokens -= 1
+        finally:
+            self._waiting -= 1
+        wait = time.monotonic() - start
+        self._acquired += 1
+        if delayed:
+            self._delayed += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+
+    def statistics(self) -> RateLimiterStatistics:
+        self._refill()
+        return RateLimiterStatistics(
+            rate=self.limit.rate,
+            burst=self.limit.burst,
+            tokens=self._tokens,
+            waiting=self._waiting,
+            acquired=self._acquired,
+            delayed=self._delayed,
+            total_wait=self._total_wait,
+            max_wait=self._max_wait,
+        )
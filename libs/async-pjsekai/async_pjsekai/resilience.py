@@ -0,0 +1,96 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from dataclasses import dataclass, field
+import random
+import time
+from typing import Optional
+
+from aiohttp import ClientConnectionError, ClientPayloadError, ClientResponseError
+
+from async_pjsekai.exceptions import CircuitOpen
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    attempts: int = field(default=3)
+    base_delay: float = field(default=0.5)
+    max_delay: float = field(default=8.0)
+    # fraction of each delay that is randomized
+    jitter: float = field(default=0.5)
+    statuses: frozenset[int] = field(default=frozenset({500, 502, 503, 504}))
+    # only methods that are safe to send twice are retried; PUT is not, as
+    # game endpoints such as gacha pulls use it, so callers opt in per request
+    methods: frozenset[str] = field(default=frozenset({"GET"}))
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return delay * (1 - self.jitter * random.random())
+
+    def is_transient(self, exception: BaseException) -> bool:
+        if isinstance(exception, ClientResponseError):
+            return exception.status in self.statuses
+        return isinstance(
+            exception,
+            (ClientConnectionError, ClientPayloadError, asyncio.TimeoutError),
+        )
+
+    def retries(self, method: str) -> bool:
+        return method.upper() in self.methods
+
+
+@dataclass(frozen=True, slots=True)
+class CircuitBreakerPolicy:
+    failure_threshold: int = field(default=5)
+    reset_timeout: float = field(default=30.0)
+
+
+class CircuitBreaker:
+    """
+    Fails requests to a domain fast after `failure_threshold` consecutive
+    transient failures, then lets a single probe through once `reset_timeout`
+    has passed to decide whether to close again.
+    """
+
+    domain: str
+    policy: CircuitBreakerPolicy
+
+    _failures: int
+    _opened_at: Optional[float]
+    _probing: bool
+
+    def __init__(self, domain: str, policy: CircuitBreakerPolicy) -> None:
+        self.domain = domain
+        self.policy = policy
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def check(self) -> None:
+        if self._opened_at is None:
+            return
+        retry_after = self._opened_at + self.policy.reset_timeout - time.monotonic()
+        if retry_after > 0 or self._probing:
+            raise CircuitOpen(self.domain, max(retry_after, 0.0))
+        self._probing = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_abort(self) -> None:
+        # a cancelled probe tells nothing about the domain
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probing or self._failures >= self.policy.failure_threshold:
+            self._opened_at = time.monotonic()
+        self._probing = False
@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from typing import AsyncIterator, Optional, Union
+
+
+class StreamChanged(Exception):
+    """
+    A retried response did not repeat the part of the body that was already
+    handed out.
+    """
+
+
+class SharedStream:
+    """
+    A response body received once and read by any number of readers, each
+    from the start and while it is still being received.
+
+    A retried response is written from offset 0 again: the part readers
+    already have is checked against it rather than handed out twice, so
+    readers never see the retry.
+    """
+
+    _data: bytearray
+    _done: bool
+    _error: Optional[BaseException]
+    _changed: asyncio.Event
+
+    def __init__(self) -> None:
+        self._data = bytearray()
+        self._done = False
+        self._error = None
+        self._changed = asyncio.Event()
+
+    @property
+    def size(self) -> int:
+        return len(self._data)
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def write(self, offset: int, chunk: Union[bytes, memoryview]) -> None:
+        # attempts write in order, so `offset` never lies past the end
+        received = min(len(self._data) - offset, len(chunk))
+        if received > 0 and self._data[offset : offset + received] != chunk[:received]:
+            raise StreamChanged
+        if received < len(chunk):
+            self._data += chunk[max(received, 0) :]
+            self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self._done = True
+        self._error = error
+        self._notify()
+
+    async def read(self) -> AsyncIterator[bytes]:
+        position = 0
+        while True:
+            changed = self._changed
+            if position < len(self._data):
+                chunk = bytes(self._data[position:])
+                position += len(chunk)
+                yield chunk
+            elif self._error is not None:
+                raise self._error
+            elif self._done:
+                return
+            else:
+                await changed.wait()
@@ -0,0 +1,85 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import mmap
+import os
+from pathlib import Path
+import struct
+from typing import Mapping, Optional, Union
+
+# Snapshot layout, all integers little endian:
+#   header: magic, table count, size of the msgpack file it was made from
+#   table of contents: per table key length, key, hash, offset, length
+#   table data: the raw msgpack of every table, back to back
+SNAPSHOT_MAGIC = b"PJSKSNP1"
+SNAPSHOT_HASH_SIZE = 16
+
+_HEADER = struct.Struct("<8sIQ")
+_ENTRY = struct.Struct(f"<H{SNAPSHOT_HASH_SIZE}sQQ")
+
+
+def snapshot_path(path: Path) -> Path:
+    return path.with_suffix(path.suffix + ".snapshot")
+
+
+def pack_snapshot(
+    tables: Mapping[str, Union[bytes, memoryview]],
+    table_hashes: Mapping[str, bytes],
+    source_size: int,
+) -> list[Union[bytes, memoryview]]:
+    keys = [(key, key.encode()) for key in tables if isinstance(key, str)]
+    offset = _HEADER.size + sum(_ENTRY.size + len(encoded) for _, encoded in keys)
+    chunks: list[Union[bytes, memoryview]] = [
+        _HEADER.pack(SNAPSHOT_MAGIC, len(keys), source_size)
+    ]
+    for key, encoded in keys:
+        length = len(tables[key])
+        chunks.append(
+            _ENTRY.pack(len(encoded), table_hashes[key], offset, length) + encoded
+        )
+        offset += length
+    chunks.extend(tables[key] for key, _ in keys)
+    return chunks
+
+
+def load_snapshot(
+    path: Path, source_path: Path
+) -> Optional[tuple[dict[str, memoryview], dict[str, bytes]]]:
+    """
+    Maps the snapshot of `source_path` into memory and returns views of its
+    tables and their hashes, or None if the snapshot is missing or stale.
+
+    The returned views keep the mapping alive; pages are only read when a
+    table is actually decoded.
+    """
+
+    try:
+        source_stat = os.stat(source_path)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_mtime_ns < source_stat.st_mtime_ns:
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    view = memoryview(mapped)
+    try:
+        magic, count, source_size = _HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC or source_size != source_stat.st_size:
+            return None
+        tables: dict[str, memoryview] = {}
+        table_hashes: dict[str, bytes] = {}
+        position = _HEADER.size
+        for _ in range(count):
+            key_length, table_hash, offset, length = _ENTRY.unpack_from(view, position)
+            position += _ENTRY.size
+            key = bytes(view[position : position + key_length]).decode()
+            position += key_length
+            if offset + length > len(view):
+                return None
+            tables[key] = view[offset : offset + length]
+            table_hashes[key] = table_hash
+    except (struct.error, UnicodeDecodeError):
+        return None
+    return tables, table_hashes
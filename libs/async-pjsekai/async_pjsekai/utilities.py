@@ -3,9 +3,9 @@
 #
 # SPDX-License-Identifier: MIT
 
-from typing import AsyncIterator, Optional
+from typing import Any, AsyncIterator, Mapping, Optional, Union
 
-from msgpack import packb, unpackb
+from msgpack import OutOfData, Packer, Unpacker, packb, unpackb
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
 
@@ -18,6 +18,83 @@ def unmsgpack(data: bytes) -> dict:
     return unpackb(data, strict_map_key=False) if len(data) > 0 else {}  # type: ignore
 
 
+def unmsgpack_map_items(data: bytes) -> dict[Any, memoryview]:
+    if len(data) == 0:
+        return {}
+    unpacker = Unpacker(
+        strict_map_key=False, max_buffer_size=max(len(data), 100 * 1024 * 1024)
+    )
+    unpacker.feed(data)
+    view = memoryview(data)
+    items = {}
+    for _ in range(unpacker.read_map_header()):
+        key = unpacker.unpack()
+        start = unpacker.tell()
+        unpacker.skip()
+        items[key] = view[start : unpacker.tell()]
+    return items
+
+
+async def unmsgpack_map_items_stream(
+    chunks: AsyncIterator[Union[bytes, memoryview]],
+) -> AsyncIterator[tuple[Any, bytes]]:
+    """
+    Streaming `unmsgpack_map_items`: yields each item of the map in `chunks`
+    as soon as its value has fully arrived, with the value still packed.
+    """
+
+    unpacker = Unpacker(strict_map_key=False, max_buffer_size=0)
+    # the data of the value being parsed; the unpacker has its own copy but
+    # does not give it back
+    buffer = bytearray()
+    # stream position of buffer[0]
+    base = 0
+    remaining: Optional[int] = None
+    key: Any = None
+    start: Optional[int] = None
+    async for chunk in chunks:
+        unpacker.feed(chunk)
+        buffer += chunk
+        while remaining != 0:
+            # a partially parsed object is resumed by the next call, so
+            # retrying after every chunk never parses the same data twice
+            try:
+                if remaining is None:
+                    remaining = unpacker.read_map_header()
+                    continue
+                if start is None:
+                    key = unpacker.unpack()
+                    start = unpacker.tell()
+                    del buffer[: start - base]
+                    base = start
+                unpacker.skip()
+            except OutOfData:
+                break
+            end = unpacker.tell()
+            value = bytes(buffer[: end - base])
+            del buffer[: end - base]
+            base = end
+            start = None
+            remaining -= 1
+            yield key, value
+    if remaining != 0 and (remaining is not None or len(buffer) > 0):
+        raise ValueError("msgpack stream ended inside the map")
+
+
+def pack_map_items(items: Mapping[Any, Union[bytes, memoryview]]) -> list[bytes]:
+    """
+    The inverse of `unmsgpack_map_items`, as chunks that concatenate into
+    the packed map.
+    """
+
+    packer = Packer()
+    chunks = [packer.pack_map_header(len(items))]
+    for key, value in items.items():
+        chunks.append(packer.pack(key))
+        chunks.append(value)
+    return chunks
+
+
 def encrypt(plaintext: bytes, key: bytes, iv: bytes) -> bytes:
     cipher = AES.new(key, AES.MODE_CBC, iv=iv)
     ciphertext: bytes = cipher.encrypt(pad(plaintext, 16))
@@ -30,37 +107,88 @@ def decrypt(ciphertext: bytes, key: bytes, iv: bytes) -> bytes:
     return plaintext
 
 
-async def deobfuscated(obfuscated_chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
-    count = 0
+async def decrypted(
+    chunks: AsyncIterator[Union[bytes, memoryview]], key: bytes, iv: bytes
+) -> AsyncIterator[bytes]:
+    """
+    Streaming `decrypt`. The last block is held back until `chunks` ends so
+    its padding can be removed.
+    """
+
+    cipher = AES.new(key, AES.MODE_CBC, iv=iv)
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        length = (len(pending) - 1) // AES.block_size * AES.block_size
+        if length > 0:
+            yield cipher.decrypt(pending[:length])
+            pending = pending[length:]
+    plaintext: bytes = unpad(cipher.decrypt(pending), AES.block_size)
+    if len(plaintext) > 0:
+        yield plaintext
+
+
+OBFUSCATION_HEADER: bytes = b"\x10\x00\x00\x00"
+OBFUSCATION_LENGTH: int = 128
+OBFUSCATION_MASK: bytes = bytes(
+    0xFF if i % 8 < 5 else 0x00 for i in range(OBFUSCATION_LENGTH)
+)
+
+
+def _xor_mask(data: Union[bytes, memoryview], position: int) -> bytes:
+    length = len(data)
+    mask = OBFUSCATION_MASK[position : position + length]
+    value = int.from_bytes(data, "little") ^ int.from_bytes(mask, "little")
+    return value.to_bytes(length, "little")
+
+
+async def deobfuscated(
+    obfuscated_chunks: AsyncIterator[bytes],
+    offset: int = 0,
+) -> AsyncIterator[Union[bytes, memoryview]]:
+    # offset is the position of the first chunk in the obfuscated stream, for
+    # chunks fetched with a Range request
+    header_length = len(OBFUSCATION_HEADER)
+    count = offset
     async for chunk in obfuscated_chunks:
-        if (count - 4) >= 128:
+        if count >= header_length + OBFUSCATION_LENGTH:
+            count += len(chunk)
             yield chunk
-        else:
-            yield bytes(
-                [
-                    int(byte)
-                    if (count + i - 4) >= 128 or (count + i - 4) % 8 >= 5
-                    else int(byte) ^ 0xFF
-                    for i, byte in enumerate(chunk)
-                    if (count + i) >= 4
-                ]
-            )
-        count += len(chunk)
-
-
-async def obfuscated(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+            continue
+
+        view = memoryview(chunk)
+        if count < header_length:
+            view = view[header_length - count :]
+            count = min(count + len(chunk), header_length)
+        if count < header_length + OBFUSCATION_LENGTH and len(view) > 0:
+            position = count - header_length
+            length = min(OBFUSCATION_LENGTH - position, len(view))
+            yield _xor_mask(view[:length], position)
+            count += length
+            view = view[length:]
+        if len(view) > 0:
+            count += len(view)
+            yield view
+
+
+async def obfuscated(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[Union[bytes, memoryview]]:
+    header_written = False
     count = 0
     async for chunk in chunks:
-        if count >= 128:
+        if count >= OBFUSCATION_LENGTH:
+            count += len(chunk)
             yield chunk
-        else:
-            yield bytes(
-                [0x10, 0, 0, 0]
-                + [
-                    int(byte)
-                    if (count + i) >= 128 or (count + i) % 8 >= 5
-                    else int(byte) ^ 0xFF
-                    for i, byte in enumerate(chunk)
-                ]
-            )
-        count += len(chunk)
+            continue
+
+        if not header_written:
+            header_written = True
+            yield OBFUSCATION_HEADER
+        view = memoryview(chunk)
+        length = min(OBFUSCATION_LENGTH - count, len(view))
+        if length > 0:
+            yield _xor_mask(view[:length], count)
+        count += len(view)
+        if len(view) > length:
+            yield view[length:]
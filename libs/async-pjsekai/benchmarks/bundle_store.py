@@ -0,0 +1,126 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Measures the memory a synthetic asset bundle list takes as a dict of
+`Bundle` and as a `BundleStore`, and how long lookups take.
+
+    python -m benchmarks.bundle_store [bundles]
+"""
+
+import os
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+import msgpack
+
+from async_pjsekai.models.asset_bundle_info import AssetBundleInfo, Bundle
+from async_pjsekai.models.bundle_store import BundleStore
+from async_pjsekai.models.converters import msgpack_converter
+
+BUNDLES = 30_000
+PREFIXES = (
+    "music/jacket/",
+    "music/long/",
+    "character/member/",
+    "event_story/",
+    "live/2dmode/",
+    "stamp/",
+)
+CATEGORIES = ("StartApp", "OnDemand", "AdditionalVoice")
+
+
+def payload(bundles: int) -> bytes:
+    random.seed(0)
+    names = [
+        f"{random.choice(PREFIXES)}{i:06d}_{random.randrange(100):02d}"
+        for i in range(bundles)
+    ]
+    # most bundles depend on a few shared ones
+    shared = [f"shader/{i:03d}" for i in range(200)]
+    return msgpack.dumps(
+        {
+            "version": "3.1.0.10",
+            "os": "android",
+            "bundles": {
+                name: {
+                    "bundleName": name,
+                    "cacheFileName": os.urandom(16).hex(),
+                    "cacheDirectoryName": name.split("/")[0],
+                    "hash": os.urandom(16).hex(),
+                    "category": random.choice(CATEGORIES),
+                    "crc": random.getrandbits(32),
+                    "fileSize": random.randrange(1 << 24),
+                    "dependencies": random.sample(shared, random.randrange(4)),
+                    "paths": [
+                        f"assets/sekai/assetbundle/resources/{name}/{j}"
+                        for j in range(random.randrange(4))
+                    ],
+                    "isBuiltin": False,
+                }
+                for name in names
+            },
+        }
+    )
+
+
+def bundle_dict(data: bytes) -> dict[str, Bundle]:
+    structure = msgpack_converter._structure_func.dispatch(Bundle)
+    return {
+        name: structure(bundle, Bundle)
+        for name, bundle in msgpack.loads(data)["bundles"].items()
+    }
+
+
+def bundle_store(data: bytes) -> BundleStore:
+    bundles = msgpack_converter.loads(data, AssetBundleInfo).bundles
+    assert isinstance(bundles, BundleStore)
+    return bundles
+
+
+def measure(load: Callable[[bytes], Any], data: bytes) -> tuple[Any, int, int, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    bundles = load(data)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return bundles, retained, peak, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else BUNDLES
+    data = payload(count)
+    print(f"{count} bundles, {len(data) / 1024 / 1024:.1f} MiB packed")
+    print(f"{'':16}{'retained':>12}{'peak':>12}{'load':>9}{'lookup':>11}{'prefix':>11}")
+
+    loaded = []
+    for name, load in (("dict of Bundle", bundle_dict), ("BundleStore", bundle_store)):
+        bundles, retained, peak, elapsed = measure(load, data)
+        loaded.append(bundles)
+        keys = random.sample(list(bundles), 1000)
+        lookup = min(
+            timeit.repeat(lambda: [bundles[key] for key in keys], number=10, repeat=3)
+        ) / (10 * len(keys))
+        if isinstance(bundles, BundleStore):
+            prefix = lambda: bundles.names_with_prefix("music/jacket/")
+        else:
+            prefix = lambda: [key for key in bundles if key.startswith("music/jacket/")]
+        prefix_time = min(timeit.repeat(prefix, number=10, repeat=3)) / 10
+        print(
+            f"{name:16}{retained / 1024 / 1024:>8.1f} MiB{peak / 1024 / 1024:>8.1f} MiB"
+            f"{elapsed:>8.2f}s{lookup * 1e6:>8.2f} us{prefix_time * 1e3:>8.2f} ms"
+        )
+
+    plain, store = loaded
+    assert len(plain) == len(store)
+    assert all(store[name] == bundle for name, bundle in plain.items())
+
+
+if __name__ == "__main__":
+    main()
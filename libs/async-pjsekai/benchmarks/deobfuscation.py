@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Compares `deobfuscated` and `obfuscated` with the byte by byte generators
+they replaced, on a bundle split into chunks of a few sizes.
+
+    python -m benchmarks.deobfuscation
+"""
+
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Callable
+
+from async_pjsekai.utilities import deobfuscated, obfuscated
+
+SIZE = 4 * 1024 * 1024
+CHUNK_SIZES = (1, 3, 64 * 1024, 1024 * 1024)
+REPEAT = 5
+
+
+async def byte_by_byte_deobfuscated(
+    obfuscated_chunks: AsyncIterator[bytes],
+) -> AsyncIterator[bytes]:
+    count = 0
+    async for chunk in obfuscated_chunks:
+        if (count - 4) >= 128:
+            yield chunk
+        else:
+            yield bytes(
+                [
+                    (
+                        int(byte)
+                        if (count + i - 4) >= 128 or (count + i - 4) % 8 >= 5
+                        else int(byte) ^ 0xFF
+                    )
+                    for i, byte in enumerate(chunk)
+                    if (count + i) >= 4
+                ]
+            )
+        count += len(chunk)
+
+
+async def byte_by_byte_obfuscated(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[bytes]:
+    count = 0
+    async for chunk in chunks:
+        if count >= 128:
+            yield chunk
+        else:
+            yield bytes(
+                [0x10, 0, 0, 0]
+                + [
+                    (
+                        int(byte)
+                        if (count + i) >= 128 or (count + i) % 8 >= 5
+                        else int(byte) ^ 0xFF
+                    )
+                    for i, byte in enumerate(chunk)
+                ]
+            )
+        count += len(chunk)
+
+
+def split(data: bytes, chunk_size: int) -> list[bytes]:
+    # small chunks only matter around the header, so past it the rest of the
+    # bundle is a single chunk
+    end = len(data) if chunk_size >= 256 else 256
+    chunks = [data[i : min(i + chunk_size, end)] for i in range(0, end, chunk_size)]
+    if end < len(data):
+        chunks.append(data[end:])
+    return chunks
+
+
+async def once(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+
+async def collect(
+    transform: Callable[[AsyncIterator[bytes]], AsyncIterator], chunks: list[bytes]
+) -> tuple[float, bytes]:
+    async def source() -> AsyncIterator[bytes]:
+        for chunk in chunks:
+            yield chunk
+
+    start = time.perf_counter()
+    output = [chunk async for chunk in transform(source())]
+    elapsed = time.perf_counter() - start
+    return elapsed, b"".join(output)
+
+
+async def main():
+    plain = os.urandom(SIZE)
+    obfuscated_data = b"".join([chunk async for chunk in obfuscated(once(plain))])
+    print(f"{'':24}{'chunk':>10}{'old':>12}{'new':>12}{'speedup':>10}")
+    for name, old, new, data, expected in (
+        (
+            "deobfuscated",
+            byte_by_byte_deobfuscated,
+            deobfuscated,
+            obfuscated_data,
+            plain,
+        ),
+        ("obfuscated", byte_by_byte_obfuscated, obfuscated, plain, obfuscated_data),
+    ):
+        for chunk_size in CHUNK_SIZES:
+            chunks = split(data, chunk_size)
+            old_time = new_time = float("inf")
+            for _ in range(REPEAT):
+                elapsed, output = await collect(new, chunks)
+                assert output == expected
+                new_time = min(new_time, elapsed)
+                elapsed, output = await collect(old, chunks)
+                # the old obfuscated repeated the prefix in every chunk that
+                # started in the header, so only compare when it did not
+                assert output == expected or chunk_size < 128 + 4
+                old_time = min(old_time, elapsed)
+            print(
+                f"{name:24}{chunk_size:>10}{old_time * 1e3:>10.2f}ms"
+                f"{new_time * 1e3:>10.2f}ms{old_time / new_time:>9.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
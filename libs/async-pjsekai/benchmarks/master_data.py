@@ -0,0 +1,111 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Times structuring a synthetic master data payload with a fresh converter,
+with and without `precompile_hooks` beforehand, and once warm.
+
+    python -m benchmarks.master_data [rows per table]
+"""
+
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from enum import Enum
+import sys
+import time
+from typing import Any, Union, get_args, get_origin
+
+import msgpack
+
+from async_pjsekai.enums.unknown import Unknown
+from async_pjsekai.models.converters import (
+    make_msgpack_converter,
+    precompile_hooks,
+    register_converter_hooks,
+    to_pjsekai_camel,
+)
+from async_pjsekai.models.master_data import MasterData
+
+ROWS = 300
+REPEAT = 3
+
+
+def sample(t: Any, i: int) -> Any:
+    """A value of type `t` as it comes from the server."""
+    if get_origin(t) is Union:
+        args = [arg for arg in get_args(t) if arg not in (Unknown, type(None))]
+        return sample(args[0], i) if len(args) == 1 else i
+    if get_origin(t) is list:
+        return [sample(get_args(t)[0], i + j) for j in range(2)]
+    if is_dataclass(t):
+        return {to_pjsekai_camel(f.name): sample(f.type, i) for f in fields(t)}
+    if isinstance(t, type) and issubclass(t, Enum):
+        members = list(t)
+        return members[i % len(members)].value
+    if t is datetime:
+        return 1_600_000_000_000 + i * 1000
+    if t is bool:
+        return i % 2 == 0
+    if t is float:
+        return i / 2
+    if t is str:
+        return f"string_{i}"
+    if t is int:
+        return i
+    return None
+
+
+def payload(rows: int) -> dict:
+    data = {}
+    for f in fields(MasterData):
+        # every table is an Optional[list[row]]
+        (table,) = [arg for arg in get_args(f.type) if arg is not type(None)]
+        (row,) = get_args(table)
+        data[to_pjsekai_camel(f.name)] = [sample(row, i) for i in range(rows)]
+    return data
+
+
+def converter():
+    converter = make_msgpack_converter()
+    register_converter_hooks(converter)
+    return converter
+
+
+def timed(function, *args) -> tuple[float, Any]:
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    data = payload(rows)
+    print(
+        f"{len(data)} tables, {rows} rows each, "
+        f"{len(msgpack.dumps(data)) / 1024 / 1024:.1f} MiB packed"
+    )
+
+    cold = precompile = precompiled_cold = steady = float("inf")
+    for _ in range(REPEAT):
+        elapsed, expected = timed(converter().structure, data, MasterData)
+        cold = min(cold, elapsed)
+
+        warm = converter()
+        elapsed, _ = timed(precompile_hooks, warm, MasterData)
+        precompile = min(precompile, elapsed)
+        elapsed, result = timed(warm.structure, data, MasterData)
+        precompiled_cold = min(precompiled_cold, elapsed)
+        assert result == expected
+
+        elapsed, _ = timed(warm.structure, data, MasterData)
+        steady = min(steady, elapsed)
+
+    print(f"{'cold, hooks generated on first use':40}{cold:>8.3f}s")
+    print(f"{'precompile_hooks':40}{precompile:>8.3f}s")
+    print(f"{'cold, after precompile_hooks':40}{precompiled_cold:>8.3f}s")
+    print(f"{'steady':40}{steady:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Times N API calls in parallel that each hold `SystemInfoMutex` over a
+simulated round trip, the way `Client.ping` does, next to the exclusive lock
+it used to take. An update of the system info runs alongside the calls.
+
+    python -m benchmarks.system_info
+"""
+
+import asyncio
+import time
+
+from async_pjsekai.client import SystemInfoMutex
+from async_pjsekai.models.system_info import SystemInfo
+
+ROUND_TRIP = 0.05
+CALLS = (1, 10, 100)
+
+
+class ExclusiveSystemInfoMutex:
+    """The old behaviour: every holder waits for the previous one."""
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self._system_info = SystemInfo.create()
+
+    async def __aenter__(self) -> SystemInfo:
+        await self._lock.acquire()
+        return self._system_info
+
+    async def __aexit__(self, *_) -> None:
+        self._lock.release()
+
+    async def load(self, app_version: str, app_hash: str) -> None:
+        async with self._lock:
+            self._system_info = SystemInfo.create()
+
+
+async def measure(mutex, calls: int) -> tuple[float, float]:
+    async def call():
+        async with mutex as system_info:
+            await asyncio.sleep(ROUND_TRIP)
+
+    async def update() -> float:
+        await asyncio.sleep(ROUND_TRIP / 2)
+        start = time.perf_counter()
+        await mutex.load(app_version="1.0.0", app_hash="hash")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, update_time = await asyncio.gather(
+        asyncio.gather(*(call() for _ in range(calls))), update()
+    )
+    return time.perf_counter() - start, update_time
+
+
+async def main():
+    print(f"round trip: {ROUND_TRIP * 1e3:.0f}ms")
+    print(f"{'':12}{'calls':>8}{'elapsed':>12}{'round trips':>14}{'update':>12}")
+    for name, factory in (
+        ("exclusive", ExclusiveSystemInfoMutex),
+        ("snapshot", lambda: SystemInfoMutex(None)),
+    ):
+        for calls in CALLS:
+            elapsed, update_time = await measure(factory(), calls)
+            print(
+                f"{name:12}{calls:>8}{elapsed * 1e3:>10.1f}ms"
+                f"{elapsed / ROUND_TRIP:>14.1f}{update_time * 1e3:>10.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
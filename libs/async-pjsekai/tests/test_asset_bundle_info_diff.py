@@ -0,0 +1,67 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import msgpack
+
+from async_pjsekai.models.asset_bundle_info import AssetBundleInfo, Bundle
+from async_pjsekai.models.asset_bundle_info_diff import AssetBundleInfoDiff
+from async_pjsekai.models.converters import msgpack_converter
+
+
+def info(**bundles: Bundle) -> AssetBundleInfo:
+    return AssetBundleInfo(version="1", bundles=bundles)
+
+
+def test_classification():
+    old = info(
+        same=Bundle(hash="a", crc=1, file_size=10, dependencies=["x"]),
+        rehashed=Bundle(hash="a", crc=1, file_size=10),
+        recrc=Bundle(hash="a", crc=1, file_size=10),
+        resized=Bundle(hash="a", crc=1, file_size=10),
+        removed=Bundle(hash="a", file_size=7),
+    )
+    new = info(
+        # only the hash, crc and size say whether the content changed
+        same=Bundle(hash="a", crc=1, file_size=10, dependencies=["y"]),
+        rehashed=Bundle(hash="b", crc=1, file_size=10),
+        recrc=Bundle(hash="a", crc=2, file_size=10),
+        resized=Bundle(hash="a", crc=1, file_size=20),
+        added=Bundle(hash="c", file_size=5),
+    )
+    diff = AssetBundleInfoDiff.of(old, new)
+    assert list(diff.added) == ["added"]
+    assert list(diff.changed) == ["rehashed", "recrc", "resized"]
+    assert diff.changed["resized"].file_size == 20
+    assert list(diff.removed) == ["removed"]
+    assert (diff.added_size, diff.changed_size, diff.removed_size) == (5, 40, 7)
+    assert diff.download_size == 45
+    assert not diff.is_empty
+
+
+def test_missing_versions():
+    new = info(a=Bundle(file_size=3), b=Bundle())
+    diff = AssetBundleInfoDiff.of(None, new)
+    assert list(diff.added) == ["a", "b"]
+    assert diff.download_size == 3
+
+    assert list(AssetBundleInfoDiff.of(new, None).removed) == ["a", "b"]
+    assert AssetBundleInfoDiff.of(None, AssetBundleInfo()).is_empty
+    assert AssetBundleInfoDiff.of(new, new).is_empty
+
+
+def test_structured_bundle_stores():
+    def load(bundles: dict) -> AssetBundleInfo:
+        return msgpack_converter.loads(
+            msgpack.dumps({"version": "1", "bundles": bundles}), AssetBundleInfo
+        )
+
+    old = load({"a": {"hash": "1", "fileSize": 1}, "b": {"hash": "1"}})
+    new = load({"a": {"hash": "2", "fileSize": 2}, "c": {"hash": "1"}})
+    diff = AssetBundleInfoDiff.of(old, new)
+    assert (list(diff.added), list(diff.changed), list(diff.removed)) == (
+        ["c"],
+        ["a"],
+        ["b"],
+    )
+    assert diff.changed["a"].hash == "2"
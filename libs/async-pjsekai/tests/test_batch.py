@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+from async_pjsekai.batch import (
+    MAX_RANKING_WINDOW,
+    RankingTarget,
+    gather_bounded,
+    merge_ranking_targets,
+    merge_rankings,
+)
+from async_pjsekai.enums.ranking_kind import RankingKind
+
+EVENT = RankingKind.EVENT
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def spans(targets: list[RankingTarget]) -> list[tuple[int, int]]:
+    return [(target.first, target.last) for target in targets]
+
+
+def covered(targets: list[RankingTarget]) -> set[int]:
+    return {rank for target in targets for rank in range(target.first, target.last + 1)}
+
+
+def test_window_boundary():
+    full = RankingTarget.window(EVENT, 1, 1, MAX_RANKING_WINDOW)
+    assert spans(merge_ranking_targets([full])) == [(1, MAX_RANKING_WINDOW)]
+
+    over = RankingTarget.window(EVENT, 1, 1, MAX_RANKING_WINDOW + 1)
+    assert spans(merge_ranking_targets([over])) == [
+        (1, MAX_RANKING_WINDOW),
+        (MAX_RANKING_WINDOW + 1, MAX_RANKING_WINDOW + 1),
+    ]
+
+    # two windows meeting exactly at the boundary still fit in one request
+    halves = [
+        RankingTarget.window(EVENT, 1, 1, MAX_RANKING_WINDOW // 2),
+        RankingTarget.window(EVENT, 1, MAX_RANKING_WINDOW // 2 + 1, MAX_RANKING_WINDOW),
+    ]
+    assert spans(merge_ranking_targets(halves)) == [(1, MAX_RANKING_WINDOW)]
+
+
+def test_every_window_fits_and_nothing_is_lost():
+    targets = [
+        RankingTarget(EVENT, 1, 50, higher_limit=100, lower_limit=20),
+        RankingTarget(EVENT, 1, 60, lower_limit=150),
+        RankingTarget(EVENT, 1, 1000),
+        RankingTarget(EVENT, 2, 1000),
+        RankingTarget(RankingKind.RANK_MATCH, 1, 5, higher_limit=2, lower_limit=2),
+    ]
+    merged = merge_ranking_targets(targets)
+    assert all(target.last - target.first < MAX_RANKING_WINDOW for target in merged)
+    for board in {target.board for target in targets}:
+        assert covered([t for t in merged if t.board == board]) == covered(
+            [t for t in targets if t.board == board]
+        )
+    # ranks 1 to 210 of the first board take three requests, rank 1000 one more
+    assert spans([t for t in merged if t.board == (EVENT, 1)]) == [
+        (1, 100),
+        (101, 200),
+        (201, 210),
+        (1000, 1000),
+    ]
+
+
+def test_smaller_window():
+    merged = merge_ranking_targets([RankingTarget.window(EVENT, 1, 1, 25)], 10)
+    assert spans(merged) == [(1, 10), (11, 20), (21, 25)]
+
+
+def test_overlapping_rankings_are_kept_once():
+    entries = merge_rankings(
+        [
+            {"rankings": [{"rank": 2, "userId": 2}, {"rank": 1, "userId": 1}]},
+            {"rankings": [{"rank": 2, "userId": 2}, {"rank": 3, "userId": 3}]},
+            {},
+        ]
+    )
+    assert [entry["rank"] for entry in entries] == [1, 2, 3]
+
+
+def test_gather_is_bounded():
+    async def main():
+        running = 0
+        most = 0
+
+        async def call(value: int) -> int:
+            nonlocal running, most
+            running += 1
+            most = max(most, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return value
+
+        results = await gather_bounded(
+            2, [lambda value=value: call(value) for value in range(5)]
+        )
+        assert results == list(range(5))
+        assert most == 2
+
+    run(main())
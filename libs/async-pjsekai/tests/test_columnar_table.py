@@ -0,0 +1,154 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from datetime import datetime, timezone
+import gc
+import tracemalloc
+
+import msgpack
+
+from async_pjsekai.client import MasterDataMutex
+from async_pjsekai.enums.enums import CardRarityType
+from async_pjsekai.enums.unknown import Unknown
+from async_pjsekai.models.columnar_table import ColumnarTable
+from async_pjsekai.models.lazy_master_data import LazyMasterData
+from async_pjsekai.models.master_data import Card
+from async_pjsekai.models.converters import msgpack_converter
+
+RARITIES = ["rarity_1", "rarity_2", "rarity_3", "rarity_4", "rarity_birthday"]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def raw_cards(count: int) -> list[dict]:
+    return [
+        {
+            "id": index,
+            "characterId": index % 26 + 1,
+            "cardRarityType": RARITIES[index % len(RARITIES)],
+            "attr": "cute",
+            "prefix": f"card {index % 100}",
+            "releaseAt": 1600000000000 + index * 1000,
+        }
+        for index in range(count)
+    ]
+
+
+def cards(count: int) -> list[Card]:
+    return msgpack_converter.structure(raw_cards(count), list[Card])
+
+
+def test_rows_round_trip():
+    rows = cards(20) + [Card(), Card(id=20, card_rarity_type=Unknown("rarity_5"))]
+    table = ColumnarTable(Card, rows)
+    assert len(table) == len(rows)
+    assert list(table) == rows
+    assert table[-1].card_rarity_type == Unknown("rarity_5")
+    assert table[-1].card_rarity_type.raw_value == "rarity_5"
+    assert table.column("id")[-3:] == [19, None, 20]
+
+
+def test_take_filter_where_and_group_by():
+    rows = cards(50)
+    table = ColumnarTable(Card, rows)
+
+    assert list(table.take([3, 1])) == [rows[3], rows[1]]
+
+    released_after = datetime.fromtimestamp(1600000040, timezone.utc)
+    recent = table.filter(
+        "release_at", lambda value: value is not None and value > released_after
+    )
+    assert list(recent) == [row for row in rows if row.release_at > released_after]
+
+    rarity_4 = recent.where(card_rarity_type=CardRarityType.RARITY_4)
+    assert [row.id for row in rarity_4] == [43, 48]
+    assert list(table.where(character_id=1, attr="missing")) == []
+
+    groups = table.group_by("card_rarity_type")
+    assert list(groups) == [CardRarityType(rarity) for rarity in RARITIES]
+    assert all(len(group) == 10 for group in groups.values())
+    assert [row.id for row in groups[CardRarityType.RARITY_2]] == list(range(1, 50, 5))
+
+
+def test_unknown_values_are_one_group():
+    rows = [
+        Card(id=0, card_rarity_type=Unknown("rarity_5")),
+        Card(id=1, card_rarity_type=Unknown("rarity_6")),
+        Card(id=2),
+        Card(id=3, card_rarity_type=Unknown("rarity_5")),
+    ]
+    groups = ColumnarTable(Card, rows).group_by("card_rarity_type")
+    assert [row.id for row in groups[Unknown("rarity_5")]] == [0, 1, 3]
+    assert [row.id for row in groups[None]] == [2]
+
+
+def test_column_falls_back_to_objects():
+    # a naive datetime does not fit the timestamp array
+    naive = datetime(2020, 1, 1)
+    rows = cards(3) + [Card(id=3, release_at=naive)]
+    table = ColumnarTable(Card, rows)
+    assert list(table) == rows
+    assert table[3].release_at is naive
+
+
+def test_uses_less_memory_than_rows():
+    data = raw_cards(20000)
+
+    def allocated(build):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            value = build()
+            gc.collect()
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del value
+        return size
+
+    rows = allocated(lambda: msgpack_converter.structure(data, list[Card]))
+    columns = allocated(
+        lambda: ColumnarTable(
+            Card, (msgpack_converter.structure(row, Card) for row in data)
+        )
+    )
+    assert columns * 3 < rows * 2
+
+
+def test_columnar_table_is_kept_in_place_of_the_raw_table(tmp_path):
+    async def main():
+        master_data = MasterDataMutex(
+            tmp_path / "master_data.msgpack", lazy=True, columnar_tables=["cards"]
+        )
+        async with master_data.loads(
+            msgpack.dumps({"cards": raw_cards(10), "musics": [{"id": 1}]})
+        ):
+            pass
+        table = master_data.columnar("cards")
+        assert master_data.columnar("cards") is table
+        value = master_data.master_data
+        assert isinstance(value, LazyMasterData)
+        assert "cards" not in value._raw_tables
+        assert value.cards == list(table)
+
+        # a table that did not opt in is built again on every call
+        assert master_data.columnar("musics") is not master_data.columnar("musics")
+
+        # unchanged tables keep their columns across an update
+        async with master_data.loads(
+            msgpack.dumps({"cards": raw_cards(10), "musics": [{"id": 2}]})
+        ):
+            pass
+        assert master_data.columnar("cards") is table
+
+        async with master_data.loads(
+            msgpack.dumps({"cards": raw_cards(11), "musics": [{"id": 2}]})
+        ):
+            pass
+        assert len(master_data.columnar("cards")) == 11
+
+    run(main())
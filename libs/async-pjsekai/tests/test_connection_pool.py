@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+from aiohttp import ClientSession, web
+
+from async_pjsekai.api import API
+from async_pjsekai.connection_pool import ConnectionPool, ConnectionPoolStatistics
+from async_pjsekai.enums.domain import Domain
+from async_pjsekai.enums.platform import Platform
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_pool_settings_reach_the_connector():
+    async def main():
+        connector = ConnectionPool(limit=3, limit_per_host=2).connector()
+        try:
+            statistics = ConnectionPoolStatistics.of(connector)
+            assert (statistics.limit, statistics.limit_per_host) == (3, 2)
+            assert statistics.open == 0
+            assert statistics.waiting == 0
+        finally:
+            await connector.close()
+
+        # aiohttp refuses a keep-alive timeout together with force_close
+        connector = ConnectionPool(force_close=True).connector()
+        await connector.close()
+
+    run(main())
+
+
+def test_statistics_follow_the_limit():
+    async def main():
+        release = asyncio.Event()
+        arrived = []
+
+        async def handler(request: web.Request):
+            arrived.append(request)
+            await release.wait()
+            return web.Response(body=b"ok")
+
+        app = web.Application()
+        app.router.add_get("/", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore
+        api = API(
+            Platform.ANDROID,
+            None,
+            None,
+            None,
+            "",
+            "",
+            "",
+            "",
+            "",
+            False,
+            False,
+            False,
+            False,
+            False,
+        )
+
+        async def get(session: ClientSession):
+            async with session.get(f"http://127.0.0.1:{port}/") as response:
+                return await response.read()
+
+        session = ClientSession(connector=ConnectionPool(limit=2).connector())
+        api._sessions[Domain.API] = session
+        try:
+            requests = [asyncio.ensure_future(get(session)) for _ in range(4)]
+            while len(arrived) < 2:
+                await asyncio.sleep(0.01)
+            statistics = api.connection_statistics()[Domain.API]
+            assert statistics.acquired == 2
+            assert statistics.waiting == 2
+            assert len(arrived) == 2
+
+            release.set()
+            assert await asyncio.gather(*requests) == [b"ok"] * 4
+            statistics = api.connection_statistics()[Domain.API]
+            # kept alive for the next requests, and never more than the limit
+            assert statistics.acquired == 0
+            assert statistics.idle == 2
+            assert statistics.waiting == 0
+        finally:
+            await session.close()
+            await runner.cleanup()
+
+    run(main())
@@ -0,0 +1,124 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+from pathlib import Path
+
+from async_pjsekai.downloader import BundleDownloader
+from async_pjsekai.models.asset_bundle_info import AssetBundleInfo, Bundle
+from async_pjsekai.models.bundle_graph import BundleGraph
+from async_pjsekai.models.system_info import SystemInfo
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class _API:
+    asset_bundle_domain = "assets"
+
+    def __init__(self) -> None:
+        self.started: list[str] = []
+
+    async def download_asset_bundle_to_path(self, system_info, name, path, *_, **__):
+        self.started.append(name)
+        await asyncio.sleep(0)
+        return 1
+
+
+def test_dependencies_are_started_first(tmp_path: Path):
+    asset_bundle_info = AssetBundleInfo(
+        bundles={
+            # sorts before its dependencies and is the smallest, so it would
+            # otherwise go first
+            "a": Bundle(dependencies=["b"], file_size=-1),
+            "b": Bundle(dependencies=["c", "d"]),
+            "c": Bundle(dependencies=["d"]),
+            "d": Bundle(dependencies=["c"]),
+        }
+    )
+    steps = BundleGraph(asset_bundle_info).plan(["a", "missing"])
+    assert steps == [["c", "d", "missing"], ["b"], ["a"]]
+
+    async def main():
+        api = _API()
+        downloader = BundleDownloader(api, tmp_path, limit=1)  # type: ignore
+        statistics = await downloader.download_plan(
+            SystemInfo(), asset_bundle_info, steps
+        )
+        assert api.started == ["c", "d", "b", "a"]
+        assert statistics.bundles == 4
+        assert statistics.missing == ["missing"]
+
+    run(main())
+
+
+class _SegmentedAPI(_API):
+    def __init__(self, segments: int) -> None:
+        super().__init__()
+        self.segments = segments
+        self.open = 0
+        self.most_open = 0
+
+    async def download_asset_bundle_to_path(
+        self, system_info, name, path, *_, connection, **__
+    ):
+        self.started.append(name)
+
+        async def segment():
+            async with connection():
+                self.open += 1
+                self.most_open = max(self.most_open, self.open)
+                await asyncio.sleep(0.01)
+                self.open -= 1
+
+        await asyncio.gather(*(segment() for _ in range(self.segments)))
+        return 1
+
+
+def test_limits_count_segment_connections(tmp_path: Path):
+    asset_bundle_info = AssetBundleInfo(
+        bundles={f"bundle/{index}": Bundle() for index in range(6)}
+    )
+
+    async def main(limit: int, limit_per_host: int) -> int:
+        api = _SegmentedAPI(segments=4)
+        downloader = BundleDownloader(
+            api, tmp_path, limit=limit, limit_per_host=limit_per_host  # type: ignore
+        )
+        statistics = await downloader.download(
+            SystemInfo(), asset_bundle_info, asset_bundle_info.bundles or {}
+        )
+        assert statistics.bundles == 6
+        return api.most_open
+
+    assert run(main(limit=3, limit_per_host=8)) == 3
+    assert run(main(limit=8, limit_per_host=2)) == 2
+
+
+def test_bundles_start_in_priority_order(tmp_path: Path):
+    asset_bundle_info = AssetBundleInfo(
+        bundles={
+            "music/long/a": Bundle(file_size=1),
+            "event/b": Bundle(file_size=300),
+            "event/c": Bundle(file_size=200),
+            "music/jacket/d": Bundle(file_size=500),
+        }
+    )
+
+    async def main():
+        api = _API()
+        downloader = BundleDownloader(api, tmp_path, limit=1)  # type: ignore
+        await downloader.download(
+            SystemInfo(), asset_bundle_info, asset_bundle_info.bundles or {}
+        )
+        # by prefix priority first, then the smallest bundle first
+        assert api.started == [
+            "music/jacket/d",
+            "event/c",
+            "event/b",
+            "music/long/a",
+        ]
+
+    run(main())
@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+from async_pjsekai.http_cache import CacheEntry, HttpCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_newer_url_replaces_entry(tmp_path):
+    async def main():
+        cache = HttpCache(tmp_path)
+        await cache.put(
+            "asset_bundle_info", "https://a/1", CacheEntry("1", None, b"one")
+        )
+        await cache.put(
+            "asset_bundle_info", "https://a/2", CacheEntry("2", None, b"two")
+        )
+        await cache.put("game_version", "https://g/1", CacheEntry("g", None, b"game"))
+
+        assert await cache.get("asset_bundle_info", "https://a/1") is None
+        assert (await cache.get("asset_bundle_info", "https://a/2")).body == b"two"
+        assert len(cache._entries) == 2
+
+        reloaded = HttpCache(tmp_path)
+        assert await reloaded.get("asset_bundle_info", "https://a/1") is None
+        entry = await reloaded.get("asset_bundle_info", "https://a/2")
+        assert (entry.etag, entry.body) == ("2", b"two")
+        assert (await reloaded.get("game_version", "https://g/1")).body == b"game"
+
+    run(main())
+    # one body and one set of validators per endpoint
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "asset_bundle_info.body",
+        "asset_bundle_info.json",
+        "game_version.body",
+        "game_version.json",
+    ]
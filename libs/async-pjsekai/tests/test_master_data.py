@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import dataclasses
+
+import msgpack
+import pytest
+
+from async_pjsekai import persistence
+from async_pjsekai.client import MasterDataMutex
+from async_pjsekai.models.lazy_master_data import LazyMasterData
+from async_pjsekai.models.master_data import MasterData, Music
+from async_pjsekai.persistence import PersistenceScheduler
+from async_pjsekai.snapshot import snapshot_path
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def pack(**tables):
+    return msgpack.dumps(tables)
+
+
+MUSICS = [{"id": 1, "title": "Tell Your World"}, {"id": 2, "title": "Melt"}]
+CARDS = [{"id": 1, "characterId": 21}]
+EVENTS = [{"id": 1, "name": "first event"}]
+
+
+def test_only_changed_tables_are_structured():
+    async def main():
+        master_data = MasterDataMutex(None)
+        async with master_data.loads(pack(musics=MUSICS, cards=CARDS)) as first:
+            pass
+        first_changed = set(master_data.changed_tables)
+        async with master_data.loads(
+            pack(musics=MUSICS, cards=CARDS + [{"id": 2}], events=EVENTS)
+        ) as second:
+            pass
+        return first, first_changed, second, set(master_data.changed_tables)
+
+    first, first_changed, second, changed = run(main())
+    assert {"musics", "cards"} <= first_changed
+    assert changed == {"cards", "events"}
+    # an unchanged table is carried over rather than structured again
+    assert second.musics is first.musics
+    assert [card.id for card in second.cards] == [1, 2]
+    assert second.events[0].name == "first event"
+
+
+def test_removed_table_is_cleared():
+    async def main():
+        master_data = MasterDataMutex(None)
+        async with master_data.loads(pack(musics=MUSICS, cards=CARDS)):
+            pass
+        async with master_data.loads(pack(musics=MUSICS)) as value:
+            return value, set(master_data.changed_tables)
+
+    value, changed = run(main())
+    assert changed == {"cards"}
+    assert value.cards is None
+    assert len(value.musics) == 2
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "master_data.msgpack"
+
+    async def main():
+        master_data = MasterDataMutex(path)
+        async with master_data.loads(pack(musics=MUSICS, cards=CARDS)) as written:
+            pass
+        loaded = MasterDataMutex(path)
+        await loaded.load()
+        async with loaded as (value, sync):
+            return written, value, sync
+
+    written, value, sync = run(main())
+    assert sync
+    assert value.musics == written.musics
+    assert value.cards == written.cards
+
+
+def test_lazy_round_trip(tmp_path):
+    path = tmp_path / "master_data.msgpack"
+
+    async def main():
+        master_data = MasterDataMutex(path, lazy=True)
+        async with master_data.loads(pack(musics=MUSICS, cards=CARDS)):
+            pass
+        assert snapshot_path(path).exists()
+
+        loaded = MasterDataMutex(path, lazy=True)
+        await loaded.load()
+        async with loaded as (value, sync):
+            assert isinstance(value, LazyMasterData)
+            assert not value.is_loaded("musics")
+            assert not value.is_loaded("cards")
+            titles = [music.title for music in value.musics]
+            assert value.is_loaded("musics")
+            assert not value.is_loaded("cards")
+
+        # an unchanged table stays raw across an update
+        async with loaded.loads(pack(musics=MUSICS, cards=CARDS, events=EVENTS)):
+            pass
+        async with loaded as (value, sync):
+            assert loaded.changed_tables == {"events"}
+            assert not value.is_loaded("cards")
+            return titles, value.cards, value.events
+
+    titles, cards, events = run(main())
+    assert titles == ["Tell Your World", "Melt"]
+    assert cards[0].character_id == 21
+    assert events[0].id == 1
+
+
+def test_unwritten_value_is_not_persisted(tmp_path):
+    path = tmp_path / "master_data.msgpack"
+
+    async def main():
+        scheduler = PersistenceScheduler(debounce_delay=60, fsync=False)
+        master_data = MasterDataMutex(path, persistence=scheduler)
+        await master_data.set_value(
+            dataclasses.replace(MasterData.create(), musics=[Music(id=1), Music(id=2)])
+        )
+        await master_data.set_value(MasterData.create(), write=False)
+        await scheduler.close()
+
+        loaded = MasterDataMutex(path)
+        await loaded.load()
+        async with loaded as (value, sync):
+            return value
+
+    assert len(run(main()).musics) == 2
+
+
+def test_failed_commit_is_retried(tmp_path, monkeypatch):
+    path = tmp_path / "master_data.msgpack"
+    commit = persistence._commit
+
+    def fail(writes, fsync):
+        raise OSError("disk full")
+
+    async def main():
+        scheduler = PersistenceScheduler(debounce_delay=60, fsync=False)
+        master_data = MasterDataMutex(path, persistence=scheduler)
+        async with master_data.loads(pack(musics=MUSICS)):
+            pass
+        monkeypatch.setattr(persistence, "_commit", fail)
+        with pytest.raises(OSError):
+            await scheduler.flush()
+        monkeypatch.setattr(persistence, "_commit", commit)
+        assert not path.exists()
+        await master_data.set_value(MasterData.create(), write=False)
+        await scheduler.close()
+
+        loaded = MasterDataMutex(path)
+        await loaded.load()
+        async with loaded as (value, sync):
+            return value
+
+    assert len(run(main()).musics) == 2
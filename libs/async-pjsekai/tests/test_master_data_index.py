@@ -0,0 +1,41 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+import msgpack
+
+from async_pjsekai.client import MasterDataMutex
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+MUSICS = [{"id": 1, "title": "Tell Your World"}, {"id": 2, "title": "Melt"}]
+
+
+def test_index_is_kept_across_updates():
+    async def main():
+        master_data = MasterDataMutex(None, lazy=True)
+        async with master_data.loads(
+            msgpack.dumps({"musics": MUSICS, "cards": [{"id": 1}]})
+        ):
+            musics = master_data.index.primary("musics")
+            cards = master_data.index.primary("cards")
+
+        # a poll that brings the same data again
+        async with master_data.loads(
+            msgpack.dumps({"musics": MUSICS, "cards": [{"id": 1}]})
+        ):
+            assert master_data.index.primary("musics") is musics
+            assert master_data.index.primary("cards") is cards
+
+        async with master_data.loads(
+            msgpack.dumps({"musics": MUSICS, "cards": [{"id": 1}, {"id": 2}]})
+        ):
+            assert master_data.index.primary("musics") is musics
+            assert set(master_data.index.primary("cards")) == {1, 2}
+
+    run(main())
@@ -0,0 +1,123 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+
+from aiohttp import ClientSession, web
+import msgpack
+import pytest
+
+from async_pjsekai.api import API
+from async_pjsekai.client import MasterDataMutex
+from async_pjsekai.enums.platform import Platform
+from async_pjsekai.models.system_info import SystemInfo
+from async_pjsekai.utilities import encrypt, unmsgpack
+
+KEY = os.urandom(16)
+IV = os.urandom(16)
+TABLES = {
+    "musics": [{"id": i, "title": f"music {i}"} for i in range(300)],
+    "cards": [{"id": i, "releaseAt": 1600000000000 + i} for i in range(300)],
+    "musicVocals": [],
+    "notATable": {"nested": [1, 2, 3]},
+}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def serve(body: bytes):
+    async def handler(request: web.Request):
+        response = web.StreamResponse()
+        response.content_length = len(body)
+        await response.prepare(request)
+        # small writes, so tables end up split across chunks
+        for i in range(0, len(body), 1000):
+            await response.write(body[i : i + 1000])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/api/suite/master", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]  # type: ignore
+
+
+async def fetch_both(enable_api_encryption: bool):
+    data = msgpack.dumps(TABLES)
+    runner, port = await serve(
+        encrypt(data, KEY, IV) if enable_api_encryption else data
+    )
+    api = API(
+        Platform.ANDROID,
+        KEY,
+        IV,
+        None,
+        f"127.0.0.1:{port}",
+        "",
+        "",
+        "",
+        "",
+        enable_api_encryption,
+        False,
+        False,
+        False,
+        False,
+    )
+    api.DEFAULT_CHUNK_SIZE = 777
+    try:
+        async with ClientSession() as session:
+
+            class Plain:
+                def request(self, method, url, **kwargs):
+                    return session.request(
+                        method, url.replace("https://", "http://"), **kwargs
+                    )
+
+            api.session_for = lambda domain: Plain()  # type: ignore
+            async with api.get_master_data_stream(SystemInfo()) as items:
+                streamed = [(key, bytes(table)) async for key, table in items]
+            buffered = await api.get_master_data(SystemInfo())
+    finally:
+        await runner.cleanup()
+    return streamed, buffered
+
+
+@pytest.mark.parametrize("enable_api_encryption", [False, True])
+def test_streamed_tables_match_the_buffered_ones(enable_api_encryption):
+    streamed, buffered = run(fetch_both(enable_api_encryption))
+    assert [key for key, _ in streamed] == list(TABLES)
+    assert {key: unmsgpack(table) for key, table in streamed} == buffered == TABLES
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_streamed_master_data_matches_the_buffered_one(tmp_path, lazy):
+    streamed, _ = run(fetch_both(False))
+
+    async def items():
+        for item in streamed:
+            yield item
+
+    async def main():
+        from_stream = MasterDataMutex(tmp_path / "streamed.msgpack", lazy)
+        async with from_stream.loads_stream(items()) as value:
+            stream_value = value
+        from_bytes = MasterDataMutex(tmp_path / "buffered.msgpack", lazy)
+        async with from_bytes.loads(msgpack.dumps(TABLES)) as value:
+            bytes_value = value
+        for name in ("musics", "cards", "music_vocals", "skills"):
+            assert getattr(stream_value, name) == getattr(bytes_value, name)
+        assert len(stream_value.musics) == 300
+        assert from_stream.changed_tables == from_bytes.changed_tables
+        # both write the same file
+        assert unmsgpack((tmp_path / "streamed.msgpack").read_bytes()) == unmsgpack(
+            (tmp_path / "buffered.msgpack").read_bytes()
+        )
+
+    run(main())
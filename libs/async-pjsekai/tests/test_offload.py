@@ -0,0 +1,57 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import threading
+
+from async_pjsekai.offload import Offloader, OffloadStrategy
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def thread_name() -> str:
+    return threading.current_thread().name
+
+
+def test_small_payloads_run_inline():
+    async def main():
+        offloader = Offloader(OffloadStrategy.THREAD, threshold=100)
+        try:
+            assert await offloader.run("unpack", 99, thread_name) == "MainThread"
+            assert offloader._executor is None
+            assert (await offloader.run("unpack", 100, thread_name)).startswith(
+                "async_pjsekai"
+            )
+            statistics = offloader.statistics["unpack"]
+            assert (statistics.calls, statistics.offloaded) == (2, 1)
+            assert statistics.bytes == 199
+        finally:
+            offloader.shutdown()
+
+    run(main())
+
+
+def test_inline_strategy_never_offloads():
+    async def main():
+        offloader = Offloader(OffloadStrategy.INLINE, threshold=0)
+        assert await offloader.run("decrypt", 1 << 30, thread_name) == "MainThread"
+        assert offloader.executor is None
+        assert offloader.statistics["decrypt"].offloaded == 0
+
+    run(main())
+
+
+def test_process_strategy_runs_in_another_process():
+    async def main():
+        offloader = Offloader(OffloadStrategy.PROCESS, threshold=10, max_workers=1)
+        try:
+            assert await offloader.run("structure", 9, os.getpid) == os.getpid()
+            assert await offloader.run("structure", 10, os.getpid) != os.getpid()
+        finally:
+            offloader.shutdown()
+
+    run(main())
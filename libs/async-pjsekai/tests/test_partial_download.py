@@ -0,0 +1,142 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+
+from aiohttp import ClientPayloadError, ClientSession, web
+import pytest
+
+from async_pjsekai.api import API
+from async_pjsekai.enums.platform import Platform
+from async_pjsekai.exceptions import BundleSizeMismatch
+from async_pjsekai.models.system_info import SystemInfo
+from async_pjsekai.partial_download import PartialDownload, Segment
+from async_pjsekai.utilities import deobfuscated, obfuscated
+
+PLAIN = os.urandom(64 * 1024)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def chunks_of(data: bytes, size: int = 4096):
+    for i in range(0, len(data), size):
+        yield data[i : i + size]
+
+
+async def obfuscate(data: bytes) -> bytes:
+    return b"".join([bytes(chunk) async for chunk in obfuscated(chunks_of(data))])
+
+
+def test_short_range_is_not_complete(tmp_path):
+    async def main():
+        served = await obfuscate(PLAIN)
+        download = await PartialDownload.open(tmp_path / "bundle", len(served))
+        try:
+            segment = Segment(0, 1000)
+            # the connection drops 100 bytes before the end of the range
+            with pytest.raises(ClientPayloadError):
+                await download.write(segment, deobfuscated(chunks_of(served[:900])), 0)
+            assert not segment.complete
+            assert segment.position == 900
+
+            await download.write(
+                segment, deobfuscated(chunks_of(served[900:]), 900), 900
+            )
+            assert segment.complete
+            assert segment.position == 1000
+        finally:
+            download.close()
+
+    run(main())
+
+
+def test_wrong_size_is_discarded(tmp_path):
+    path = tmp_path / "bundle"
+
+    async def main():
+        served = await obfuscate(PLAIN)
+        download = await PartialDownload.open(path, len(served) + 1)
+        segment = download.segments[0]
+        await download.write(segment, deobfuscated(chunks_of(served)), 0)
+        with pytest.raises(BundleSizeMismatch):
+            await download.finish()
+
+    run(main())
+    assert not path.exists()
+    assert not (tmp_path / "bundle.part").exists()
+    assert not (tmp_path / "bundle.part.json").exists()
+
+
+def test_cut_segment_is_resumed(tmp_path, monkeypatch):
+    monkeypatch.setattr(PartialDownload, "MIN_SEGMENT_SIZE", 16 * 1024)
+    ranges = []
+
+    async def main():
+        served = await obfuscate(PLAIN)
+
+        async def handler(request: web.Request):
+            start, end = request.http_range.start or 0, request.http_range.stop
+            end = len(served) if end is None else end
+            ranges.append((start, end))
+            body = served[start:end]
+            if len(ranges) == 2:
+                # a well formed but short answer for the second segment
+                body = body[: len(body) // 2]
+            return web.Response(
+                status=206,
+                body=body,
+                headers={"Content-Range": f"bytes {start}-{end - 1}/{len(served)}"},
+            )
+
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore
+        api = API(
+            Platform.ANDROID,
+            None,
+            None,
+            None,
+            "",
+            f"127.0.0.1:{port}",
+            "",
+            "",
+            "",
+            False,
+            False,
+            False,
+            False,
+            False,
+        )
+        try:
+            async with ClientSession() as session:
+
+                class Plain:
+                    def request(self, method, url, **kwargs):
+                        return session.request(
+                            method, url.replace("https://", "http://"), **kwargs
+                        )
+
+                api.session_for = lambda domain: Plain()  # type: ignore
+                size = await api.download_asset_bundle_to_path(
+                    SystemInfo(asset_version="1", asset_hash="h"),
+                    "bundle",
+                    tmp_path / "bundle",
+                    len(served),
+                    segments=4,
+                )
+        finally:
+            await runner.cleanup()
+        assert size == len(PLAIN)
+
+    run(main())
+    assert (tmp_path / "bundle").read_bytes() == PLAIN
+    # four segments, and the one that came back short resumed where it ended
+    assert len(ranges) == 5
@@ -0,0 +1,276 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+import aiofiles
+import msgpack
+import pytest
+
+from async_pjsekai import persistence
+from async_pjsekai.client import UserDataMutex
+from async_pjsekai.persistence import PersistenceScheduler
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def reload(path):
+    user_data = UserDataMutex(path)
+    await user_data.load()
+    async with user_data as data:
+        return dict(data)
+
+
+@pytest.fixture
+def on_append(monkeypatch):
+    """
+    Calls the hook set on the returned list, if any, in the middle of every
+    append to a file, after part of it has been written.
+    """
+    hooks = []
+    open_file = aiofiles.open
+
+    class Appending:
+        def __init__(self, f):
+            self._f = f
+
+        async def write(self, data):
+            await self._f.write(data[:1])
+            for hook in hooks:
+                await hook()
+            await self._f.write(data[1:])
+
+    class Open:
+        def __init__(self, path, mode="r", *args, **kwargs):
+            self._open = open_file(path, mode, *args, **kwargs)
+            self._append = "a" in mode
+
+        async def __aenter__(self):
+            f = await self._open.__aenter__()
+            return Appending(f) if self._append else f
+
+        async def __aexit__(self, *exc):
+            return await self._open.__aexit__(*exc)
+
+    monkeypatch.setattr(aiofiles, "open", Open)
+    return hooks
+
+
+def test_update_during_append_is_kept(tmp_path, on_append):
+    path = tmp_path / "user_data.msgpack"
+
+    async def main():
+        scheduler = PersistenceScheduler(debounce_delay=60)
+        user_data = UserDataMutex(path, scheduler)
+        await user_data.load()
+        await scheduler.flush()
+
+        await user_data.update_value({"a": 1})
+
+        async def update():
+            on_append.clear()
+            await user_data.update_value({"b": 2})
+
+        on_append.append(update)
+        await scheduler.close()
+        return await reload(path)
+
+    assert run(main()) == {"a": 1, "b": 2}
+
+
+def test_failed_append_is_retried(tmp_path, on_append):
+    path = tmp_path / "user_data.msgpack"
+
+    async def main():
+        scheduler = PersistenceScheduler(debounce_delay=60)
+        user_data = UserDataMutex(path, scheduler)
+        await user_data.load()
+        await scheduler.flush()
+
+        await user_data.update_value({"a": 1})
+
+        async def fail():
+            on_append.clear()
+            raise OSError("disk full")
+
+        on_append.append(fail)
+        with pytest.raises(OSError):
+            await scheduler.flush()
+        assert scheduler.dirty
+        await user_data.update_value({"b": 2})
+        await scheduler.close()
+        return await reload(path)
+
+    assert run(main()) == {"a": 1, "b": 2}
+
+
+def test_failed_compaction_is_retried(tmp_path, monkeypatch):
+    path = tmp_path / "user_data.msgpack"
+    commit = persistence._commit
+
+    def fail(writes, fsync):
+        raise OSError("disk full")
+
+    async def main():
+        scheduler = PersistenceScheduler(debounce_delay=60, fsync=False)
+        user_data = UserDataMutex(path, scheduler)
+        await user_data.load()
+        await scheduler.flush()
+        await user_data.update_value({"a": 1})
+        await scheduler.flush()
+
+        await user_data.set_value({"b": 2})
+        monkeypatch.setattr(persistence, "_commit", fail)
+        with pytest.raises(OSError):
+            await scheduler.flush()
+        monkeypatch.setattr(persistence, "_commit", commit)
+
+        await user_data.update_value({"c": 3})
+        await scheduler.close()
+        first = await reload(path)
+
+        await user_data.update_value({"d": 4})
+        await scheduler.close()
+        return first, await reload(path)
+
+    first, second = run(main())
+    assert first == {"b": 2, "c": 3}
+    assert second == {"b": 2, "c": 3, "d": 4}
+
+
+def test_log_is_replayed(tmp_path):
+    path = tmp_path / "user_data.msgpack"
+
+    async def main():
+        user_data = UserDataMutex(path)
+        await user_data.load()
+        for i in range(10):
+            await user_data.update_value({f"key{i}": i})
+        return user_data.log_path.stat().st_size, await reload(path)
+
+    log_size, data = run(main())
+    assert log_size > 0
+    assert data == {f"key{i}": i for i in range(10)}
+
+
+def test_truncated_log_is_compacted(tmp_path):
+    path = tmp_path / "user_data.msgpack"
+
+    async def main():
+        user_data = UserDataMutex(path)
+        await user_data.load()
+        await user_data.update_value({"a": 1})
+        await user_data.update_value({"b": "x" * 100})
+        log_path = user_data.log_path
+        log_path.write_bytes(log_path.read_bytes()[:-10])
+
+        user_data = UserDataMutex(path)
+        await user_data.load()
+        await user_data.update_value({"c": 3})
+        return await reload(path)
+
+    assert run(main()) == {"a": 1, "c": 3}
+
+
+def test_failed_writer_aborts_the_flush(tmp_path):
+    path = tmp_path / "state"
+    aborted = []
+    failing = [True]
+
+    async def writer():
+        return [
+            await persistence.write_file(
+                path, b"new", on_abort=lambda: aborted.append(path)
+            )
+        ]
+
+    async def broken():
+        if failing[0]:
+            raise OSError("disk full")
+        return []
+
+    async def main():
+        path.write_bytes(b"old")
+        scheduler = PersistenceScheduler(debounce_delay=60, fsync=False)
+        scheduler.mark_dirty(writer)
+        scheduler.mark_dirty(broken)
+        with pytest.raises(OSError):
+            await scheduler.flush()
+        # nothing of the flush was moved into place, and both writers run
+        # again on the next one
+        assert aborted == [path]
+        assert path.read_bytes() == b"old"
+        assert scheduler.dirty
+
+        failing[0] = False
+        await scheduler.close()
+        assert path.read_bytes() == b"new"
+        assert not scheduler.dirty
+
+    run(main())
+
+
+class Crash(BaseException):
+    pass
+
+
+def test_crash_mid_append_is_recovered(tmp_path, on_append):
+    path = tmp_path / "user_data.msgpack"
+
+    async def main():
+        user_data = UserDataMutex(path)
+        await user_data.load()
+        await user_data.update_value({"a": 1})
+
+        async def crash():
+            on_append.clear()
+            raise Crash
+
+        # the process dies with the first byte of the record on disk
+        on_append.append(crash)
+        with pytest.raises(Crash):
+            await user_data.update_value({"b": 2})
+        assert user_data.log_path is not None
+        log_size = user_data.log_path.stat().st_size
+
+        # what the next process finds
+        user_data = UserDataMutex(path)
+        await user_data.load()
+        async with user_data as data:
+            recovered = dict(data)
+        # the cut record was dropped instead of being appended after
+        assert user_data.log_path.stat().st_size < log_size
+        await user_data.update_value({"c": 3})
+        return recovered, await reload(path)
+
+    recovered, data = run(main())
+    assert recovered == {"a": 1}
+    assert data == {"a": 1, "c": 3}
+
+
+def test_log_of_another_file_is_ignored(tmp_path):
+    path = tmp_path / "user_data.msgpack"
+
+    async def main():
+        user_data = UserDataMutex(path)
+        await user_data.load()
+        await user_data.update_value({"a": 1})
+        assert user_data.log_path is not None
+        assert user_data.log_path.stat().st_size > 0
+
+        # a compaction that replaced the full file but died before the log
+        path.write_bytes(msgpack.dumps({"x": 1}))
+        user_data = UserDataMutex(path)
+        await user_data.load()
+        async with user_data as data:
+            loaded = dict(data)
+        # the stale log is replaced, not appended to
+        await user_data.update_value({"y": 2})
+        return loaded, await reload(path)
+
+    loaded, data = run(main())
+    assert loaded == {"x": 1}
+    assert data == {"x": 1, "y": 2}
@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+import pytest
+
+from async_pjsekai import rate_limit
+from async_pjsekai.rate_limit import RateLimit, RateLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock that only moves when the limiter sleeps."""
+    now = [0.0]
+    sleeps: list[float] = []
+    sleep = asyncio.sleep
+
+    async def fake_sleep(delay: float):
+        sleeps.append(delay)
+        now[0] += delay
+        await sleep(0)
+
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", fake_sleep)
+    return now, sleeps
+
+
+@pytest.mark.parametrize(
+    "rate, burst", [(0, 1), (-1.0, 1), (float("nan"), 1), (1.0, 0)]
+)
+def test_invalid_limits_are_refused(rate, burst):
+    with pytest.raises(ValueError):
+        RateLimit(rate=rate, burst=burst)
+
+
+def test_burst_then_paced(clock):
+    now, sleeps = clock
+
+    async def main():
+        limiter = RateLimiter("api", RateLimit(rate=4.0, burst=3))
+        sent = []
+
+        async def send():
+            await limiter.acquire()
+            sent.append(now[0])
+
+        await asyncio.gather(*(send() for _ in range(6)))
+        # the burst goes out at once, then one request every 1 / rate seconds
+        assert sent == [0.0, 0.0, 0.0, 0.25, 0.5, 0.75]
+        statistics = limiter.statistics()
+        assert statistics.acquired == 6
+        assert statistics.delayed == 3
+        assert sleeps == [0.25, 0.25, 0.25]
+        assert statistics.waiting == 0
+
+    run(main())
+
+
+def test_idle_time_refills_up_to_the_burst(clock):
+    now, sleeps = clock
+
+    async def main():
+        limiter = RateLimiter("api", RateLimit(rate=1.0, burst=2))
+        await limiter.acquire()
+        await limiter.acquire()
+        assert limiter.statistics().tokens == 0
+        now[0] += 60
+        # a long idle period does not bank more than the burst
+        assert limiter.statistics().tokens == 2
+        await limiter.acquire()
+        await limiter.acquire()
+        await limiter.acquire()
+        assert sleeps == [1.0]
+
+    run(main())
@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+from aiohttp import ClientConnectionError, ClientResponseError, RequestInfo
+from multidict import CIMultiDict, CIMultiDictProxy
+import pytest
+from yarl import URL
+
+from async_pjsekai import resilience
+from async_pjsekai.api import API
+from async_pjsekai.enums.domain import Domain
+from async_pjsekai.enums.platform import Platform
+from async_pjsekai.exceptions import CircuitOpen
+from async_pjsekai.models.system_info import SystemInfo
+from async_pjsekai.resilience import CircuitBreakerPolicy, RetryPolicy
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class _Response:
+    def __init__(self, status: int, body: bytes) -> None:
+        self.status = status
+        self.headers: dict = {}
+        self._body = body
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            url = URL("https://api/path")
+            request_info = RequestInfo(url, "GET", CIMultiDictProxy(CIMultiDict()), url)
+            raise ClientResponseError(request_info, (), status=self.status)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    def release(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class _Transport:
+    """Answers requests in turn with the given statuses or exceptions."""
+
+    def __init__(self, *answers) -> None:
+        self.answers = list(answers)
+        self.methods: list[str] = []
+
+    def request(self, method, url, **kwargs):
+        self.methods.append(method)
+        answer = self.answers.pop(0)
+        if isinstance(answer, BaseException):
+            raise answer
+        return _Response(answer, b"body")
+
+
+def make_api(transport: _Transport, **kwargs) -> API:
+    api = API(
+        Platform.ANDROID,
+        None,
+        None,
+        None,
+        "api",
+        "",
+        "",
+        "",
+        "",
+        False,
+        False,
+        False,
+        False,
+        False,
+        **kwargs,
+    )
+    api.session_for = lambda domain: transport  # type: ignore
+    return api
+
+
+def request(api: API, method: str, **kwargs):
+    return api.request_packed(SystemInfo(), method, "path", **kwargs)
+
+
+def test_transient_get_is_retried():
+    transport = _Transport(503, ClientConnectionError(), 200)
+    api = make_api(transport, retry_policy=RetryPolicy(base_delay=0))
+    assert run(request(api, "GET")) == b"body"
+    assert transport.methods == ["GET"] * 3
+
+
+def test_attempts_are_bounded():
+    transport = _Transport(503, 503, 503, 200)
+    api = make_api(transport, retry_policy=RetryPolicy(attempts=3, base_delay=0))
+    with pytest.raises(ClientResponseError):
+        run(request(api, "GET"))
+    assert len(transport.methods) == 3
+
+
+def test_client_error_is_not_retried():
+    transport = _Transport(404, 200)
+    api = make_api(transport, retry_policy=RetryPolicy(base_delay=0))
+    with pytest.raises(ClientResponseError):
+        run(request(api, "GET"))
+    assert len(transport.methods) == 1
+    # the server answered, so the domain counts as up
+    assert not api.circuit_breaker(Domain.API).is_open
+
+
+def test_put_is_only_retried_when_idempotent():
+    transport = _Transport(503, 503, 200)
+    api = make_api(transport, retry_policy=RetryPolicy(base_delay=0))
+    # a gacha pull that reached the server must not be sent again
+    with pytest.raises(ClientResponseError):
+        run(request(api, "PUT", data={}))
+    assert transport.methods == ["PUT"]
+
+    assert run(request(api, "PUT", data={}, idempotent=True)) == b"body"
+    assert transport.methods == ["PUT"] * 3
+
+
+def test_backoff_grows_and_is_capped():
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0, jitter=0)
+    assert [policy.delay(attempt) for attempt in range(5)] == [
+        0.5,
+        1.0,
+        2.0,
+        3.0,
+        3.0,
+    ]
+    jittered = RetryPolicy(base_delay=1.0, jitter=0.5)
+    assert all(0.5 <= jittered.delay(0) <= 1.0 for _ in range(100))
+
+
+def test_circuit_opens_and_probes(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    transport = _Transport(503, 503, 503, 200, 200)
+    api = make_api(
+        transport,
+        retry_policy=RetryPolicy(attempts=1),
+        circuit_breaker_policy=CircuitBreakerPolicy(
+            failure_threshold=2, reset_timeout=30
+        ),
+    )
+    breaker = api.circuit_breaker(Domain.API)
+
+    for _ in range(2):
+        with pytest.raises(ClientResponseError):
+            run(request(api, "GET"))
+    assert breaker.is_open
+    # open: failed fast without reaching the server
+    with pytest.raises(CircuitOpen):
+        run(request(api, "GET"))
+    assert len(transport.methods) == 2
+
+    # half open: a failed probe opens the circuit again straight away
+    now[0] = 31
+    with pytest.raises(ClientResponseError):
+        run(request(api, "GET"))
+    assert breaker.is_open
+    with pytest.raises(CircuitOpen):
+        run(request(api, "GET"))
+
+    # half open: only one probe at a time, and its success closes the circuit
+    now[0] = 62
+    breaker.check()
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+    breaker.record_success()
+    assert run(request(api, "GET")) == b"body"
+    assert not breaker.is_open
@@ -0,0 +1,176 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+from aiohttp import ClientSession, web
+import msgpack
+
+from async_pjsekai.api import API
+from async_pjsekai.enums.platform import Platform
+from async_pjsekai.models.system_info import SystemInfo
+from async_pjsekai.resilience import RetryPolicy
+from async_pjsekai.shared_stream import SharedStream, StreamChanged
+
+BODY = msgpack.dumps({"musics": [{"id": i, "title": "t" * 50} for i in range(2000)]})
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class _Plain:
+    def __init__(self, session: ClientSession) -> None:
+        self.session = session
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(
+            method, url.replace("https://", "http://"), **kwargs
+        )
+
+
+async def serve(api: API, truncate: int = 0):
+    """Serves `BODY` as master data, cutting the first `truncate` responses."""
+    requests = []
+
+    async def handler(request: web.Request):
+        requests.append(request)
+        response = web.StreamResponse()
+        response.content_length = len(BODY)
+        await response.prepare(request)
+        half = len(BODY) // 2
+        await response.write(BODY[:half])
+        # let the readers see the first half before going on
+        await asyncio.sleep(0.05)
+        if len(requests) <= truncate:
+            assert request.transport is not None
+            request.transport.close()
+            return response
+        await response.write(BODY[half:])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/api/suite/master", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore
+    api.api_domain = f"127.0.0.1:{port}"
+    return runner, requests
+
+
+def make_api() -> API:
+    return API(
+        list(Platform)[0],
+        None,
+        None,
+        None,
+        "",
+        "",
+        "",
+        "",
+        "",
+        False,
+        False,
+        False,
+        False,
+        False,
+        retry_policy=RetryPolicy(base_delay=0.01),
+    )
+
+
+async def read_stream(api: API) -> bytes:
+    async with api.request_packed_stream(SystemInfo(), "suite/master") as chunks:
+        return b"".join([chunk async for chunk in chunks])
+
+
+def test_concurrent_readers_share_one_request():
+    async def main():
+        api = make_api()
+        runner, requests = await serve(api)
+        try:
+            async with ClientSession() as session:
+                api.session_for = lambda domain: _Plain(session)
+                results = await asyncio.gather(
+                    read_stream(api),
+                    read_stream(api),
+                    api.request_packed(SystemInfo(), "GET", "suite/master"),
+                )
+                assert results == [BODY, BODY, BODY]
+                assert len(requests) == 1
+                assert not api._in_flight_streams
+        finally:
+            await runner.cleanup()
+
+    run(main())
+
+
+def test_cut_stream_is_retried():
+    async def main():
+        api = make_api()
+        runner, requests = await serve(api, truncate=1)
+        try:
+            async with ClientSession() as session:
+                api.session_for = lambda domain: _Plain(session)
+                assert await read_stream(api) == BODY
+                assert len(requests) == 2
+        finally:
+            await runner.cleanup()
+
+    run(main())
+
+
+def test_changed_retry_is_an_error():
+    async def main():
+        stream = SharedStream()
+        stream.write(0, b"abc")
+        # a retry repeating what was already received
+        stream.write(0, b"ab")
+        stream.write(2, b"cde")
+        try:
+            stream.write(0, b"x")
+        except StreamChanged:
+            pass
+        else:
+            raise AssertionError("a different body was accepted")
+        stream.finish()
+        assert b"".join([chunk async for chunk in stream.read()]) == b"abcde"
+
+    run(main())
+
+
+def test_requests_with_list_params_are_shared():
+    async def main():
+        api = make_api()
+        runner, requests = await serve(api)
+        try:
+            async with ClientSession() as session:
+                api.session_for = lambda domain: _Plain(session)
+                results = await asyncio.gather(
+                    *(
+                        api.request_packed(
+                            SystemInfo(), "GET", "suite/master", params=params
+                        )
+                        for params in ({"ids": [1, 2]}, {"ids": [1, 2]})
+                    )
+                )
+                assert results == [BODY, BODY]
+                assert len(requests) == 1
+                assert requests[0].query.getall("ids") == ["1", "2"]
+        finally:
+            await runner.cleanup()
+
+    run(main())
+
+
+def test_params_that_cannot_be_encoded_are_not_shared():
+    params = {"id": object()}
+    assert API._flight_key("GET", "url", {}, params) != API._flight_key(
+        "GET", "url", {}, params
+    )
+    assert API._flight_key("GET", "url", {}, {"b": [1], "a": 2}) == API._flight_key(
+        "GET", "url", {}, {"a": 2, "b": [1]}
+    )
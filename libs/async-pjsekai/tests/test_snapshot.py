@@ -0,0 +1,66 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+import msgpack
+
+from async_pjsekai import client
+from async_pjsekai.client import MasterDataMutex
+from async_pjsekai.models.lazy_master_data import LazyMasterData, is_empty
+from async_pjsekai.snapshot import snapshot_path
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_startup_from_snapshot_loads_no_table(tmp_path, monkeypatch):
+    path = tmp_path / "master_data.msgpack"
+
+    def unpack(data):
+        raise AssertionError("the full master data file was read")
+
+    async def main():
+        master_data = MasterDataMutex(path, lazy=True)
+        async with master_data.loads(
+            msgpack.dumps({"musics": [{"id": 1}], "cards": [{"id": 1}]})
+        ):
+            pass
+        # the full file is never parsed again once there is a snapshot
+        monkeypatch.setattr(client, "unmsgpack_map_items", unpack)
+
+        loaded = MasterDataMutex(path, lazy=True)
+        await loaded.load()
+        async with loaded as (value, sync):
+            assert sync
+            assert isinstance(value, LazyMasterData)
+            # what the bot checks before deciding to update
+            assert not is_empty(value)
+            # nothing structured a table before its first use
+            assert not value.is_loaded("musics")
+            assert not value.is_loaded("cards")
+            assert value.musics[0].id == 1
+            assert not value.is_loaded("cards")
+
+    run(main())
+    assert snapshot_path(path).exists()
+
+
+def test_stale_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "master_data.msgpack"
+
+    async def main():
+        master_data = MasterDataMutex(path, lazy=True)
+        async with master_data.loads(msgpack.dumps({"musics": [{"id": 1}]})):
+            pass
+        # written by something that does not know about the snapshot
+        path.write_bytes(msgpack.dumps({"musics": [{"id": 1}, {"id": 2}]}))
+
+        loaded = MasterDataMutex(path, lazy=True)
+        await loaded.load()
+        async with loaded as (value, sync):
+            assert [music.id for music in value.musics] == [1, 2]
+
+    run(main())
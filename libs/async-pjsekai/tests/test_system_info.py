@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: 2023-present TheerapakG <theerapakg@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+from async_pjsekai.client import Client
+from async_pjsekai.enums.enums import AppVersionStatus
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class _API:
+    def __init__(self) -> None:
+        self.requested = asyncio.Event()
+        self.answer = asyncio.Event()
+
+    async def get_system_info(self, system_info):
+        self.requested.set()
+        await self.answer.wait()
+        return {
+            "appVersions": [
+                {
+                    "systemProfile": "production",
+                    "appVersion": "1.0",
+                    "appVersionStatus": "available",
+                }
+            ]
+        }
+
+
+def test_check_version_keeps_concurrent_writes():
+    async def main():
+        client = Client()
+        client._api_manager = api = _API()  # type: ignore
+        async with client.replace_system_info(
+            system_profile="staging", app_version="1.0", multi_play_version="1"
+        ):
+            pass
+
+        check = asyncio.ensure_future(client.check_version())
+        await api.requested.wait()
+        # another writer changes the value while the request is out
+        async with client.replace_system_info(multi_play_version="2"):
+            pass
+        api.answer.set()
+        info = await check
+
+        assert info.system_profile == "production"
+        async with client.system_info as system_info:
+            assert system_info.system_profile == "production"
+            assert system_info.app_version_status is AppVersionStatus.AVAILABLE
+            assert system_info.multi_play_version == "2"
+
+    run(main())
+
+
+def test_check_version_skips_a_value_for_another_app_version():
+    async def main():
+        client = Client()
+        client._api_manager = api = _API()  # type: ignore
+        async with client.replace_system_info(
+            system_profile="staging", app_version="1.0"
+        ):
+            pass
+
+        check = asyncio.ensure_future(client.check_version())
+        await api.requested.wait()
+        # the app was updated in the meantime, so the answer no longer applies
+        async with client.replace_system_info(app_version="2.0"):
+            pass
+        api.answer.set()
+        await check
+
+        async with client.system_info as system_info:
+            assert system_info.system_profile == "staging"
+            assert system_info.app_version == "2.0"
+
+    run(main())
@@ -4,7 +4,6 @@
 
 import asyncio
 from collections import defaultdict
-from dataclasses import astuple
 import json
 import logging
 import os
@@ -28,9 +27,10 @@ from async_pjsekai.enums.enums import (
     ResourceType,
 )
 from async_pjsekai.enums.unknown import Unknown
+from async_pjsekai.exceptions import CircuitOpen
+from async_pjsekai.models.lazy_master_data import is_empty
 from async_pjsekai.models.master_data import (
     Card,
-    MasterData,
     Music,
     MusicDifficulty,
     MusicVocal,
@@ -49,7 +49,6 @@ from ..schema.schema import ChannelIntentEnum
 from ..utils.asset import load_asset, convert_wav
 from ..utils.discord import apply_embed_thumbnail, apply_embed_image
 
-
 if TYPE_CHECKING:
     from .channel import ChannelCog
 
@@ -90,6 +89,8 @@ class PjskClientCog(Cog):
             master_data_file_path=str((pjsk_path / "master-data.msgpack").resolve()),
             user_data_file_path=str((pjsk_path / "user-data.msgpack").resolve()),
             asset_directory=str((pjsk_path / "asset").resolve()),
+            lazy_master_data=True,
+            cache_directory=str((pjsk_path / "http-cache").resolve()),
         )
 
         self.musics_dict: dict[int, Music] = {}
@@ -113,13 +114,12 @@ class PjskClientCog(Cog):
         await self.pjsk_client.start()
         update = False
         async with self.pjsk_client.master_data as (master_data, sync):
-            if not any(astuple(master_data)):
+            if is_empty(master_data):
                 async with self.pjsk_client.replace_system_info(data_version=None):
                     update = True
         if update:
             await self.pjsk_client.update_all()
         await self.prepare_data_dicts()
-        await self.pjsk_client.set_master_data(MasterData.create(), write=False)
         self.update_data.start()
 
     async def cog_unload(self):
@@ -127,41 +127,31 @@ class PjskClientCog(Cog):
         await self.pjsk_client.close()
 
     async def prepare_data_dicts(self):
-        async with self.pjsk_client.master_data as (master_data, sync):
+        async with self.pjsk_client.master_data_index as (index, sync):
             if not sync:
                 return
 
+            master_data = index.master_data
+
             self.musics_dict.clear()
-            if musics := master_data.musics:
-                for music in musics:
-                    if music_id := music.id:
-                        self.musics_dict[music_id] = music
-                self.musics_by_publish_at_list = sorted(
-                    musics,
-                    key=lambda music: music.published_at if music.published_at else -1,
-                )
+            self.musics_dict.update(index.primary("musics"))
+            self.musics_by_publish_at_list = index.sorted("musics", "published_at")
 
             self.vocals_dict.clear()
-            if music_vocals := master_data.music_vocals:
-                for vocal in music_vocals:
-                    if vocal_id := vocal.id:
-                        self.vocals_dict[vocal_id] = vocal
+            self.vocals_dict.update(index.primary("music_vocals"))
 
             self.difficulties_dict.clear()
-            if difficulties := master_data.music_difficulties:
-                for difficulty in difficulties:
-                    if (music_id := difficulty.music_id) and (
-                        music_difficulty := difficulty.music_difficulty
-                    ):
-                        difficulty_types_dict = self.difficulties_dict.get(music_id, {})
-                        difficulty_types_dict[music_difficulty] = difficulty
-                        self.difficulties_dict[music_id] = difficulty_types_dict
+            for music_id, difficulties in index.referencing(
+                "music_difficulties", "music_id"
+            ).items():
+                self.difficulties_dict[music_id] = {
+                    music_difficulty: difficulty
+                    for difficulty in difficulties
+                    if (music_difficulty := difficulty.music_difficulty)
+                }
 
             self.release_conditions_dict.clear()
-            if release_conditions := master_data.release_conditions:
-                for condition in release_conditions:
-                    if condition_id := condition.id:
-                        self.release_conditions_dict[condition_id] = condition
+            self.release_conditions_dict.update(index.primary("release_conditions"))
 
             self.music_resource_boxes_dict.clear()
             if resource_boxes := master_data.resource_boxes:
@@ -181,39 +171,33 @@ class PjskClientCog(Cog):
                                     )
 
             self.music_tags_dict.clear()
-            if tags := master_data.music_tags:
-                for tag in tags:
-                    if (music_id := tag.music_id) and (music_tag := tag.music_tag):
-                        self.music_tags_dict[music_id].add(music_tag)
+            for music_id, tags in index.referencing("music_tags", "music_id").items():
+                self.music_tags_dict[music_id].update(
+                    music_tag for tag in tags if (music_tag := tag.music_tag)
+                )
 
             self.music_vocal_dict.clear()
+            # only the vocals that made it into vocals_dict, which skips the
+            # ones without an id
             for vocal in self.vocals_dict.values():
                 if music_id := vocal.music_id:
                     self.music_vocal_dict[music_id].append(vocal)
 
             self.game_character_dict.clear()
-            if game_characters := master_data.game_characters:
-                for character in game_characters:
-                    if character_id := character.id:
-                        self.game_character_dict[character_id] = GameCharacterData(
-                            ids={"gc": character.id},
-                            first_name=character.first_name,
-                            given_name=character.given_name,
-                            first_name_ruby=character.first_name_ruby,
-                            given_name_ruby=character.given_name_ruby,
-                        )
+            for character_id, character in index.primary("game_characters").items():
+                self.game_character_dict[character_id] = GameCharacterData(
+                    ids={"gc": character.id},
+                    first_name=character.first_name,
+                    given_name=character.given_name,
+                    first_name_ruby=character.first_name_ruby,
+                    given_name_ruby=character.given_name_ruby,
+                )
 
             self.outside_character_dict.clear()
-            if outside_characters := master_data.outside_characters:
-                for character in outside_characters:
-                    if character_id := character.id:
-                        self.outside_character_dict[character_id] = character
+            self.outside_character_dict.update(index.primary("outside_characters"))
 
             self.skills_dict.clear()
-            if skills := master_data.skills:
-                for skill in skills:
-                    if skill_id := skill.id:
-                        self.skills_dict[skill_id] = skill
+            self.skills_dict.update(index.primary("skills"))
 
             self.cards_dict.clear()
             if cards := master_data.cards:
@@ -231,11 +215,7 @@ class PjskClientCog(Cog):
                             attr=card.attr,
                             support_unit=card.support_unit,
                             skill_name=card.card_skill_name,
-                            skill=(
-                                self.skills_dict.get(card.skill_id)
-                                if card.skill_id
-                                else None
-                            ),
+                            skill=index.referenced("cards", "skill_id", card),
                             gacha_phrase=card.gacha_phrase,
                             flavor_text=card.flavor_text,
                             release_at=card.release_at,
@@ -493,7 +473,6 @@ class PjskClientCog(Cog):
             await self.pjsk_client.update_all()
 
             await self.prepare_data_dicts()
-            await self.pjsk_client.set_master_data(MasterData.create(), write=False)
 
             await self.diff_musics(old_musics)
             await self.diff_vocals(old_vocals)
@@ -501,6 +480,9 @@ class PjskClientCog(Cog):
             await self.load_i18n()
 
             self.last_update_data_exc = None
+        except CircuitOpen as e:
+            # the client already retried; rebuilding it will not bring the server back
+            log.warning(f"skipping data update: {e}")
         except Exception as e:
             log.exception("exception while trying to update data")
             if not self.last_update_data_exc:
@@ -536,6 +518,8 @@ class PjskClientCog(Cog):
                         (pjsk_path / "user-data.msgpack").resolve()
                     ),
                     asset_directory=str((pjsk_path / "asset").resolve()),
+                    lazy_master_data=True,
+                    cache_directory=str((pjsk_path / "http-cache").resolve()),
                 )
                 await self.pjsk_client.start()
 
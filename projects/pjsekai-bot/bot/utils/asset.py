@@ -5,6 +5,7 @@
 import asyncio
 import logging
 from pathlib import Path
+from typing import Optional
 
 import aiofiles
 from async_pjsekai.client import Client
@@ -88,16 +89,34 @@ async def extract(directory: Path, path: str, obj: UnityPy.files.ObjectReader):
             await extract_acb_bytes(dst)
 
 
+async def read_hash(path: Path) -> Optional[str]:
+    try:
+        async with aiofiles.open(path, "r") as f:
+            return await f.read()
+    except FileNotFoundError:
+        return None
+
+
+async def write_hash(path: Path, bundle_hash: str):
+    await aiofiles.os.makedirs(path.parent, exist_ok=True)
+    async with aiofiles.open(path, "w") as f:
+        await f.write(bundle_hash)
+
+
 async def load_asset(
     client: Client, asset_bundle_str: str, force: bool = False
 ) -> list[Path]:
     if (directory := client.asset_directory) and (asset := client.asset):
+        bundles = {}
         async with asset.asset_bundle_info as (asset_bundle_info, sync):
             bundle_hash = None
-            if asset_bundle_info and (bundles := asset_bundle_info.bundles):
+            if asset_bundle_info and asset_bundle_info.bundles:
+                bundles = asset_bundle_info.bundles
                 if asset_bundle_str in bundles:
                     bundle_hash = bundles[asset_bundle_str].hash
 
+        # the bundle is known, so everything it depends on can be fetched with it
+        prefetch = bundle_hash is not None
         if bundle_hash is None:
             bundle_hash = ""
 
@@ -124,17 +143,56 @@ async def load_asset(
         paths: list[str] = []
         tasks: list[asyncio.Task] = []
 
-        async with client.download_asset_bundle(asset_bundle_str) as asset_bundle:
-            await aiofiles.os.makedirs(
-                (directory / "bundle" / asset_bundle_str).parent, exist_ok=True
+        bundle_path = directory / "bundle" / f"{asset_bundle_str}.unity3d"
+        dependency_paths: list[Path] = []
+        if prefetch:
+            async with asset.bundle_graph as (bundle_graph, sync):
+                dependencies = [
+                    name
+                    for name in bundle_graph.closure([asset_bundle_str])
+                    if name != asset_bundle_str and name in bundles
+                ]
+            # dependencies are shared between bundles, so the ones already
+            # downloaded at their current hash are kept
+            stale = [asset_bundle_str] + [
+                name
+                for name in dependencies
+                if await read_hash(directory / "bundle_hash" / name)
+                != bundles[name].hash
+                or not await aiofiles.os.path.exists(
+                    directory / "bundle" / f"{name}.unity3d"
+                )
+            ]
+            log.info(
+                f"downloading {len(stale) - 1} of {len(dependencies)} dependencies of bundle {asset_bundle_str}"
             )
-            async with aiofiles.open(
-                directory / "bundle" / f"{asset_bundle_str}.unity3d", "wb"
-            ) as f:
-                async for chunk in asset_bundle.chunks:
-                    await f.write(chunk)
+            statistics = await client.download_asset_bundles(
+                stale, directory / "bundle"
+            )
+            for name, e in statistics.failed.items():
+                if name == asset_bundle_str:
+                    raise e
+                log.warning(f"failed to download dependency {name}: {e!r}")
+            for name in stale:
+                if name not in statistics.failed:
+                    await write_hash(
+                        directory / "bundle_hash" / name, bundles[name].hash or ""
+                    )
+            dependency_paths = [
+                path
+                for name in dependencies
+                if await aiofiles.os.path.exists(
+                    path := directory / "bundle" / f"{name}.unity3d"
+                )
+            ]
+        else:
+            await client.download_asset_bundle_to_path(asset_bundle_str, bundle_path)
 
-        env = UnityPy.load(str(directory / "bundle" / f"{asset_bundle_str}.unity3d"))
+        # the dependencies go in the same environment, so references into them
+        # resolve, but only the bundle's own container is extracted
+        env = UnityPy.load(str(bundle_path))
+        for path in dependency_paths:
+            env.load_file(str(path), is_dependency=True)
         container = sorted(
             env.container.items(),
             key=lambda x: defaulted_export_index(x[1].type),
@@ -153,11 +211,7 @@ async def load_asset(
 
         await asyncio.gather(*tasks)
 
-        await aiofiles.os.makedirs(
-            (directory / "hash" / asset_bundle_str).parent, exist_ok=True
-        )
-        async with aiofiles.open(directory / "hash" / asset_bundle_str, "w") as f:
-            await f.write(bundle_hash)
+        await write_hash(directory / "hash" / asset_bundle_str, bundle_hash)
 
         log.info(f"updated bundle {asset_bundle_str}")
         return [(directory / p) for p in paths]